@@ -0,0 +1,9 @@
+"""
+PureTone benchmark suite.
+
+dsf       -- sigma-delta modulator writing synthetic DSF64/DSF128 test albums
+harness   -- times puretone.py over a matrix of modes, formats, precisions and
+             --parallel levels, stores the results and compares them to a baseline
+
+Run with `python -m benchmark --help` from the repository root.
+"""
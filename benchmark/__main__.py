@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from . import dsf, harness
+
+def csv_list(value: str) -> list:
+    return [item for item in value.split(',') if item]
+
+def int_list(value: str) -> list:
+    try:
+        return [int(item) for item in csv_list(value)]
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be a comma-separated list of integers")
+
+def default_corpus(seconds: float, dsd_rate: int) -> str:
+    return os.path.join(tempfile.gettempdir(), 'puretone-benchmark', f"dsd{dsd_rate}-{seconds:g}s")
+
+def add_corpus_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--seconds', type=float, default=30.0, help="Length of each track. Default: 30")
+    parser.add_argument('--dsd', type=int, choices=sorted(dsf.DSD_RATES), default=64, help="DSD64 or DSD128. Default: 64")
+    parser.add_argument('--contents', type=csv_list, default=list(dsf.CONTENTS),
+                        help=f"Tracks to generate, one per content. Default: {','.join(dsf.CONTENTS)}")
+    parser.add_argument('--seed', type=int, default=1, help="Noise seed. Default: 1")
+
+def main():
+    # Everything after '--' is passed to puretone.py unchanged (e.g. -- --resampler swr)
+    argv = sys.argv[1:]
+    extra_args = []
+    if '--' in argv:
+        extra_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description="PureTone throughput benchmark")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="Write a synthetic DSF album")
+    generate.add_argument('directory', help="Output directory")
+    add_corpus_arguments(generate)
+    generate.add_argument('--check', action='store_true', help="Print each track's 0-20 kHz peak after writing it")
+
+    run = commands.add_parser('run', help="Time puretone.py over a case matrix and store the results")
+    run.add_argument('--corpus', help="Corpus directory (generated if missing). Default: <tmp>/puretone-benchmark/dsd<rate>-<seconds>s")
+    add_corpus_arguments(run)
+    run.add_argument('--modes', type=csv_list, default=list(harness.MODES),
+                     help=f"Pipeline modes. Default: {','.join(harness.MODES)}")
+    run.add_argument('--formats', type=csv_list, default=['wav', 'flac'], help="Output formats. Default: wav,flac")
+    run.add_argument('--precisions', type=int_list, default=[28], help="Resampler precisions. Default: 28")
+    run.add_argument('--parallel', type=int_list, default=[1, 2, 4], help="--parallel levels. Default: 1,2,4")
+    run.add_argument('--repeat', type=int, default=3, help="Runs per case; the median is compared. Default: 3")
+    run.add_argument('--puretone', help="PureTone executable (e.g. the Nuitka build). Default: this tree's puretone.py")
+    run.add_argument('--results-dir', default=harness.RESULTS_DIR, help="Where results are stored. Default: benchmark/results")
+    run.add_argument('--baseline', help="Results file to compare against")
+    run.add_argument('--threshold', type=float, default=0.10, help="Slowdown reported as a regression. Default: 0.10")
+
+    compare = commands.add_parser('compare', help="Compare two stored results")
+    compare.add_argument('current')
+    compare.add_argument('baseline')
+    compare.add_argument('--threshold', type=float, default=0.10, help="Slowdown reported as a regression. Default: 0.10")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        for path in dsf.generate_corpus(args.directory, args.seconds, args.dsd, args.contents, args.seed):
+            print(path)
+            if args.check:
+                peaks = dsf.peak_db(path)
+                print(f"    peak L {peaks['left']:+.2f} dB, R {peaks['right']:+.2f} dB (re 0 dB SACD)")
+        return 0
+
+    if args.command == 'compare':
+        rows, regressions = harness.compare(harness.load(args.current), harness.load(args.baseline), args.threshold)
+        harness.print_comparison(rows, regressions, args.threshold)
+        return 1 if regressions else 0
+
+    unknown = set(args.modes) - set(harness.MODES) or set(args.formats) - set(harness.FORMAT_EXTENSIONS)
+    if unknown:
+        parser.error(f"unknown mode or format: {', '.join(sorted(unknown))}")
+    corpus = args.corpus or default_corpus(args.seconds, args.dsd)
+    print(f"Corpus: {corpus}")
+    dsf.generate_corpus(corpus, args.seconds, args.dsd, args.contents, args.seed)
+    results = harness.run_matrix(corpus, args.modes, args.formats, args.precisions, args.parallel, args.repeat,
+                                 [args.puretone] if args.puretone else None, extra_args)
+    path = harness.save(results, args.results_dir)
+    print(f"Results written to {path}")
+    if args.baseline:
+        rows, regressions = harness.compare(results, harness.load(args.baseline), args.threshold)
+        harness.print_comparison(rows, regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
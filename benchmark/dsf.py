@@ -0,0 +1,269 @@
+"""
+Synthetic DSF generator.
+
+A second-order sigma-delta modulator turns analytic test signals into 1-bit
+DSD and writes them as standard DSF files (DSD64 or DSD128, stereo, 4096-byte
+channel blocks, LSB-first bit order). The feedback loop cannot be vectorised
+along time, so each chunk is cut into many short segments that are modulated
+side by side and spliced back together click-free (see write_dsf).
+"""
+import json
+import math
+import os
+import struct
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DSD_RATES = {64: 2822400, 128: 5644800}
+
+# 0 dB SACD reference level is 50% modulation depth; the format allows up to ~70%
+FULL_SCALE = 0.5
+
+DSF_BLOCK_SIZE = 4096
+SEGMENT = 8192
+SEGMENTS_PER_CHUNK = 256
+WARMUP = 256
+OVERLAP = 1024
+
+# Content rendered at this rate and interpolated up (noise only; tones are analytic)
+NOISE_RATE = 88200
+
+CONTENTS = ('sine', 'pink', 'transients')
+
+def db_to_amplitude(level_db: float) -> float:
+    return FULL_SCALE * 10 ** (level_db / 20)
+
+def sine_signal(seconds: float, seed: int, level_db: float = -6.0) -> Callable[[np.ndarray], np.ndarray]:
+    """997 Hz left, 1499 Hz right: steady tones away from bin-aligned frequencies."""
+    amplitude = db_to_amplitude(level_db)
+
+    def render(t: np.ndarray) -> np.ndarray:
+        return amplitude * np.stack([np.sin(2 * np.pi * 997 * t), np.sin(2 * np.pi * 1499 * t)])
+    return render
+
+def pink_signal(seconds: float, seed: int, level_db: float = -16.0) -> Callable[[np.ndarray], np.ndarray]:
+    """Independent pink noise per channel, band-limited to 20 kHz, at level_db RMS."""
+    rng = np.random.default_rng(seed)
+    length = int(seconds * NOISE_RATE) + 2
+    spectrum = np.fft.rfft(rng.standard_normal((2, length)), axis=1)
+    frequencies = np.fft.rfftfreq(length, 1 / NOISE_RATE)
+    shape = np.zeros_like(frequencies)
+    band = (frequencies >= 20) & (frequencies <= 20000)
+    shape[band] = 1 / np.sqrt(frequencies[band])
+    noise = np.fft.irfft(spectrum * shape, length, axis=1)
+    noise *= db_to_amplitude(level_db) / np.sqrt(np.mean(noise ** 2))
+    # Keep the crest factor inside the modulator's stable range
+    np.clip(noise, -0.7, 0.7, out=noise)
+    grid = np.arange(length) / NOISE_RATE
+
+    def render(t: np.ndarray) -> np.ndarray:
+        return np.stack([np.interp(t, grid, channel) for channel in noise])
+    return render
+
+def transient_signal(seconds: float, seed: int, level_db: float = -0.3) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    A -30 dB bed with a decaying 4 kHz / 220 Hz burst every 0.5 s peaking just
+    under level_db: exercises the headroom limit of --volume auto.
+    """
+    bed = db_to_amplitude(-30)
+    peak = db_to_amplitude(level_db)
+    period, decay = 0.5, 0.03
+
+    def render(t: np.ndarray) -> np.ndarray:
+        phase = np.mod(t, period)
+        envelope = np.where(t >= 0, np.exp(-phase / decay), 0.0)
+        burst = 0.6 * np.sin(2 * np.pi * 4000 * phase) + 0.4 * np.sin(2 * np.pi * 220 * phase + np.pi / 2)
+        left = bed * np.sin(2 * np.pi * 440 * t) + (peak - bed) * envelope * burst
+        right = bed * np.sin(2 * np.pi * 660 * t) + (peak - bed) * envelope * np.sin(2 * np.pi * 3000 * phase)
+        return np.stack([left, right])
+    return render
+
+SIGNALS = {'sine': sine_signal, 'pink': pink_signal, 'transients': transient_signal}
+
+def wrap2(value: np.ndarray) -> np.ndarray:
+    """value modulo 2, in [-1, 1)."""
+    return value - 2 * np.floor((value + 1) / 2)
+
+def modulate(x: np.ndarray, i1_start: np.ndarray, windows: List[int]) -> tuple:
+    """
+    Second-order sigma-delta over x shaped (samples, channels, segments),
+    first integrator starting at i1_start. Returns the 0/1 bits and, for each
+    start index in windows, the state the next sample sees (each integrator
+    minus the fed-back output) over the OVERLAP samples from there. Integrators are clamped so an overload recovers instead of
+    oscillating.
+    """
+    bits = np.empty(x.shape, dtype=np.uint8)
+    states = {start: np.empty((2, OVERLAP) + x.shape[1:]) for start in windows}
+    i1 = i1_start.astype(np.float64)
+    i2 = np.zeros(x.shape[1:])
+    y = np.zeros(x.shape[1:])
+    for n in range(x.shape[0]):
+        i1 += x[n] - y
+        i2 += i1 - y
+        np.clip(i1, -4.0, 4.0, out=i1)
+        np.clip(i2, -8.0, 8.0, out=i2)
+        positive = i2 >= 0
+        y = positive * 2.0 - 1.0
+        bits[n] = positive
+        for start, state in states.items():
+            if start <= n < start + OVERLAP:
+                state[0, n - start] = i1 - y
+                state[1, n - start] = i2 - y
+    return bits, states
+
+def dsf_header(sample_rate: int, samples: int, data_bytes: int) -> bytes:
+    total = 28 + 52 + 12 + data_bytes
+    return (b'DSD ' + struct.pack('<QQQ', 28, total, 0) +
+            b'fmt ' + struct.pack('<QIIIIIIQII', 52, 1, 0, 2, 2, sample_rate, 1, samples, DSF_BLOCK_SIZE, 0) +
+            b'data' + struct.pack('<Q', 12 + data_bytes))
+
+def write_dsf(path: str, render: Callable[[np.ndarray], np.ndarray], seconds: float, dsd_rate: int = 64):
+    """
+    Modulate render(t) for `seconds` and write it to path as a stereo DSF.
+
+    Segment k covers WARMUP samples before its boundary, SEGMENT samples of
+    its own and OVERLAP samples into segment k+1. Since every output bit is
+    +-1, the first integrator modulo 2 depends only on the input sum, so each
+    segment starts with the value the previous one will have there: the two
+    first-integrator states then differ by an even integer, and the splice is
+    made inside the overlap where they agree (and the second ones are closest).
+    That keeps the running sum of the bitstream continuous, so segment
+    boundaries do not click.
+    """
+    sample_rate = DSD_RATES[dsd_rate]
+    samples = int(seconds * sample_rate) // 8 * 8
+    blocks = -(-samples // (8 * DSF_BLOCK_SIZE))
+    data_bytes = blocks * 2 * DSF_BLOCK_SIZE
+    span = WARMUP + SEGMENT + OVERLAP
+    offsets = np.arange(-WARMUP, SEGMENT + OVERLAP)
+    input_sum = np.zeros(2)
+    pending = None
+
+    with open(path, 'wb') as f:
+        f.write(dsf_header(sample_rate, samples, data_bytes))
+        written = 0
+        for start in range(0, samples, SEGMENT * SEGMENTS_PER_CHUNK):
+            segments = min(SEGMENTS_PER_CHUNK, -(-(samples - start) // SEGMENT))
+            index = start + np.arange(segments)[:, None] * SEGMENT + offsets[None, :]
+            x = render(index.ravel() / sample_rate).reshape(2, segments, span)
+            # Input summed from the first segment's start to each segment's start
+            sums = np.cumsum(x[:, :, :SEGMENT].sum(axis=2), axis=1)
+            i1_start = wrap2(input_sum[:, None] + np.concatenate([np.zeros((2, 1)), sums[:, :-1]], axis=1))
+            input_sum += sums[:, -1]
+
+            head, tail = WARMUP, WARMUP + SEGMENT
+            bits, states = modulate(np.ascontiguousarray(x.transpose(2, 0, 1)), i1_start, [head, tail])
+            out = bits[head:tail].transpose(1, 2, 0).copy()  # (channels, segments, SEGMENT)
+
+            # Old side of each boundary: the previous segment's overlap (or the last chunk's)
+            old_bits = bits[tail:].transpose(1, 2, 0)[:, :-1]
+            old_states = states[tail].transpose(0, 2, 3, 1)[:, :, :-1]
+            if pending is not None:
+                old_bits = np.concatenate([pending[0][:, None], old_bits], axis=1)
+                old_states = np.concatenate([pending[1][:, :, None], old_states], axis=2)
+            new_states = states[head].transpose(0, 2, 3, 1)[:, :, -old_bits.shape[1]:] if old_bits.shape[1] else None
+            if new_states is not None:
+                cost = np.abs(old_states[0] - new_states[0]) + 0.05 * np.abs(old_states[1] - new_states[1])
+                cut = cost.argmin(axis=2)
+                take_old = np.arange(OVERLAP)[None, None, :] <= cut[:, :, None]
+                patched = out[:, -old_bits.shape[1]:, :OVERLAP]
+                out[:, -old_bits.shape[1]:, :OVERLAP] = np.where(take_old, old_bits, patched)
+            pending = (bits[tail:, :, -1].T.copy(), states[tail][:, :, :, -1].transpose(0, 2, 1))
+
+            length = min(segments * SEGMENT, samples - start)
+            packed = np.packbits(out.reshape(2, -1)[:, :length], axis=1, bitorder='little')
+            pad = -packed.shape[1] % DSF_BLOCK_SIZE
+            if pad:
+                packed = np.pad(packed, ((0, 0), (0, pad)))
+            f.write(packed.reshape(2, -1, DSF_BLOCK_SIZE).transpose(1, 0, 2).tobytes())
+            written += packed.size
+    assert written == data_bytes, (written, data_bytes)
+
+def generate_corpus(directory: str, seconds: float = 30.0, dsd_rate: int = 64,
+                    contents: Optional[List[str]] = None, seed: int = 1) -> List[str]:
+    """
+    One album of `NN - <content>.dsf` tracks. A corpus.json beside them records
+    the parameters, so an identical corpus is reused instead of regenerated.
+    """
+    contents = list(contents or CONTENTS)
+    params = {'seconds': seconds, 'dsd_rate': dsd_rate, 'contents': contents, 'seed': seed}
+    manifest = os.path.join(directory, 'corpus.json')
+    files = [os.path.join(directory, f"{i:02d} - {content}.dsf") for i, content in enumerate(contents, 1)]
+    try:
+        with open(manifest) as f:
+            if json.load(f) == params and all(os.path.exists(path) for path in files):
+                return files
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    for i, (path, content) in enumerate(zip(files, contents)):
+        if content not in SIGNALS:
+            raise ValueError(f"Unknown content '{content}' (choose from {', '.join(CONTENTS)})")
+        write_dsf(path, SIGNALS[content](seconds, seed + i), seconds, dsd_rate)
+    with open(manifest, 'w') as f:
+        json.dump(params, f, indent=2)
+    return files
+
+def corpus_seconds(directory: str) -> float:
+    """Total audio duration of the corpus, from the DSF headers."""
+    total = 0.0
+    for name in os.listdir(directory):
+        if name.endswith('.dsf'):
+            with open(os.path.join(directory, name), 'rb') as f:
+                header = f.read(72)
+            sample_rate, = struct.unpack_from('<I', header, 56)
+            samples, = struct.unpack_from('<Q', header, 64)
+            total += samples / sample_rate
+    return total
+
+# peak_db: Kaiser low-pass passing 0-20 kHz, run over this many DSF blocks per channel at a time
+PEAK_PASSBAND = 20000
+PEAK_TRANSITION = 4000
+PEAK_ATTENUATION = 80
+PEAK_BLOCKS = 60
+
+def peak_taps(sample_rate: int) -> np.ndarray:
+    transition = PEAK_TRANSITION / sample_rate
+    taps = int(math.ceil((PEAK_ATTENUATION - 8) / (2.285 * 2 * math.pi * transition))) | 1
+    n = np.arange(taps) - (taps - 1) / 2
+    cutoff = (PEAK_PASSBAND + PEAK_TRANSITION / 2) / sample_rate
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(taps, 0.1102 * (PEAK_ATTENUATION - 8.7))
+    return h / h.sum()
+
+def peak_db(path: str, seconds: Optional[float] = None) -> Dict[str, float]:
+    """
+    Crude decode check: 0-20 kHz peak (dB re 0 dB SACD) of a DSF written by
+    this module. The file is filtered PEAK_BLOCKS blocks at a time by FFT
+    overlap-save, so memory stays bounded whatever the track length; only
+    output samples the whole filter covers are measured.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(92)
+        sample_rate, = struct.unpack_from('<I', header, 56)
+        samples, = struct.unpack_from('<Q', header, 64)
+        limit = samples if seconds is None else min(samples, int(seconds * sample_rate))
+        h = peak_taps(sample_rate)
+        history = np.zeros((2, 0))
+        spectra = {}
+        peak = np.zeros(2)
+        read = 0
+        while read < limit:
+            data = np.frombuffer(f.read(PEAK_BLOCKS * 2 * DSF_BLOCK_SIZE), dtype=np.uint8)
+            if not len(data):
+                break
+            bits = np.unpackbits(data.reshape(-1, 2, DSF_BLOCK_SIZE).transpose(1, 0, 2).reshape(2, -1), axis=1, bitorder='little')
+            bits = bits[:, :limit - read]
+            read += bits.shape[1]
+            signal = np.concatenate([history, bits.astype(np.float64) * 2 - 1], axis=1)
+            history = signal[:, signal.shape[1] - (len(h) - 1):]
+            if signal.shape[1] < len(h):
+                continue
+            size = 1 << (signal.shape[1] + len(h) - 2).bit_length()
+            if size not in spectra:
+                spectra[size] = np.fft.rfft(h, size)
+            audio = np.fft.irfft(np.fft.rfft(signal, size, axis=1) * spectra[size], size, axis=1)[:, len(h) - 1:signal.shape[1]]
+            peak = np.maximum(peak, np.abs(audio).max(axis=1))
+    return {channel: 20 * math.log10(max(float(peak[i]), 1e-12) / FULL_SCALE)
+            for i, channel in enumerate(('left', 'right'))}
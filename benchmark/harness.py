@@ -0,0 +1,150 @@
+"""
+Benchmark harness.
+
+Times puretone.py over a synthetic corpus for every combination of pipeline
+mode, output format, --precision and --parallel level, stores the results as
+JSON and compares them with a baseline run. Each case runs with --profile, so
+the per-stage totals are stored next to the wall times.
+"""
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from puretone import FORMAT_EXTENSIONS, OUTPUT_DIRS
+
+from . import dsf
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Volume arguments of each pipeline mode; loudnorm is PureTone's default
+MODES = {'auto': ['--volume', 'auto'], 'fixed': ['--volume', '0dB'], 'loudnorm': []}
+
+def case_key(case: dict) -> str:
+    return f"{case['mode']}/{case['format']}/p{case['precision']}/j{case['parallel']}"
+
+def command_version(cmd: List[str]) -> Optional[str]:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.splitlines()[0] if result.returncode == 0 and result.stdout else None
+
+def environment() -> dict:
+    return {
+        'host': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'ffmpeg': command_version(['ffmpeg', '-version']),
+        'revision': command_version(['git', '-C', REPO_DIR, 'rev-parse', '--short', 'HEAD']),
+    }
+
+def run_case(puretone: List[str], corpus: str, case: dict, repeat: int, extra_args: List[str]) -> dict:
+    """Run one case `repeat` times; wall times, the median and the last run's stage totals."""
+    output_dir = os.path.join(corpus, OUTPUT_DIRS[case['format']])
+    cmd = puretone + [corpus, '--format', case['format'], '--precision', str(case['precision']),
+                      '--parallel', str(case['parallel']), '--no-cache'] + MODES[case['mode']] + extra_args
+    seconds = []
+    stages = {}
+    with tempfile.TemporaryDirectory(prefix='puretone-bench-') as work:
+        profile = os.path.join(work, 'profile.json')
+        for _ in range(repeat):
+            shutil.rmtree(output_dir, ignore_errors=True)
+            started = time.monotonic()
+            result = subprocess.run(cmd + ['--profile', profile], capture_output=True, text=True)
+            elapsed = time.monotonic() - started
+            if result.returncode != 0:
+                return {'error': (result.stderr or result.stdout).strip().splitlines()[-20:]}
+            seconds.append(elapsed)
+            with open(profile) as f:
+                stages = json.load(f)['stages']
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return {'seconds': seconds, 'median': statistics.median(seconds), 'stages': stages}
+
+def run_matrix(corpus: str, modes: List[str], formats: List[str], precisions: List[int], parallels: List[int],
+               repeat: int = 3, puretone: Optional[List[str]] = None, extra_args: Optional[List[str]] = None) -> dict:
+    puretone = puretone or [sys.executable, os.path.join(REPO_DIR, 'puretone.py')]
+    audio_seconds = dsf.corpus_seconds(corpus)
+    with open(os.path.join(corpus, 'corpus.json')) as f:
+        corpus_params = json.load(f)
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'corpus': dict(corpus_params, audio_seconds=audio_seconds),
+        'command': puretone + (extra_args or []),
+        'repeat': repeat,
+        'cases': {},
+    }
+    for mode, output_format, precision, parallel in itertools.product(modes, formats, precisions, parallels):
+        case = {'mode': mode, 'format': output_format, 'precision': precision, 'parallel': parallel}
+        key = case_key(case)
+        print(f"{key:<28}", end=' ', flush=True)
+        outcome = run_case(puretone, corpus, case, repeat, extra_args or [])
+        if 'error' in outcome:
+            print("FAILED")
+            for line in outcome['error']:
+                print(f"    {line}")
+        else:
+            outcome['realtime'] = audio_seconds / outcome['median']
+            print(f"{outcome['median']:8.2f} s  {outcome['realtime']:7.1f}x realtime")
+        results['cases'][key] = dict(case, **outcome)
+    return results
+
+def save(results: dict, directory: str = RESULTS_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{results['environment']['host']}.json")
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    return path
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> Tuple[List[dict], List[str]]:
+    """
+    Per-case median ratios (current / baseline) for the cases both runs have;
+    a case regresses when it is slower by more than threshold, or now fails.
+    """
+    rows = []
+    regressions = []
+    if current.get('corpus', {}).get('audio_seconds') != baseline.get('corpus', {}).get('audio_seconds'):
+        print("Warning: the runs used different corpora; ratios are not comparable")
+    for key, case in current['cases'].items():
+        base = baseline['cases'].get(key)
+        if base is None or 'median' not in base:
+            continue
+        row = {'case': key, 'baseline': base['median'], 'current': case.get('median')}
+        if row['current'] is None:
+            row['ratio'] = None
+            regressions.append(key)
+        else:
+            row['ratio'] = row['current'] / row['baseline']
+            if row['ratio'] > 1 + threshold:
+                regressions.append(key)
+        rows.append(row)
+    return rows, regressions
+
+def print_comparison(rows: List[dict], regressions: List[str], threshold: float):
+    print(f"\n{'Case':<28} {'Baseline (s)':>12} {'Current (s)':>12} {'Change':>8}")
+    for row in rows:
+        if row['ratio'] is None:
+            print(f"{row['case']:<28} {row['baseline']:>12.2f} {'failed':>12} {'':>8}  REGRESSION")
+            continue
+        flag = '  REGRESSION' if row['case'] in regressions else ''
+        print(f"{row['case']:<28} {row['baseline']:>12.2f} {row['current']:>12.2f} {row['ratio'] - 1:>+8.1%}{flag}")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {threshold:.0%}")
+    else:
+        print(f"No case slower than the baseline by more than {threshold:.0%}")
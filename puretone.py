@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import subprocess
+import asyncio
 import os
 import argparse
 import logging
@@ -8,13 +9,35 @@ import re
 import sys
 import signal
 import stat
+import sqlite3
+import hashlib
+import hmac
+import json
+import csv
+import threading
+import math
+import mmap
+import struct
+import heapq
+import select
+import socket
+import socketserver
 from pathlib import Path
+from collections import deque
+from functools import partial
+from contextlib import contextmanager
+import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import shutil
 import termios
 import tty
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Save terminal state at startup
 ORIGINAL_TERMINAL_STATE = None
 if sys.stdin.isatty():
@@ -36,17 +59,31 @@ class PureToneConfig:
         self.LOUDNORM_I = '-14'
         self.LOUDNORM_TP = '-1'
         self.LOUDNORM_LRA = '20'
+        # Loudness normalization without --volume: each 'track' on its own, or one gain per 'album' group
+        self.LOUDNORM_MODE = 'track'
         self.VOLUME = None
         self.VOLUME_INCREASE = '1dB'
         self.RESAMPLER = 'soxr'
         self.PRECISION = '28'
         self.CHEBY = '1'
         self.OUTPUT_FORMAT = 'wav'
+        # Every --format, OUTPUT_FORMAT (the first) included; all are encoded from one decode
+        self.OUTPUT_FORMATS = ['wav']
         self.WAVPACK_COMPRESSION = '0'
         self.FLAC_COMPRESSION = '0'
+        # PADDING reserved in every FLAC at encode time, so the tags are written in place
+        self.FLAC_PADDING = 65536
         self.OVERWRITE = True
         self.SKIP_EXISTING = False
         self.PARALLEL_JOBS = 2
+        # --parallel auto: pool sizing and back-off
+        self.PARALLEL_AUTO = False
+        self.FFMPEG_THREADS = None
+        self.AUTO_WORKER_MEMORY = 512 * 1024 * 1024
+        self.AUTO_TRACK_SECONDS = 900
+        self.AUTO_MAX_LOAD = 1.5
+        self.AUTO_MAX_SCRATCH_USAGE = 0.85
+        self.AUTO_BACKOFF_INTERVAL = 2.0
         self.ENABLE_VISUALIZATION = False
         self.VISUALIZATION_TYPE = 'spectrogram'
         self.VISUALIZATION_SIZE = '1920x1080'
@@ -56,6 +93,55 @@ class PureToneConfig:
         # SACD
         self.KEEP_DSF = False
         self.EXTRACT_ONLY = False
+        self.EXTRACT_JOBS = 1
+        self.STREAM_EXTRACT = False
+        self.ISO_READER = 'native'
+        self.STREAM_POLL_INTERVAL = 0.5
+        # Subprocess supervisor: seconds before a child is killed (None = no limit), between a
+        # track's progress lines (0 = none), and between SIGTERM and SIGKILL on shutdown
+        self.PROCESS_TIMEOUT = None
+        self.PROGRESS_INTERVAL = 30.0
+        self.KILL_GRACE = 2.0
+        # stderr kept per child (its first and last halves) and pipe read size
+        self.STDERR_BUFFER = 256 * 1024
+        self.PIPE_CHUNK = 64 * 1024
+        # Analysis cache
+        self.CACHE_ENABLED = True
+        self.CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'puretone')
+        self.CACHE_MAX_ENTRIES = 50000
+        self.CACHE_MAX_AGE_DAYS = 180
+        # Peak/loudness measurement engine: 'ffmpeg' filters or in-process 'numpy'
+        self.METER = 'ffmpeg'
+        # DSD->PCM engine: ffmpeg decoder + aresample, or the built-in 'native' decimator
+        self.ENGINE = 'ffmpeg'
+        self.ENGINE_THREADS = max(1, (os.cpu_count() or 1) // 2)
+        # Decode-once pipeline
+        self.DECODE_ONCE = False
+        self.SCRATCH_DIR = '/tmp'
+        # Scratch byte budget; None = SCRATCH_BUDGET_FREE_FRACTION of the free space at start
+        self.SCRATCH_BUDGET = None
+        self.SCRATCH_BUDGET_FREE_FRACTION = 0.9
+        # Per-album journal: continue from it (--resume) instead of starting the album over.
+        # Journals are kept here, one per output directory, so the published library stays clean.
+        self.RESUME = False
+        self.JOURNAL_DIR = os.path.join(os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state'), 'puretone', 'journals')
+        # Watch-folder daemon (serve)
+        self.SERVE_STATE_DIR = os.path.join(os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state'), 'puretone')
+        self.SERVE_SOCKET = os.path.join(self.SERVE_STATE_DIR, 'puretone.sock')
+        self.SERVE_SETTLE = 30.0
+        self.SERVE_ALBUMS = 2
+        # Distributed conversion: tracks in flight on workers, and how lost workers are detected and retried
+        self.REMOTE_JOBS = 16
+        self.REMOTE_TIMEOUT = 60.0
+        self.REMOTE_HEARTBEAT = 10.0
+        self.REMOTE_ATTEMPTS = 3
+        self.REMOTE_RETRY_INTERVAL = 5.0
+        # Shared secret both ends prove with HMAC challenges; required to listen beyond loopback
+        self.REMOTE_TOKEN = os.environ.get('PURETONE_REMOTE_TOKEN') or None
+        # Segmented tracks: tracks of at least two SEGMENT_SECONDS pieces are resampled on SEGMENT_JOBS cores
+        self.SEGMENT_SECONDS = None
+        self.SEGMENT_JOBS = max(1, os.cpu_count() or 1)
+        self.SEGMENT_VERIFY = False
 
 CONFIG = PureToneConfig()
 
@@ -65,23 +151,377 @@ OUTPUT_DIRS = {'wav': 'wv', 'wavpack': 'wvpk', 'flac': 'flac', 'dsf': 'dsf'}
 # File extensions by format
 FORMAT_EXTENSIONS = {'wav': 'wav', 'wavpack': 'wv', 'flac': 'flac'}
 
-# Temporary files
-TEMP_FILES = {
-    'PEAK_LOG': f"/tmp/puretone_{os.getpid()}_peaks.log",
-    'VOLUME_LOG': f"/tmp/puretone_{os.getpid()}_volume.log",
-}
+# Encoder sample format and bit depth matching each intermediate PCM codec, so a
+# direct FLAC/WavPack encode stores exactly what the intermediate WAV would hold
+PCM_SAMPLE_FORMATS = {'pcm_s16le': ('s16', '16'), 'pcm_s24le': ('s32', '24'), 'pcm_s32le': ('s32', '32')}
+
+# Codec of the unity-gain PCM kept by --decode-once. Float keeps the soxr
+# output exactly as the one-pass chain would hand it to volume=.
+DECODE_ONCE_CODEC = 'pcm_f32le'
+
+# --decode-once: input file -> (resampled unity-gain PCM awaiting its encode, decoder that produced it)
+RESAMPLED_PCM: Dict[str, Tuple[str, str]] = {}
+
+class ScratchManager:
+    """
+    Owns every temporary file and directory of the run under CONFIG.SCRATCH_DIR.
+    Jobs reserve their estimated footprint before they start and are only
+    admitted while the byte budget allows; a reservation is released when
+    its file is removed, or when the job ends without leaving the file
+    behind. cleanup() removes exactly what was handed out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = set()
+        self.dirs = set()
+        self.reserved = {}
+        self.budget = None
+
+    def path(self, input_file: str, suffix: str) -> str:
+        """Per-run scratch path, unique per input even when albums share track names."""
+        tag = hashlib.md5(os.path.abspath(input_file).encode()).hexdigest()[:8]
+        return normalize_path(os.path.join(CONFIG.SCRATCH_DIR, f"puretone_{os.getpid()}_{Path(input_file).stem}_{tag}_{suffix}"))
+
+    def directory(self, name: str) -> str:
+        path = normalize_path(os.path.join(CONFIG.SCRATCH_DIR, f"puretone_{os.getpid()}_{name}"))
+        os.makedirs(path, exist_ok=True)
+        with self.lock:
+            self.dirs.add(path)
+        return path
+
+    def track(self, path: str):
+        with self.lock:
+            self.files.add(path)
+
+    def remove(self, path: str):
+        with self.lock:
+            self.files.discard(path)
+            self.reserved.pop(path, None)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def reserve(self, claims: Dict[str, int], force: bool = False) -> bool:
+        """Reserve {path: bytes} for a job; False when it does not fit the budget."""
+        with self.lock:
+            new = {path: size for path, size in claims.items() if path not in self.reserved}
+            if not new:
+                return True
+            if not force and self.budget is not None and sum(self.reserved.values()) + sum(new.values()) > self.budget:
+                return False
+            self.reserved.update(new)
+            return True
+
+    def settle(self, claims: Dict[str, int]):
+        """After a job: drop reservations whose file was not left behind."""
+        with self.lock:
+            for path in claims:
+                if path not in self.files:
+                    self.reserved.pop(path, None)
+
+    def cleanup(self):
+        with self.lock:
+            files, dirs = list(self.files), list(self.dirs)
+        for path in files:
+            try:
+                self.remove(path)
+                logger.debug(f"Removed scratch file: {path}")
+            except OSError as e:
+                logger.error(f"Failed to remove {path}: {e}")
+        for path in dirs:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.debug(f"Removed scratch dir: {path}")
+        with self.lock:
+            self.dirs.clear()
 
-# Temporary directory for sacd_extract (cfg + embedded binary)
-SACD_TEMP_DIR = f"/tmp/puretone_{os.getpid()}_sacd"
+SCRATCH = ScratchManager()
 
-def run_command(cmd: List[str], capture_output: bool = True, cwd: Optional[str] = None) -> Tuple[str, str, int]:
-    logger.debug(f"Executing command: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=capture_output, text=True, cwd=cwd)
-    stdout = result.stdout or ''
-    stderr = result.stderr or ''
-    if result.returncode != 0:
-        logger.error(f"Command failed with return code {result.returncode}: {stderr}")
-    return stdout, stderr, result.returncode
+def track_format(input_file: str) -> Optional[Tuple[float, int]]:
+    """(duration in seconds, channels) from the DSF header or the ISO track list, without decoding."""
+    if input_file in SACD_TRACKS:
+        disc, track = SACD_TRACKS[input_file]
+        if track['frames']:
+            return track['frames'] / SACD_FRAME_RATE, disc.channels
+        return track['length'] * SACD_SECTOR * 8 / (disc.sample_rate * disc.channels), disc.channels
+    try:
+        with open(input_file, 'rb') as f:
+            header = f.read(72)
+    except OSError:
+        return None
+    if len(header) < 72 or header[:4] != b'DSD ' or header[28:32] != b'fmt ':
+        return None
+    channels, sample_rate = struct.unpack_from('<II', header, 52)
+    sample_count, = struct.unpack_from('<Q', header, 64)
+    return (sample_count / sample_rate if sample_rate else 0.0), channels
+
+def scratch_estimate(input_file: str, codec: str) -> int:
+    """Temp WAV footprint of a track: duration x CONFIG.AR x channels x sample width."""
+    width = int(re.search(r'(\d+)', codec).group(1)) // 8
+    duration, channels = track_format(input_file) or (CONFIG.AUTO_TRACK_SECONDS, 2)
+    return int(math.ceil(duration * int(CONFIG.AR))) * channels * width + 4096
+
+def release_resampled_pcm(input_file: str):
+    path, _ = RESAMPLED_PCM.pop(input_file, (None, None))
+    if path:
+        SCRATCH.remove(path)
+
+# ---------------------------------------------------------------------------
+# Process supervisor
+# ---------------------------------------------------------------------------
+
+class BoundedOutput:
+    """
+    A child's stderr cut to its first and last limit / 2 bytes: the stream
+    headers and the end-of-run summaries the analysis parses are kept, the
+    warnings in between of a long decode are not held in memory.
+    """
+
+    def __init__(self, limit: int):
+        self.half = limit // 2
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.dropped = 0
+
+    def feed(self, data: bytes):
+        room = self.half - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        self.tail += data
+        excess = len(self.tail) - self.half
+        if excess > 0:
+            del self.tail[:excess]
+            self.dropped += excess
+
+    def value(self) -> bytes:
+        if not self.dropped:
+            return bytes(self.head + self.tail)
+        return bytes(self.head) + f"\n[... {self.dropped} bytes of output dropped ...]\n".encode() + bytes(self.tail)
+
+def format_clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+class ProcessSupervisor:
+    """
+    Runs every subprocess on one asyncio loop, in its own thread, for the
+    worker threads that call run_command: stdout, stderr (bounded) and
+    ffmpeg's -progress pipe are read as the data arrives, each track's
+    progress and ETA is logged every CONFIG.PROGRESS_INTERVAL seconds, and a
+    child still running after CONFIG.PROCESS_TIMEOUT is killed. Children are
+    reaped through a pidfd once they exit, so --profile still gets their own
+    rusage. Every child leads its own process group; shutdown() kills the
+    groups and waits until they are reaped.
+    """
+
+    def __init__(self):
+        # Reentrant: shutdown() runs from the signal handler, possibly on a thread inside start()
+        self.lock = threading.RLock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running: Dict[int, subprocess.Popen] = {}
+        self.stopping = False
+
+    def start(self, cmd: List[str], capture_output: bool = True, cwd: Optional[str] = None,
+              feed: Optional[Callable] = None, stage: str = 'other', duration: Optional[float] = None,
+              stdout: bool = True, pass_fds: tuple = ()) -> concurrent.futures.Future:
+        """
+        Spawn cmd and return a future of (stdout, stderr, returncode) in bytes.
+        duration (default: the current track's) turns on ffmpeg progress.
+        """
+        scope = vars(PROFILE_SCOPE).copy()
+        if duration is None and scope.get('track'):
+            duration = (track_format(scope['track']) or (None, None))[0]
+        with self.lock:
+            if self.stopping:
+                cancelled = concurrent.futures.Future()
+                cancelled.set_result((b'', b'Cancelled', -signal.SIGTERM))
+                return cancelled
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name='process-supervisor', daemon=True).start()
+            progress_fd = None
+            if cmd and cmd[0] == 'ffmpeg' and duration and CONFIG.PROGRESS_INTERVAL:
+                progress_fd, write_fd = os.pipe()
+                cmd = [cmd[0], '-progress', f"pipe:{write_fd}", '-nostats'] + cmd[1:]
+                pass_fds = tuple(pass_fds) + (write_fd,)
+            logger.debug(f"Executing command: {' '.join(cmd)}")
+            pipe = subprocess.PIPE if capture_output else None
+            started = time.monotonic()
+            try:
+                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+                                        stdout=pipe if stdout else subprocess.DEVNULL, stderr=pipe, cwd=cwd,
+                                        pass_fds=pass_fds, start_new_session=True)
+            except OSError:
+                if progress_fd is not None:
+                    os.close(progress_fd)
+                raise
+            finally:
+                if progress_fd is not None:
+                    os.close(write_fd)
+            self.running[proc.pid] = proc
+        fed = None
+        if feed is not None:
+            # ffmpeg reads its input (native-engine PCM or an ISO track) from stdin while the loop collects its output
+            fed = concurrent.futures.Future()
+
+            def feeder():
+                try:
+                    with profile_scope(**scope):
+                        feed(proc.stdin)
+                finally:
+                    fed.set_result(None)
+
+            threading.Thread(target=feeder, daemon=True).start()
+            proc.stdin = None
+        return asyncio.run_coroutine_threadsafe(
+            self.supervise(proc, stage, started, duration, progress_fd, fed, scope), self.loop)
+
+    def run(self, cmd: List[str], **kwargs) -> Tuple[bytes, bytes, int]:
+        return self.start(cmd, **kwargs).result()
+
+    async def supervise(self, proc: subprocess.Popen, stage: str, started: float, duration: Optional[float],
+                        progress_fd: Optional[int], fed: Optional[concurrent.futures.Future], scope: dict) -> tuple:
+        loop = asyncio.get_running_loop()
+        stdout, stderr = bytearray(), BoundedOutput(CONFIG.STDERR_BUFFER)
+        waits = [loop.create_task(self.exited(proc))]
+        if proc.stdout:
+            waits.append(loop.create_task(self.drain(proc.stdout, stdout.extend)))
+        if proc.stderr:
+            waits.append(loop.create_task(self.drain(proc.stderr, stderr.feed)))
+        if progress_fd is not None:
+            label = f"{Path(scope['track']).name}: {stage}" if scope.get('track') else stage
+            waits.append(loop.create_task(self.follow_progress(progress_fd, label, started, duration)))
+        if fed is not None:
+            waits.append(asyncio.wrap_future(fed))
+        _, pending = await asyncio.wait(waits, timeout=CONFIG.PROCESS_TIMEOUT)
+        if pending:
+            logger.error(f"{proc.args[0]} ({stage}) still running after {CONFIG.PROCESS_TIMEOUT:g} s; killing it")
+            self.signal_group(proc, signal.SIGKILL)
+            await asyncio.wait(pending)
+        with profile_scope(**scope):
+            if PROFILER is None:
+                proc.wait()
+            else:
+                PROFILER.reap(proc, stage, started)
+        with self.lock:
+            self.running.pop(proc.pid, None)
+        return bytes(stdout), stderr.value(), proc.returncode
+
+    @staticmethod
+    async def exited(proc: subprocess.Popen):
+        """Wait for proc to exit without reaping it, so --profile can still read /proc/<pid>/io."""
+        loop = asyncio.get_running_loop()
+        try:
+            pidfd = os.pidfd_open(proc.pid)
+        except (AttributeError, OSError):
+            # No pidfd (Linux < 5.3): block a pool thread instead
+            await loop.run_in_executor(None, os.waitid, os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            return
+        done = loop.create_future()
+        loop.add_reader(pidfd, lambda: done.done() or done.set_result(None))
+        try:
+            await done
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    @staticmethod
+    async def open_reader(pipe) -> Tuple[asyncio.StreamReader, asyncio.BaseTransport]:
+        loop = asyncio.get_running_loop()
+        # The protocol pauses the pipe once a chunk is waiting, so a fast writer cannot fill memory
+        reader = asyncio.StreamReader(limit=CONFIG.PIPE_CHUNK)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        return reader, transport
+
+    async def drain(self, pipe, sink: Callable[[bytes], None]):
+        reader, transport = await self.open_reader(pipe)
+        try:
+            while True:
+                data = await reader.read(CONFIG.PIPE_CHUNK)
+                if not data:
+                    break
+                sink(data)
+        finally:
+            transport.close()
+
+    async def follow_progress(self, progress_fd: int, label: str, started: float, duration: float):
+        """Parse ffmpeg's -progress key=value blocks; log position and ETA at most every PROGRESS_INTERVAL seconds."""
+        reader, transport = await self.open_reader(os.fdopen(progress_fd, 'rb'))
+        reported = started
+        position = 0.0
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                key, _, value = line.decode(errors='replace').strip().partition('=')
+                if key == 'out_time_us' and value.lstrip('-').isdigit():
+                    position = max(0.0, int(value) / 1e6)
+                elif key == 'progress' and value == 'continue':
+                    now = time.monotonic()
+                    if now - reported < CONFIG.PROGRESS_INTERVAL or not position:
+                        continue
+                    reported = now
+                    fraction = min(1.0, position / duration)
+                    eta = (now - started) * (1 - fraction) / fraction
+                    logger.info(f"{label} {fraction:.0%} ({format_clock(position)} of {format_clock(duration)}), "
+                                f"ETA {format_clock(eta)}")
+        except ValueError:
+            # A progress line over PIPE_CHUNK: stop parsing, but keep the pipe drained
+            while await reader.read(CONFIG.PIPE_CHUNK):
+                pass
+        finally:
+            transport.close()
+
+    @staticmethod
+    def signal_group(proc: subprocess.Popen, signum: int):
+        # The group is proc's pid, which stays reserved until we reap proc
+        try:
+            os.killpg(proc.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def shutdown(self):
+        """
+        Stop starting processes, SIGTERM every running group, SIGKILL whatever
+        is left after CONFIG.KILL_GRACE seconds, and wait until all are reaped.
+        """
+        with self.lock:
+            self.stopping = True
+            running = list(self.running.values())
+        if not running:
+            return
+        logger.info(f"Stopping {len(running)} running process(es)...")
+        for proc in running:
+            self.signal_group(proc, signal.SIGTERM)
+        deadline = time.monotonic() + CONFIG.KILL_GRACE
+        while self.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with self.lock:
+            running = list(self.running.values())
+        for proc in running:
+            self.signal_group(proc, signal.SIGKILL)
+        deadline = time.monotonic() + CONFIG.KILL_GRACE
+        while self.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+SUPERVISOR = ProcessSupervisor()
+
+def run_command(cmd: List[str], capture_output: bool = True, cwd: Optional[str] = None,
+                feed: Optional[Callable] = None, stage: str = 'other',
+                duration: Optional[float] = None) -> Tuple[str, str, int]:
+    """Run cmd to completion under SUPERVISOR; stage names it in the --profile report and progress lines."""
+    cmd = pin_threads(cmd)
+    out, err, returncode = SUPERVISOR.run(cmd, capture_output=capture_output, cwd=cwd, feed=feed,
+                                          stage=stage, duration=duration)
+    stdout = out.decode(errors='replace') if out else ''
+    stderr = err.decode(errors='replace') if err else ''
+    if returncode != 0:
+        logger.error(f"Command failed with return code {returncode}: {stderr}")
+    return stdout, stderr, returncode
+
+# ---------------------------------------------------------------------------
 
 def normalize_path(path: str) -> str:
     return os.path.normpath(path).replace('//', '/')
@@ -89,6 +529,53 @@ def normalize_path(path: str) -> str:
 def validate_resolution(resolution: str) -> bool:
     return bool(re.match(r'^\d+x\d+$', resolution))
 
+def parse_parallel(value: str):
+    if value == 'auto':
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be an integer or 'auto'")
+
+def parse_formats(value: str) -> List[str]:
+    formats = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in formats if f not in FORMAT_EXTENSIONS]
+    if not formats or unknown:
+        raise argparse.ArgumentTypeError(f"must be a comma-separated list of {', '.join(FORMAT_EXTENSIONS)}")
+    return formats
+
+# Highest --compression-level of each compressed format, and the setting it goes to
+COMPRESSION_LEVELS = {'wavpack': (6, 'WAVPACK_COMPRESSION'), 'flac': (12, 'FLAC_COMPRESSION')}
+
+def parse_compression_levels(value: str, formats: List[str]) -> Optional[Dict[str, int]]:
+    """
+    'N' sets every requested compressed format; 'flac=8,wavpack=3' sets each
+    one separately. None when a level is malformed, out of range, or names a
+    format that is not requested or not compressed.
+    """
+    levels = {}
+    try:
+        if '=' not in value:
+            levels = {fmt: int(value) for fmt in formats if fmt in COMPRESSION_LEVELS}
+            if not levels:
+                return None
+        else:
+            for item in value.split(','):
+                fmt, level = item.split('=')
+                levels[fmt.strip()] = int(level)
+    except ValueError:
+        return None
+    for fmt, level in levels.items():
+        if fmt not in formats or fmt not in COMPRESSION_LEVELS or not 0 <= level <= COMPRESSION_LEVELS[fmt][0]:
+            return None
+    return levels
+
+def parse_size(value: str) -> int:
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([KMGT]?)i?B?', value.strip(), re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError("must be a size such as 500M or 20G")
+    return int(float(match.group(1)) * 1024 ** ' KMGT'.index(match.group(2).upper() or ' '))
+
 def validate_volume(volume: str) -> bool:
     return bool(re.match(r'^[-+]?[0-9]*\.?[0-9]+dB$', volume))
 
@@ -103,60 +590,1272 @@ def add_db(value_db: str, addition_db: str) -> str:
     addition = float(addition_db.replace('dB', '')) if addition_db else 0
     return f"{(value + addition):.1f}dB"
 
-def analyze_peaks(file: str, peak_log: str, log_type: str) -> Optional[float]:
-    _, stderr, rc = run_command(['ffmpeg', '-i', file, '-af', 'volumedetect', '-f', 'null', '-'])
-    max_volume = re.search(r'max_volume: ([-0-9.]* dB)', stderr)
-    max_volume_db = float(max_volume.group(1).replace(' dB', '')) if max_volume else None
-    if max_volume_db is None:
-        logger.warning(f"Max volume not detected for {file}")
+def parse_db(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def resample_filter() -> str:
+    return f"aresample=resampler={CONFIG.RESAMPLER}:precision={CONFIG.PRECISION}:cheby={CONFIG.CHEBY}"
+
+def loudnorm_filter(measured: Optional[dict] = None) -> str:
+    af = f"loudnorm=I={CONFIG.LOUDNORM_I}:TP={CONFIG.LOUDNORM_TP}:LRA={CONFIG.LOUDNORM_LRA}"
+    if measured is None:
+        return f"{af}:print_format=summary"
+    return (f"{af}:measured_I={measured['measured_I']}:measured_LRA={measured['measured_LRA']}:" +
+            f"measured_TP={measured['measured_TP']}:measured_thresh={measured['measured_thresh']}")
+
+# Peak analysis filters. Both pass audio through untouched, so they can be
+# chained on a single decode or tapped off any other filtergraph with asplit.
+ANALYSIS_FILTERS = "volumedetect,astats"
+
+# The same filters on the encoders' stream, named so their report can be told
+# apart from an input tap's in the same stderr (see parse_analysis)
+OUTPUT_TAP = 'output'
+OUTPUT_ANALYSIS_FILTERS = f"volumedetect@{OUTPUT_TAP},astats@{OUTPUT_TAP}"
+
+# Momentary loudness of every 100 ms step printed to stdout, true peak in the
+# stderr summary: the --loudnorm album measurement, also passing audio through
+LOUDNESS_FILTERS = "ebur128=metadata=1:peak=true,ametadata=mode=print:key=lavfi.r128.M:file=-"
+
+def fused_filtergraph(main_filters: str, analysis_stream: Optional[str] = None) -> List[str]:
+    """
+    Build -filter_complex arguments that tap the decoded input into the peak
+    analysis filters while the main chain feeds the mapped output. Lets an
+    encode or a loudnorm pass report input peaks without a second decode.
+    analysis_stream measures another input (e.g. the DSD beside native PCM).
+    """
+    if analysis_stream:
+        graph = f"[{analysis_stream}]{ANALYSIS_FILTERS},anullsink;[0:a]{main_filters}[out]"
+    else:
+        graph = (f"[0:a]asplit=2[analysis][main];[analysis]{ANALYSIS_FILTERS},anullsink;"
+                 f"[main]{main_filters}[out]")
+    return ['-filter_complex', graph, '-map', '[out]']
+
+def fan_out_filtergraph(main_filters: Optional[str], outputs: int, tap_input: bool = False,
+                        simple_map: Optional[List[str]] = None,
+                        visual: Optional[str] = None,
+                        tap_output: bool = False) -> Tuple[List[str], List[List[str]]]:
+    """
+    Run main_filters once and hand the result to `outputs` encoders through
+    asplit. Returns (global arguments, arguments for each output). tap_input
+    also measures the input peaks, as in fused_filtergraph, and tap_output
+    the peaks of the stream the encoders receive (parse_analysis(stderr,
+    OUTPUT_TAP)). visual renders the same stream to a picture, mapped by one
+    more (last) output. One plain output stays a simple -af chain with
+    simple_map as its stream selection.
+    """
+    if outputs == 1 and not tap_input and not visual and not tap_output:
+        return [], [(simple_map or []) + (['-af', main_filters] if main_filters else [])]
+    labels = [f"[out{i}]" for i in range(outputs)] + (['[picture]'] if visual else []) + \
+        (['[measure]'] if tap_output else [])
+    chain = main_filters or 'anull'
+    chain += f",asplit={len(labels)}{''.join(labels)}" if len(labels) > 1 else labels[0]
+    if visual:
+        chain += f";[picture]{visual}[vis]"
+    if tap_output:
+        chain += f";[measure]{OUTPUT_ANALYSIS_FILTERS},anullsink"
+    if tap_input:
+        graph = f"[0:a]asplit=2[analysis][main];[analysis]{ANALYSIS_FILTERS},anullsink;[main]{chain}"
+    else:
+        graph = f"[0:a]{chain}"
+    maps = [['-map', f"[out{i}]"] for i in range(outputs)] + ([['-map', '[vis]']] if visual else [])
+    return ['-filter_complex', graph], maps
+
+def parse_analysis(stderr: str, tap: Optional[str] = None) -> dict:
+    """
+    Extract volumedetect, astats and (if present) loudnorm metrics from one
+    ffmpeg run. tap selects the filters named @tap (e.g. OUTPUT_TAP); without
+    it, the reports of named filters are left out.
+    """
+    result = {'max_volume': None, 'peak_level': None, 'loudnorm': None}
+    # ffmpeg prefixes every log line with the filter instance, "[volumedetect@output @ 0x...]"
+    kept = []
+    for line in stderr.splitlines():
+        named = re.match(r'\[\w+@(\w+) @ ', line)
+        if (named.group(1) if named else None) == tap:
+            kept.append(line)
+    stderr = '\n'.join(kept)
+
+    max_volume = re.search(r'max_volume: (\S+) dB', stderr)
+    if max_volume:
+        result['max_volume'] = parse_db(max_volume.group(1))
+
+    # astats prints per-channel blocks followed by an "Overall" summary at EOF
+    overall = stderr.rsplit('Overall', 1)
+    if len(overall) == 2:
+        peak_match = re.search(r'Peak level dB: (\S+)', overall[1])
+        if peak_match:
+            result['peak_level'] = parse_db(peak_match.group(1))
+
+    metrics = {
+        'measured_I': re.search(r'Input Integrated: *([-0-9.]+)', stderr),
+        'measured_LRA': re.search(r'Input LRA: *([0-9.]+)', stderr),
+        'measured_TP': re.search(r'Input True Peak: *([-0-9.]+)', stderr),
+        'measured_thresh': re.search(r'Input Threshold: *([-0-9.]+)', stderr)
+    }
+    if all(metrics.values()):
+        result['loudnorm'] = {key: m.group(1) for key, m in metrics.items()}
+    return result
+
+def parse_loudness(stdout: str, stderr: str) -> Optional[dict]:
+    """Block loudness histogram and true peak from an LOUDNESS_FILTERS run."""
+    true_peak = re.search(r'True peak:\s+Peak:\s+(\S+) dBFS', stderr)
+    if not true_peak:
+        return None
+    momentary = [float(value) for value in re.findall(r'lavfi\.r128\.M=(\S+)', stdout)]
+    return {'blocks': loudness_histogram(momentary), 'true_peak': parse_db(true_peak.group(1))}
+
+def analyze_audio(file: str, loudnorm: bool = False) -> Tuple[dict, str, int]:
+    """
+    Measure a file with a single decode. With loudnorm=True the same decode also
+    runs the resampled loudnorm first pass, so the input peaks come for free.
+    """
+    if CONFIG.METER == 'numpy':
+        return meter_audio(file, loudnorm)
+    if loudnorm:
+        source = pcm_source(file)
+        cmd = (['ffmpeg'] + source['args'] + fused_filtergraph(join_filters(source['filter'], loudnorm_filter())) +
+               ['-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, '-f', 'null', '-'])
+        _, stderr, rc = run_command(cmd, feed=source['feed'], stage='analyze')
+    else:
+        _, stderr, rc = run_command(['ffmpeg', '-i', file, '-af', ANALYSIS_FILTERS, '-f', 'null', '-'], stage='analyze')
+    return parse_analysis(stderr), stderr, rc
+
+# ---------------------------------------------------------------------------
+# In-process PCM meter (--meter numpy)
+# ---------------------------------------------------------------------------
+
+def probe_audio(file: str) -> Tuple[int, int]:
+    """Return (sample_rate, channels) of the first audio stream as ffmpeg decodes it."""
+    if file in SACD_TRACKS:
+        # ffmpeg's DSD decoders output one sample per 8 DSD bits
+        disc, _ = SACD_TRACKS[file]
+        return disc.sample_rate // 8, disc.channels
+    stdout, _, rc = run_command(['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+                                 '-show_entries', 'stream=sample_rate,channels', '-of', 'csv=p=0', file], stage='probe')
+    if rc != 0 or not stdout.strip():
+        raise RuntimeError(f"ffprobe could not read audio stream of {file}")
+    sample_rate, channels = stdout.strip().splitlines()[0].split(',')[:2]
+    return int(sample_rate), int(channels)
+
+def to_db(linear: float, power: bool = False) -> float:
+    if linear <= 0:
+        return float('-inf')
+    return (10 if power else 20) * math.log10(linear)
+
+# --loudnorm album keeps each track's momentary (400 ms) block loudness as a
+# histogram of LOUDNESS_BIN LU bins: small enough to journal and cache, and
+# fine enough that gating the album's merged histograms matches gating the
+# blocks themselves to well under 0.01 LU.
+LOUDNESS_BIN = 0.01
+
+def loudness_histogram(momentary) -> Dict[str, int]:
+    """Momentary block loudness values -> {bin: count}, for the blocks above the -70 LUFS absolute gate."""
+    histogram = {}
+    for value in momentary:
+        if value > -70:
+            key = str(round(value / LOUDNESS_BIN))
+            histogram[key] = histogram.get(key, 0) + 1
+    return histogram
+
+def histogram_loudness(histograms: List[Dict[str, int]]) -> Optional[float]:
+    """
+    BS.1770 integrated loudness over the merged block histograms of one or
+    more tracks (-10 LU relative gate; the absolute one was applied when the
+    histograms were built). None when no block passes the gates.
+    """
+    merged = {}
+    for histogram in histograms:
+        for key, count in histogram.items():
+            merged[int(key)] = merged.get(int(key), 0) + count
+    if not merged:
+        return None
+    power = {key: 10 ** ((key * LOUDNESS_BIN + 0.691) / 10) for key in merged}
+    threshold = -0.691 + to_db(sum(power[key] * count for key, count in merged.items()) / sum(merged.values()), power=True) - 10
+    gated = [key for key in merged if key * LOUDNESS_BIN > threshold]
+    if not gated:
+        return None
+    return -0.691 + to_db(sum(power[key] * merged[key] for key in gated) / sum(merged[key] for key in gated), power=True)
+
+class KWeighting:
+    """
+    BS.1770 K-weighting (high shelf + RLB high-pass) for any sample rate,
+    run as one 4-state linear system over fixed-size blocks. Each block is a
+    single matrix product; only the 4-element state is carried sequentially.
+    """
+    BLOCK = 512
+
+    def __init__(self, rate: int, channels: int):
+        # Shelving stage (libebur128 parametrisation)
+        k = math.tan(math.pi * 1681.974450955533 / rate)
+        q = 0.7071752369554196
+        vh = 10 ** (3.999843853973347 / 20)
+        vb = vh ** 0.4996667741545416
+        a0 = 1 + k / q + k * k
+        shelf_b = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0]
+        shelf_a = [2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+        # High-pass stage
+        k = math.tan(math.pi * 38.13547087602444 / rate)
+        q = 0.5003270373238773
+        a0 = 1 + k / q + k * k
+        hp_b = [1.0, -2.0, 1.0]
+        hp_a = [2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+
+        a1, b1, c1, d1 = self.biquad_state_space(shelf_b, shelf_a)
+        a2, b2, c2, d2 = self.biquad_state_space(hp_b, hp_a)
+        a = np.zeros((4, 4))
+        a[:2, :2] = a1
+        a[2:, :2] = np.outer(b2, c1)
+        a[2:, 2:] = a2
+        b = np.concatenate([b1, b2 * d1])
+        c = np.concatenate([d2 * c1, c2])
+        d = d2 * d1
+
+        n = self.BLOCK
+        powers = [np.eye(4)]
+        for _ in range(n):
+            powers.append(a @ powers[-1])
+        impulse = np.array([d] + [c @ powers[i] @ b for i in range(n - 1)])
+        idx = np.arange(n)
+        lag = idx[:, None] - idx[None, :]
+        self.toeplitz = np.where(lag >= 0, impulse[np.clip(lag, 0, n - 1)], 0.0)
+        self.state_out = np.array([c @ powers[i] for i in range(n)])           # (n, 4)
+        self.input_state = np.array([powers[n - 1 - j] @ b for j in range(n)])  # (n, 4)
+        self.transition = powers[n]
+        self.state = np.zeros((channels, 4))
+        self.pending = np.zeros((0, channels))
+
+    @staticmethod
+    def biquad_state_space(b: List[float], a: List[float]):
+        """Transposed direct form II biquad as (A, B, C, D)."""
+        return (np.array([[-a[0], 1.0], [-a[1], 0.0]]),
+                np.array([b[1] - a[0] * b[0], b[2] - a[1] * b[0]]),
+                np.array([1.0, 0.0]),
+                b[0])
+
+    def process(self, samples, flush: bool = False):
+        """Filter (frames, channels) samples; returns output for every complete block (all of it on flush)."""
+        data = np.concatenate([self.pending, samples]) if len(self.pending) else samples
+        n = self.BLOCK
+        frames = len(data)
+        usable = frames if flush else frames - frames % n
+        self.pending = data[usable:]
+        if usable == 0:
+            return np.zeros((0, data.shape[1]))
+        blocks = -(-usable // n)
+        padded = np.zeros((blocks * n, data.shape[1]))
+        padded[:usable] = data[:usable]
+        x = padded.T.reshape(data.shape[1], blocks, n)          # (ch, blocks, n)
+        zero_state = x @ self.toeplitz.T
+        drive = x @ self.input_state                            # (ch, blocks, 4)
+        states = np.empty((data.shape[1], blocks, 4))
+        state = self.state
+        for i in range(blocks):
+            states[:, i] = state
+            state = state @ self.transition.T + drive[:, i]
+        self.state = state
+        y = zero_state + states @ self.state_out.T
+        return y.reshape(data.shape[1], -1).T[:usable]
+
+class TruePeak:
+    """Polyphase interpolator estimating inter-sample peaks, oversampling to at least 192 kHz."""
+    TAPS_PER_PHASE = 12
+
+    def __init__(self, rate: int, channels: int):
+        self.factor = max(1, math.ceil(192000 / rate))
+        taps = self.TAPS_PER_PHASE * self.factor
+        n = np.arange(taps) - (taps - 1) / 2
+        prototype = np.sinc(n / self.factor) * np.kaiser(taps, 8.0)
+        prototype *= self.factor / prototype.sum()
+        self.phases = prototype.reshape(self.TAPS_PER_PHASE, self.factor).T[:, ::-1]  # (factor, taps_per_phase)
+        self.history = np.zeros((self.TAPS_PER_PHASE - 1, channels))
+        self.peak = 0.0
+
+    def process(self, samples):
+        if self.factor == 1:
+            if len(samples):
+                self.peak = max(self.peak, float(np.abs(samples).max()))
+            return
+        data = np.concatenate([self.history, samples])
+        self.history = data[-(self.TAPS_PER_PHASE - 1):]
+        windows = np.lib.stride_tricks.sliding_window_view(data, self.TAPS_PER_PHASE, axis=0)  # (frames, ch, taps)
+        if len(windows):
+            self.peak = max(self.peak, float(np.abs(windows @ self.phases.T).max()))
+
+class PcmMeter:
+    """
+    Streaming meter over float PCM frames: sample peak and RMS always; with
+    loudness=True also EBU R128 integrated loudness, LRA, gating threshold and
+    oversampled true peak. Loudness is accumulated in 100 ms sub-blocks so the
+    400 ms momentary and 3 s short-term gating blocks can be formed exactly.
+    """
+
+    def __init__(self, rate: int, channels: int, loudness: bool = False):
+        self.rate = rate
+        self.channels = channels
+        self.loudness = loudness
+        self.frames = 0
+        self.peak = 0.0
+        self.sum_squares = 0.0
+        if loudness:
+            self.kweighting = KWeighting(rate, channels)
+            self.true_peak = TruePeak(rate, channels)
+            self.subblock = rate // 10
+            self.subblock_energy = []
+            self.pending_energy = np.zeros(0)
+
+    def feed(self, samples):
+        if not len(samples):
+            return
+        samples = samples.astype(np.float64)
+        self.frames += len(samples)
+        self.peak = max(self.peak, float(np.abs(samples).max()))
+        self.sum_squares += float(np.einsum('ij,ij->', samples, samples))
+        if self.loudness:
+            self.true_peak.process(samples)
+            self.accumulate(self.kweighting.process(samples))
+
+    def accumulate(self, weighted):
+        # Channel-summed K-weighted energy per sample (stereo weights are all 1.0)
+        energy = np.concatenate([self.pending_energy, np.einsum('ij,ij->i', weighted, weighted)])
+        usable = len(energy) - len(energy) % self.subblock
+        if usable:
+            self.subblock_energy.extend(energy[:usable].reshape(-1, self.subblock).sum(axis=1))
+        self.pending_energy = energy[usable:]
+
+    def gated_loudness(self, block_subblocks: int):
+        """Return (loudness per gating block, mean-square per block) for blocks hopping 100 ms."""
+        energy = np.asarray(self.subblock_energy)
+        if len(energy) < block_subblocks:
+            return np.zeros(0), np.zeros(0)
+        window = np.convolve(energy, np.ones(block_subblocks), mode='valid') / (block_subblocks * self.subblock)
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10 * np.log10(window)
+        return loudness, window
+
+    def result(self) -> dict:
+        if self.loudness:
+            self.accumulate(self.kweighting.process(np.zeros((0, self.channels)), flush=True))
+        peak_db = to_db(self.peak)
+        rms_db = to_db(self.sum_squares / (self.frames * self.channels), power=True) if self.frames else float('-inf')
+        result = {'max_volume': peak_db, 'peak_level': peak_db, 'rms_level': rms_db, 'loudnorm': None}
+        if not self.loudness:
+            return result
+
+        # Integrated loudness: 400 ms blocks, -70 LUFS absolute and -10 LU relative gates
+        momentary, power = self.gated_loudness(4)
+        above_absolute = momentary > -70
+        integrated, threshold = float('-inf'), -70.0
+        if above_absolute.any():
+            threshold = -0.691 + to_db(power[above_absolute].mean(), power=True) - 10
+            gated = above_absolute & (momentary > threshold)
+            integrated = -0.691 + to_db(power[gated].mean(), power=True)
+
+        # Loudness range: 3 s blocks, -70 LUFS absolute and -20 LU relative gates, P95 - P10
+        short_term, power = self.gated_loudness(30)
+        lra = 0.0
+        above_absolute = short_term > -70
+        if above_absolute.any():
+            relative = -0.691 + to_db(power[above_absolute].mean(), power=True) - 20
+            gated = short_term[above_absolute & (short_term > relative)]
+            if len(gated):
+                lra = float(np.percentile(gated, 95) - np.percentile(gated, 10))
+
+        true_peak = to_db(max(self.true_peak.peak, self.peak))
+        result.update({'integrated': integrated, 'lra': lra, 'true_peak': true_peak, 'threshold': threshold,
+                       'blocks': loudness_histogram(momentary)})
+        if math.isfinite(integrated):
+            result['loudnorm'] = {'measured_I': f"{integrated:.2f}", 'measured_LRA': f"{lra:.2f}",
+                                  'measured_TP': f"{true_peak:.2f}", 'measured_thresh': f"{threshold:.2f}"}
+        return result
+
+def run_metered(input_args: List[str], taps: List[dict], channels: int,
+                output_args: Optional[List[str]] = None, feed: Optional[Callable] = None,
+                stage: str = 'analyze') -> Tuple[List[dict], str, int]:
+    """
+    Run one ffmpeg decode whose extra raw-float outputs are metered in-process.
+    Each tap is {'filter': Optional[str], 'rate': int, 'loudness': bool} plus an
+    optional 'stream' (default 0:a) and is written to its own pipe; output_args
+    may add a regular output (e.g. a WAV) fed by the same decode.
+    """
+    cmd = pin_threads(['ffmpeg', '-nostats'] + input_args)
+    pipes = []
+    for tap in taps:
+        read_fd, write_fd = os.pipe()
+        pipes.append((read_fd, write_fd))
+        cmd += ['-map', tap.get('stream', '0:a')]
+        if tap['filter']:
+            cmd += ['-af', tap['filter'], '-ar', str(tap['rate'])]
+        cmd += ['-f', 'f32le', '-acodec', 'pcm_f32le', f"pipe:{write_fd}"]
+    cmd += output_args or []
+
+    meters = [PcmMeter(tap['rate'], channels, tap['loudness']) for tap in taps]
+    frame_bytes = 4 * channels
+
+    def drain(read_fd: int, meter: PcmMeter):
+        chunk = meter.rate * frame_bytes
+        with os.fdopen(read_fd, 'rb') as stream:
+            while True:
+                data = stream.read(chunk)
+                if not data:
+                    break
+                usable = len(data) - len(data) % frame_bytes
+                meter.feed(np.frombuffer(data[:usable], dtype='<f4').reshape(-1, channels))
+
+    try:
+        done = SUPERVISOR.start(cmd, feed=feed, stage=stage, stdout=False,
+                                pass_fds=tuple(write_fd for _, write_fd in pipes))
+    finally:
+        for _, write_fd in pipes:
+            os.close(write_fd)
+    readers = [threading.Thread(target=drain, args=(read_fd, meter), daemon=True)
+               for (read_fd, _), meter in zip(pipes, meters)]
+    for reader in readers:
+        reader.start()
+    _, stderr, returncode = done.result()
+    stderr = stderr.decode(errors='replace')
+    for reader in readers:
+        reader.join()
+    if returncode != 0:
+        logger.error(f"Command failed with return code {returncode}: {stderr}")
+    return [meter.result() for meter in meters], stderr, returncode
+
+def meter_audio(file: str, loudnorm: bool = False) -> Tuple[dict, str, int]:
+    """--meter numpy counterpart of analyze_audio: one decode, exact float metrics."""
+    if not loudnorm:
+        rate, channels = probe_audio(file)
+        results, stderr, rc = run_metered(['-i', file], [{'filter': None, 'rate': rate, 'loudness': False}], channels)
+        return results[0], stderr, rc
 
-    _, stderr, rc = run_command(['ffmpeg', '-i', file, '-af', 'astats=metadata=1,ametadata=print:key=lavfi.astats.Overall.Peak_level', '-f', 'null', '-'])
-    peak_match = re.search(r'Peak_level=([-0-9.]+)', stderr)
-    peak_level = f"{peak_match.group(1)} dBFS" if peak_match else 'Not detected'
+    source = pcm_source(file)
+    rate, channels = probe_audio(file)
+    if source['native']:
+        rate = int(CONFIG.AR)
+    taps = [{'filter': None, 'rate': rate, 'loudness': False},
+            {'filter': source['filter'], 'rate': int(CONFIG.AR), 'loudness': True}]
+    results, stderr, rc = run_metered(source['args'], taps, channels, feed=source['feed'])
+    analysis = results[0]
+    analysis['loudnorm'] = results[1]['loudnorm']
+    analysis['loudness'] = {key: results[1][key] for key in ('integrated', 'lra', 'true_peak', 'threshold')}
+    return analysis, stderr, rc
 
-    with open(peak_log, 'a') as f:
-        f.write(f"{file}:{log_type}:{max_volume_db if max_volume_db is not None else 'Not detected'}:{peak_level}\n")
+# ---------------------------------------------------------------------------
+# Native DSD engine (--engine native)
+# ---------------------------------------------------------------------------
+
+# Idle DSD pattern (01101001): zero DC, used to pad reads beyond the track edges
+DSD_SILENCE = 0x69
+
+class DsfReader:
+    """Memory-mapped DSF file: parses the DSD / fmt / data chunks and de-interleaves channel blocks."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.parse()
+        except (ValueError, struct.error):
+            self.map.close()
+            raise
+
+    def parse(self):
+        if self.map[:4] != b'DSD ' or len(self.map) < 28:
+            raise ValueError(f"{self.path} is not a DSF file")
+        header_size, self.total_size, self.metadata_offset = struct.unpack_from('<QQQ', self.map, 4)
+        offset = header_size
+        fmt = None
+        while offset + 12 <= len(self.map):
+            chunk_id = self.map[offset:offset + 4]
+            chunk_size, = struct.unpack_from('<Q', self.map, offset + 4)
+            # A size below the chunk header would never advance; one past the end cannot be read
+            if chunk_size < 12 or offset + chunk_size > len(self.map):
+                raise ValueError(f"{self.path}: corrupt {chunk_id.decode('latin-1')!r} chunk size {chunk_size}")
+            if chunk_id == b'fmt ':
+                if chunk_size < 12 + 40:
+                    raise ValueError(f"{self.path}: truncated fmt chunk")
+                fmt = struct.unpack_from('<IIIIIIQI', self.map, offset + 12)
+            elif chunk_id == b'data':
+                self.data_offset = offset + 12
+                self.data_size = chunk_size - 12
+                break
+            offset += chunk_size
+        if fmt is None or not hasattr(self, 'data_offset'):
+            raise ValueError(f"{self.path}: missing fmt or data chunk")
+        _, format_id, _, self.channels, self.sample_rate, self.bits_per_sample, self.sample_count, self.block_size = fmt
+        if format_id != 0:
+            raise ValueError(f"{self.path}: unsupported DSF format id {format_id}")
+        if not self.channels or not self.block_size:
+            raise ValueError(f"{self.path}: no channels or zero block size")
+        # Bytes of real audio per channel; the tail of the last block is zero padding
+        self.channel_length = (self.sample_count + 7) // 8
+
+    def channel_bytes(self, start: int, count: int):
+        """
+        Return (channels, count) uint8 DSD bytes from byte position `start` of
+        each channel, LSB-first. Positions outside the audio read as silence.
+        """
+        out = np.full((self.channels, count), DSD_SILENCE, dtype=np.uint8)
+        first, last = max(start, 0), min(start + count, self.channel_length)
+        if first >= last:
+            return out
+        block_first = first // self.block_size
+        block_last = -(-last // self.block_size)
+        span = self.block_size * self.channels
+        raw = np.frombuffer(self.map, dtype=np.uint8, count=(block_last - block_first) * span,
+                            offset=self.data_offset + block_first * span)
+        planar = raw.reshape(-1, self.channels, self.block_size).transpose(1, 0, 2).reshape(self.channels, -1)
+        base = block_first * self.block_size
+        out[:, first - start:last - start] = planar[:, first - base:last - base]
+        if self.bits_per_sample == 8:
+            out = BIT_REVERSE[out]
+        return out
+
+    def close(self):
+        self.map.close()
+
+class DsdDecimator:
+    """
+    Linear-phase Kaiser FIR from 1-bit DSD straight to PCM, evaluated with
+    one 256-entry lookup table per filter byte: each output sample is the sum
+    of taps_bytes table reads instead of 8 * taps_bytes multiply-adds.
+    Passband ends at 0.45 * out_rate; stopband attenuation follows --precision
+    (about 6 dB per bit, as for soxr).
+    """
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, dsd_rate: int, out_rate: int, precision: int):
+        if dsd_rate % out_rate or (dsd_rate // out_rate) % 8:
+            raise ValueError(f"Native engine cannot decimate {dsd_rate} Hz to {out_rate} Hz")
+        self.factor = dsd_rate // out_rate
+        self.step = self.factor // 8
+        attenuation = 6.02 * precision
+        transition = 0.1 / self.factor
+        taps = int(math.ceil((attenuation - 8) / (2.285 * 2 * math.pi * transition)))
+        taps = -(-taps // 8) * 8
+        beta = 0.1102 * (attenuation - 8.7)
+        n = np.arange(taps) - (taps - 1) / 2
+        cutoff = 0.45 / self.factor
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(taps, beta)
+        h /= h.sum()
+        bits = (np.arange(256)[:, None] >> np.arange(8)[None, :]) & 1
+        self.tables = h.reshape(-1, 8) @ (2.0 * bits - 1).T  # (taps_bytes, 256)
+        self.taps_bytes = len(self.tables)
+
+    @classmethod
+    def get(cls, dsd_rate: int, out_rate: int) -> 'DsdDecimator':
+        key = (dsd_rate, out_rate, int(CONFIG.PRECISION))
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(dsd_rate, out_rate, int(CONFIG.PRECISION))
+            return cls._instances[key]
+
+    def decimate(self, data):
+        """(channels, bytes) DSD -> (frames, channels) float32, one frame per `step` bytes."""
+        channels, length = data.shape
+        frames = (length - self.taps_bytes) // self.step + 1
+        # Split into `step` contiguous phase rows so every table read is a plain slice
+        rows = -(-length // self.step)
+        padded = np.full((channels, rows * self.step), DSD_SILENCE, dtype=np.uint8)
+        padded[:, :length] = data
+        phases = [np.ascontiguousarray(column) for column in padded.reshape(channels, rows, self.step).transpose(2, 0, 1)]
+        acc = np.zeros((channels, frames))
+        for k, table in enumerate(self.tables):
+            row, phase = divmod(k, self.step)
+            acc += table[phases[phase][:, row:row + frames]]
+        return acc.T.astype(np.float32)
+
+BIT_REVERSE = None if np is None else np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+def native_channels(input_file: str) -> Optional[int]:
+    """Channel count of a DSF the native engine can decode, or None (logged) when ffmpeg has to."""
+    try:
+        reader = DsfReader(input_file)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Native engine cannot read {input_file} ({e}). Using ffmpeg.")
+        return None
+    rate, channels = reader.sample_rate, reader.channels
+    reader.close()
+    factor, remainder = divmod(rate, int(CONFIG.AR))
+    if remainder or factor % 8:
+        logger.warning(f"Native engine cannot decimate {rate} Hz DSD to {CONFIG.AR} Hz. Using ffmpeg for {input_file}.")
+        return None
+    return channels
+
+def native_frames(input_file: str) -> int:
+    """Output frames at CONFIG.AR the native engine produces for a DSF."""
+    reader = DsfReader(input_file)
+    try:
+        return reader.sample_count // DsdDecimator.get(reader.sample_rate, int(CONFIG.AR)).factor
+    finally:
+        reader.close()
+
+def native_pcm_chunks(input_file: str, chunk_seconds: int = 2, start: int = 0, end: Optional[int] = None,
+                      threads: Optional[int] = None):
+    """
+    Yield (frames, channels) float32 PCM at CONFIG.AR for a DSF, output frames
+    start..end (default: all), decimating chunks on `threads` (default
+    ENGINE_THREADS) cores. At most two chunks per thread are in flight. Each
+    frame depends only on the DSD bytes around it, so any split of a range
+    yields exactly the same samples.
+    """
+    threads = threads or CONFIG.ENGINE_THREADS
+    reader = DsfReader(input_file)
+    decimator = DsdDecimator.get(reader.sample_rate, int(CONFIG.AR))
+    total = reader.sample_count // decimator.factor
+    end = total if end is None else min(end, total)
+    chunk = int(CONFIG.AR) * chunk_seconds
+    # Center the filter on each output instant
+    lead = decimator.taps_bytes // 2
+
+    def work(first: int):
+        frames = min(chunk, end - first)
+        data = reader.channel_bytes(first * decimator.step - lead, (frames - 1) * decimator.step + decimator.taps_bytes)
+        return decimator.decimate(data)
+
+    pending = deque()
+    starts = iter(range(start, end, chunk))
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for first in starts:
+                pending.append(executor.submit(work, first))
+                if len(pending) >= 2 * threads:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        reader.close()
+
+def feed_native_pcm(input_file: str, stream, start: int = 0, end: Optional[int] = None, threads: Optional[int] = None):
+    """Write native-engine PCM for input_file (output frames start..end) to an ffmpeg stdin pipe."""
+    try:
+        for pcm in native_pcm_chunks(input_file, start=start, end=end, threads=threads):
+            stream.write(pcm.tobytes())
+    except BrokenPipeError:
+        logger.debug(f"ffmpeg closed its input early for {input_file}")
+    except Exception as e:
+        logger.error(f"Native engine failed on {input_file}: {e}")
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+def pcm_source(input_file: str) -> dict:
+    """
+    Describe how ffmpeg obtains resampled PCM for input_file:
+    - args: input arguments (input 0 is always the PCM-producing stream)
+    - filter: resampling chain to apply to [0:a], if any
+    - map: stream selection for simple -af commands
+    - metadata: output arguments carrying the track's tags (repeated for every output)
+    - native: DSF decoded by the native engine, or None
+    - feed: callable writing ffmpeg's stdin (native PCM or an ISO track), or None
+    - dsd_stream: stream carrying the raw DSD decode when input 0 does not
+    """
+    if input_file in SACD_TRACKS:
+        # Tracks read from an ISO reach ffmpeg as a DSF stream; the native engine reads DSF files only
+        return {'args': ['-f', 'dsf', '-i', 'pipe:0'], 'metadata': sacd_metadata_args(input_file), 'filter': resample_filter(),
+                'map': [], 'native': None, 'feed': partial(feed_sacd_track, input_file), 'dsd_stream': None}
+    channels = native_channels(input_file) if CONFIG.ENGINE == 'native' else None
+    if channels:
+        return {'args': ['-f', 'f32le', '-ar', CONFIG.AR, '-ac', str(channels), '-i', 'pipe:0', '-i', input_file],
+                'metadata': ['-map_metadata', '1'] + SHIPPED_METADATA.get(input_file, []), 'filter': None, 'map': ['-map', '0:a'], 'native': input_file,
+                'feed': partial(feed_native_pcm, input_file), 'dsd_stream': '1:a'}
+    return {'args': ['-i', input_file], 'metadata': SHIPPED_METADATA.get(input_file, []), 'filter': resample_filter(),
+            'map': [], 'native': None, 'feed': None, 'dsd_stream': None}
+
+def pcm_decoder(source: dict) -> str:
+    """How a pcm_source() turns DSD into PCM, as named in the FLAC COMMENT."""
+    return 'native decimator' if source['native'] else f"ffmpeg {CONFIG.RESAMPLER}"
+
+def join_filters(*filters: Optional[str]) -> str:
+    return ','.join(f for f in filters if f) or 'anull'
+
+# ---------------------------------------------------------------------------
+# Segmented tracks (--segment)
+# ---------------------------------------------------------------------------
+
+def segment_sample_format() -> Tuple[str, int]:
+    """Raw sample format the segments are written in (the encoders' input format) and its width in bytes."""
+    sample_fmt = PCM_SAMPLE_FORMATS[CONFIG.ACODEC][0]
+    return sample_fmt, 2 if sample_fmt == 's16' else 4
+
+def segment_plan(input_file: str) -> Optional[List[Tuple[int, int]]]:
+    """
+    (first frame, frame count) of each --segment piece of a track, or None
+    when it is converted whole: segmenting is off, the track is shorter than
+    two segments, or its DSD is not read by the native engine (ISO tracks,
+    rates it cannot decimate), whose output is position-independent.
+    """
+    if not CONFIG.SEGMENT_SECONDS or CONFIG.ENGINE != 'native' or CONFIG.ACODEC not in PCM_SAMPLE_FORMATS:
+        return None
+    if input_file in SACD_TRACKS:
+        return None
+    try:
+        total = native_frames(input_file)
+    except (OSError, ValueError):
+        # pcm_source logs why the native engine does not take this track
+        return None
+    length = max(1, int(CONFIG.SEGMENT_SECONDS * int(CONFIG.AR)))
+    if total < 2 * length:
+        return None
+    return [(first, min(length, total - first)) for first in range(0, total, length)]
+
+def segment_path(input_file: str, index: int) -> str:
+    return SCRATCH.path(input_file, f"segment{index:04d}.pcm")
+
+def segment_scratch_estimate(input_file: str) -> int:
+    """Segment files a track may hold at once: the 2 x SEGMENT_JOBS window, at most the whole track."""
+    sample_fmt, width = segment_sample_format()
+    track = scratch_estimate(input_file, f"pcm_{sample_fmt}le")
+    _, channels = track_format(input_file) or (0.0, 2)
+    window = 2 * CONFIG.SEGMENT_JOBS * int(CONFIG.SEGMENT_SECONDS * int(CONFIG.AR)) * channels * width
+    return min(track, window)
+
+def resample_segment(input_file: str, volume: str, first: int, frames: int, channels: int, path: str) -> bool:
+    """
+    Decimate output frames first..first + frames of a track and apply the gain
+    into a raw PCM file, through the same volume filter and sample conversion
+    as a whole-track encode. The decimator reads the DSD around the segment
+    edges (its filter length), so nothing needs trimming afterwards.
+    """
+    sample_fmt, width = segment_sample_format()
+    cmd = ['ffmpeg', '-f', 'f32le', '-ar', CONFIG.AR, '-ac', str(channels), '-i', 'pipe:0', '-af', f"volume={volume}",
+           '-acodec', f"pcm_{sample_fmt}le", '-f', f"{sample_fmt}le", path, '-y']
+    # The cores go to the segments, one decimation thread each
+    _, _, rc = run_command(cmd, feed=partial(feed_native_pcm, input_file, start=first, end=first + frames, threads=1),
+                           stage='resample', duration=frames / int(CONFIG.AR))
+    return rc == 0 and os.path.exists(path) and os.path.getsize(path) == frames * channels * width
+
+def feed_segments(input_file: str, volume: str, plan: List[Tuple[int, int]], channels: int, state: dict, stream):
+    """
+    Resample a track's segments on SEGMENT_JOBS cores and write them to an
+    ffmpeg stdin pipe in order, each as soon as it and every earlier one are
+    done. At most two segments per job are in flight or waiting; a segment's
+    file is removed once written. The SHA-256 of everything written goes to
+    state['sha256'], a failure to state['error'].
+    """
+    digest = hashlib.sha256()
+    scope = vars(PROFILE_SCOPE).copy()
+
+    def work(index: int, first: int, frames: int) -> str:
+        path = segment_path(input_file, index)
+        SCRATCH.track(path)
+        with profile_scope(**scope):
+            if not resample_segment(input_file, volume, first, frames, channels, path):
+                raise RuntimeError(f"segment {index + 1}/{len(plan)} of {input_file} failed")
+        return path
+
+    executor = ThreadPoolExecutor(max_workers=CONFIG.SEGMENT_JOBS)
+    pending = deque()
+    segments = iter(enumerate(plan))
+    try:
+        while True:
+            for index, (first, frames) in segments:
+                pending.append(executor.submit(work, index, first, frames))
+                if len(pending) >= 2 * CONFIG.SEGMENT_JOBS:
+                    break
+            if not pending:
+                break
+            path = pending.popleft().result()
+            with open(path, 'rb') as f:
+                for chunk in iter(partial(f.read, 1024 * 1024), b''):
+                    digest.update(chunk)
+                    stream.write(chunk)
+            SCRATCH.remove(path)
+        state['sha256'] = digest.hexdigest()
+    except BrokenPipeError:
+        logger.debug(f"ffmpeg closed its input early for {input_file}")
+        state['error'] = "encoder closed its input early"
+    except Exception as e:
+        logger.error(f"Segmented resampling failed on {input_file}: {e}")
+        state['error'] = str(e)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for index in range(len(plan)):
+            SCRATCH.remove(segment_path(input_file, index))
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+def segmented_source(input_file: str, volume: str, plan: List[Tuple[int, int]]) -> dict:
+    """
+    pcm_source counterpart for a segmented track: input 0 is the stitched,
+    already gain-adjusted PCM in the encoders' sample format, so no filter is
+    left to run. 'segments' holds the feed's outcome for the caller.
+    """
+    sample_fmt, _ = segment_sample_format()
+    _, channels = track_format(input_file)
+    state = {'count': len(plan), 'sha256': None, 'error': None}
+    logger.info(f"Resampling {input_file} in {len(plan)} segments of {CONFIG.SEGMENT_SECONDS:g} s on {CONFIG.SEGMENT_JOBS} core(s)")
+    return {'args': ['-f', f"{sample_fmt}le", '-ar', CONFIG.AR, '-ac', str(channels), '-i', 'pipe:0', '-i', input_file],
+            'metadata': ['-map_metadata', '1'] + SHIPPED_METADATA.get(input_file, []), 'filter': None, 'map': ['-map', '0:a'],
+            'native': input_file, 'feed': partial(feed_segments, input_file, volume, plan, channels, state),
+            'dsd_stream': '1:a', 'segments': state}
+
+def verify_segments(input_file: str, volume: str, segments: dict) -> bool:
+    """
+    --segment-verify: run the whole-track chain (native decimation, gain,
+    sample conversion) in one pass and compare the SHA-256 of its PCM with
+    that of the stitched segments the encoders received.
+    """
+    sample_fmt, _ = segment_sample_format()
+    _, channels = track_format(input_file)
+    cmd = ['ffmpeg', '-f', 'f32le', '-ar', CONFIG.AR, '-ac', str(channels), '-i', 'pipe:0', '-af', f"volume={volume}",
+           '-acodec', f"pcm_{sample_fmt}le", '-f', 'hash', '-hash', 'sha256', '-']
+    stdout, stderr, rc = run_command(cmd, feed=partial(feed_native_pcm, input_file), stage='verify')
+    match = re.search(r'SHA256=([0-9a-f]+)', stdout)
+    if rc != 0 or not match:
+        logger.error(f"Could not run the unsegmented reference for {input_file}: {stderr}")
+        return False
+    verified = match.group(1) == segments['sha256']
+    RESULTS.record(input_file, 'segments', {'verified': verified, 'sha256': segments['sha256'], 'reference_sha256': match.group(1)})
+    if verified:
+        logger.info(f"Verified {input_file}: {segments['count']} segments are bit-identical to the unsegmented PCM")
+    else:
+        logger.error(f"Segmented PCM of {input_file} differs from the unsegmented PCM "
+                     f"({segments['sha256']} != {match.group(1)})")
+    return verified
+
+def benchmark_engines(files: List[str]):
+    """Compare native and ffmpeg DSD->PCM conversion for speed and agreement."""
+    for input_file in files:
+        start = time.time()
+        # Through the supervisor, so --timeout and SIGINT reach this decode too
+        stdout, stderr, rc = SUPERVISOR.start(['ffmpeg', '-v', 'error', '-i', input_file, '-af', resample_filter(),
+                                               '-ar', CONFIG.AR, '-f', 'f32le', '-acodec', 'pcm_f32le', 'pipe:1'],
+                                              stage='verify').result()
+        ffmpeg_time = time.time() - start
+        if rc != 0:
+            logger.error(f"ffmpeg decode failed for {input_file}: {stderr.decode(errors='replace')}")
+            continue
+        start = time.time()
+        native = np.concatenate(list(native_pcm_chunks(input_file)))
+        native_time = time.time() - start
+        reference = np.frombuffer(stdout, dtype='<f4').reshape(-1, native.shape[1])
+
+        # Align the two outputs (filter delays differ) by cross-correlating the first channel
+        window = min(len(reference), len(native), int(CONFIG.AR))
+        a, b = reference[:window, 0].astype(np.float64), native[:window, 0].astype(np.float64)
+        spectrum = np.fft.rfft(a, 2 * window) * np.conj(np.fft.rfft(b, 2 * window))
+        correlation = np.fft.irfft(spectrum)
+        peak = int(np.argmax(correlation))
+        lag = peak - 2 * window if peak > window else peak
+        # Parabolic interpolation of the correlation peak gives the fractional part
+        left, centre, right = correlation[peak - 1], correlation[peak], correlation[(peak + 1) % len(correlation)]
+        denominator = left - 2 * centre + right
+        fraction = 0.5 * (left - right) / denominator if denominator else 0.0
+        ref_aligned = reference[max(lag, 0):].astype(np.float64)
+        nat_aligned = native[max(-lag, 0):].astype(np.float64)
+        length = min(len(ref_aligned), len(nat_aligned))
+        ref_aligned, nat_aligned = ref_aligned[:length], nat_aligned[:length]
+        frequencies = np.fft.rfftfreq(length)
+        nat_aligned = np.fft.irfft(np.fft.rfft(nat_aligned, axis=0) * np.exp(-2j * np.pi * frequencies * fraction)[:, None],
+                                   length, axis=0)
+
+        # Compare over the audio band only; both filters pass DSD noise differently above it
+        residual = np.abs(np.fft.rfft(ref_aligned - nat_aligned, axis=0))
+        signal_power = np.abs(np.fft.rfft(ref_aligned, axis=0))
+        band = int(20000 / int(CONFIG.AR) * length) + 1
+        residual_db = to_db(float((residual[:band] ** 2).sum()) / max(float((signal_power[:band] ** 2).sum()), 1e-30), power=True)
+        peak_delta = to_db(float(np.abs(nat_aligned).max())) - to_db(float(np.abs(ref_aligned).max()))
+        duration = length / int(CONFIG.AR)
+        logger.info(f"{input_file}: ffmpeg {ffmpeg_time:.2f}s ({duration / ffmpeg_time:.1f}x realtime), "
+                    f"native {native_time:.2f}s ({duration / native_time:.1f}x realtime), "
+                    f"lag {lag + fraction:.2f} samples, 0-20 kHz residual {residual_db:.1f} dB, peak delta {peak_delta:+.3f} dB")
+
+# ---------------------------------------------------------------------------
+
+def record_peaks(file: str, stage: str, analysis: dict, measured: Optional[str] = None) -> Optional[float]:
+    """Store a stage's max volume and peak level for file; measured is the path analysed when it differs."""
+    max_volume_db = analysis['max_volume']
+    if max_volume_db is None:
+        logger.warning(f"Max volume not detected for {measured or file}")
+    values = {'max_volume': max_volume_db, 'peak_level': analysis['peak_level']}
+    if measured:
+        values['measured'] = measured
+    RESULTS.record(file, stage, values)
     return max_volume_db
 
-def calculate_volume_adjustment(files: List[str], subdir: str, log_file: Optional[str] = None) -> Tuple[List[Tuple[str, str]], List[dict]]:
-    if os.path.exists(TEMP_FILES['PEAK_LOG']):
-        os.remove(TEMP_FILES['PEAK_LOG'])
-    if os.path.exists(TEMP_FILES['VOLUME_LOG']):
-        os.remove(TEMP_FILES['VOLUME_LOG'])
+# ---------------------------------------------------------------------------
+# Run results
+
+class ResultsStore:
+    """
+    Every measurement of the run, keyed by input file and stage (DSD, WAV,
+    Input, Output, volume). Workers record under one lock; the store is
+    serialised once, after the last job, as JSON or CSV. The daemon instead
+    takes each finished album's files out and merges them into the file.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, dict]] = {}
+
+    def record(self, file: str, stage: str, values: dict):
+        with self.lock:
+            self.entries.setdefault(file, {}).setdefault(stage, {}).update(values)
+
+    def get(self, file: str, stage: str) -> dict:
+        with self.lock:
+            return dict(self.entries.get(file, {}).get(stage, {}))
+
+    def volume_rows(self) -> List[dict]:
+        """Files with a volume decision, in the order they were analysed."""
+        with self.lock:
+            return [dict(stages['volume'], file=file) for file, stages in self.entries.items() if 'volume' in stages]
+
+    def take(self, file: str) -> Dict[str, dict]:
+        """Remove and return a file's measurements (a worker hands them to its coordinator)."""
+        with self.lock:
+            return self.entries.pop(file, {})
+
+    def take_under(self, roots: List[str]) -> Dict[str, Dict[str, dict]]:
+        """Remove and return the measurements of every file at or below one of roots."""
+        prefixes = [os.path.join(os.path.realpath(root), '') for root in roots]
+        with self.lock:
+            files = [file for file in self.entries
+                     if any(os.path.join(os.path.realpath(file), '').startswith(prefix) for prefix in prefixes)]
+            return {file: self.entries.pop(file) for file in files}
+
+    def write(self, path: str, entries: Optional[Dict[str, Dict[str, dict]]] = None, merge: bool = False):
+        """
+        JSON (file -> stage -> values) unless path ends in .csv, then one row
+        per file and stage. entries defaults to the whole store; with merge
+        they replace their files' measurements in what path already holds.
+        Writers take turns and the file is replaced atomically.
+        """
+        if entries is None:
+            with self.lock:
+                entries = {file: {stage: dict(values) for stage, values in stages.items()}
+                           for file, stages in self.entries.items()}
+        csv_output = path.lower().endswith('.csv')
+        with self.write_lock:
+            rows = [dict(values, file=file, stage=stage) for file, stages in entries.items() for stage, values in stages.items()]
+            if merge and os.path.exists(path):
+                with open(path, newline='') as f:
+                    if csv_output:
+                        rows = [row for row in csv.DictReader(f) if row['file'] not in entries] + rows
+                    else:
+                        entries = dict(json.load(f), **entries)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', newline='') as f:
+                if csv_output:
+                    columns = ['file', 'stage'] + sorted({key for row in rows for key in row} - {'file', 'stage'})
+                    writer = csv.DictWriter(f, fieldnames=columns, restval='')
+                    writer.writeheader()
+                    writer.writerows(rows)
+                else:
+                    f.write(json.dumps(entries, indent=2) + '\n')
+            os.replace(temp_path, path)
+        logger.info(f"Results written to {path}")
+
+RESULTS = ResultsStore()
+
+# ---------------------------------------------------------------------------
+# Profiling (--profile)
+
+# Track and album that subprocesses started by the current thread are charged to
+PROFILE_SCOPE = threading.local()
+
+@contextmanager
+def profile_scope(track: Optional[str] = None, album: Optional[str] = None):
+    previous = (getattr(PROFILE_SCOPE, 'track', None), getattr(PROFILE_SCOPE, 'album', None))
+    PROFILE_SCOPE.track, PROFILE_SCOPE.album = track, album
+    try:
+        yield
+    finally:
+        PROFILE_SCOPE.track, PROFILE_SCOPE.album = previous
+
+# Summed per stage except max_rss_bytes, which is the largest single process
+PROFILE_FIELDS = ('runs', 'wall_seconds', 'user_seconds', 'system_seconds', 'max_rss_bytes',
+                  'read_bytes', 'write_bytes', 'storage_read_bytes', 'storage_write_bytes')
+
+def read_proc_io(pid: int) -> Dict[str, int]:
+    """/proc/<pid>/io counters; still readable while the child is an unreaped zombie."""
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            return {key: int(value) for key, value in (line.split(':') for line in f if ':' in line)}
+    except (OSError, ValueError):
+        return {}
+
+class Profiler:
+    """
+    Wall time, CPU time, peak RSS and I/O of every subprocess, by stage
+    (extract, probe, analyze, resample, encode, visualize, verify) and
+    aggregated per track and per album.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: List[dict] = []
+        self.started = time.monotonic()
+
+    def reap(self, proc: subprocess.Popen, stage: str, started: float):
+        """Wait for proc and record its usage; sets proc.returncode like proc.wait()."""
+        try:
+            # Block until exit without reaping, so /proc/<pid>/io is still there
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            io = read_proc_io(proc.pid)
+            _, status, usage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            proc.wait()
+            return
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        sample = {
+            'stage': stage, 'track': getattr(PROFILE_SCOPE, 'track', None), 'album': getattr(PROFILE_SCOPE, 'album', None),
+            'runs': 1, 'wall_seconds': time.monotonic() - started,
+            'user_seconds': usage.ru_utime, 'system_seconds': usage.ru_stime, 'max_rss_bytes': usage.ru_maxrss * 1024,
+            'read_bytes': io.get('rchar', 0), 'write_bytes': io.get('wchar', 0),
+            'storage_read_bytes': io.get('read_bytes', 0), 'storage_write_bytes': io.get('write_bytes', 0),
+        }
+        with self.lock:
+            self.samples.append(sample)
+
+    @staticmethod
+    def aggregate(samples: List[dict]) -> Dict[str, dict]:
+        """Per-stage totals plus a 'total' entry."""
+        stages: Dict[str, dict] = {}
+        total = dict.fromkeys(PROFILE_FIELDS, 0)
+        for sample in samples:
+            for totals in (stages.setdefault(sample['stage'], dict.fromkeys(PROFILE_FIELDS, 0)), total):
+                for field in PROFILE_FIELDS:
+                    if field == 'max_rss_bytes':
+                        totals[field] = max(totals[field], sample[field])
+                    else:
+                        totals[field] += sample[field]
+        stages['total'] = total
+        return stages
+
+    def report(self) -> dict:
+        with self.lock:
+            samples = list(self.samples)
+        by_track: Dict[str, List[dict]] = {}
+        by_album: Dict[str, List[dict]] = {}
+        for sample in samples:
+            if sample['track']:
+                by_track.setdefault(sample['track'], []).append(sample)
+            if sample['album']:
+                by_album.setdefault(sample['album'], []).append(sample)
+        return {
+            'wall_seconds': time.monotonic() - self.started,
+            'parallel_jobs': CONFIG.PARALLEL_JOBS,
+            'stages': self.aggregate(samples),
+            'albums': {album: self.aggregate(group) for album, group in by_album.items()},
+            'tracks': {track: self.aggregate(group) for track, group in by_track.items()},
+        }
+
+    def log_summary(self, report: dict):
+        logger.info("\n=== Profile ===")
+        logger.info(f"{'Stage':<12} {'Runs':>6} {'Wall (s)':>10} {'CPU (s)':>10} {'Peak RSS (MB)':>14} {'Read (MB)':>10} {'Written (MB)':>13}")
+        for stage, totals in report['stages'].items():
+            logger.info(f"{stage:<12} {totals['runs']:>6} {totals['wall_seconds']:>10.1f} "
+                        f"{totals['user_seconds'] + totals['system_seconds']:>10.1f} {totals['max_rss_bytes'] / 2**20:>14.1f} "
+                        f"{totals['read_bytes'] / 2**20:>10.1f} {totals['write_bytes'] / 2**20:>13.1f}")
+        logger.info(f"Run wall time: {report['wall_seconds']:.1f} s with {report['parallel_jobs']} worker(s)")
+
+    def write(self, path: str, prometheus: Optional[str] = None):
+        report = self.report()
+        self.log_summary(report)
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+            logger.info(f"Profile written to {path}")
+        if prometheus:
+            self.write_prometheus(prometheus, report)
+            logger.info(f"Prometheus metrics written to {prometheus}")
+
+    @staticmethod
+    def write_prometheus(path: str, report: dict):
+        """node_exporter textfile: per-stage gauges of the last run, replaced atomically."""
+        lines = ["# HELP puretone_run_wall_seconds Wall time of the last run.",
+                 "# TYPE puretone_run_wall_seconds gauge",
+                 f"puretone_run_wall_seconds {report['wall_seconds']:.3f}"]
+        for field in PROFILE_FIELDS:
+            name = f"puretone_stage_{field}"
+            lines += [f"# HELP {name} Per-stage {field.replace('_', ' ')} of the last run's subprocesses.",
+                      f"# TYPE {name} gauge"]
+            for stage, totals in report['stages'].items():
+                if stage != 'total':
+                    lines.append(f'{name}{{stage="{stage}"}} {totals[field]:g}')
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(temp_path, path)
+
+PROFILER: Optional[Profiler] = None
+
+# ---------------------------------------------------------------------------
+# Analysis cache
+# ---------------------------------------------------------------------------
+
+class AnalysisCache:
+    """
+    Persistent SQLite cache of analysis results, keyed by input identity
+    (size, mtime and a fast sampled hash) plus the resampler settings that
+    affect the measurement. Entries are evicted by age and, beyond
+    CACHE_MAX_ENTRIES, least recently used first.
+    """
+    SCHEMA_VERSION = 1
+    HASH_SAMPLE = 1024 * 1024
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'analysis.sqlite3')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS analysis '
+                          '(key TEXT PRIMARY KEY, kind TEXT, file TEXT, value TEXT, accessed REAL)')
+        self.conn.commit()
+        self.evict()
+
+    def fast_hash(self, file: str, size: int) -> str:
+        """Hash the first and last HASH_SAMPLE bytes — enough to catch re-rips without reading whole DSFs."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file, 'rb') as f:
+            digest.update(f.read(self.HASH_SAMPLE))
+            if size > 2 * self.HASH_SAMPLE:
+                f.seek(-self.HASH_SAMPLE, os.SEEK_END)
+                digest.update(f.read(self.HASH_SAMPLE))
+        return digest.hexdigest()
+
+    def key(self, file: str, kind: str, codec: Optional[str] = None) -> str:
+        if file in SACD_TRACKS:
+            # An ISO track is identified by the image and the track's sector range
+            disc, track = SACD_TRACKS[file]
+            st = os.stat(disc.path)
+            source = [st.st_size, st.st_mtime_ns, track['start'], track['length']]
+        else:
+            st = os.stat(file)
+            source = [st.st_size, st.st_mtime_ns, self.fast_hash(file, st.st_size)]
+        identity = ([self.SCHEMA_VERSION, kind] + source +
+                    [CONFIG.RESAMPLER, CONFIG.PRECISION, CONFIG.CHEBY, CONFIG.AR, codec or CONFIG.ACODEC, CONFIG.METER])
+        return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+    def get(self, file: str, kind: str, codec: Optional[str] = None) -> Optional[dict]:
+        try:
+            key = self.key(file, kind, codec)
+        except OSError:
+            return None
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM analysis WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE analysis SET accessed = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        logger.debug(f"Analysis cache hit ({kind}) for {file}")
+        return json.loads(row[0])
+
+    def put(self, file: str, kind: str, value: dict, codec: Optional[str] = None):
+        try:
+            key = self.key(file, kind, codec)
+        except OSError:
+            return
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO analysis (key, kind, file, value, accessed) VALUES (?, ?, ?, ?, ?)',
+                              (key, kind, file, json.dumps(value), time.time()))
+            self.conn.commit()
+
+    def evict(self):
+        cutoff = time.time() - CONFIG.CACHE_MAX_AGE_DAYS * 86400
+        with self.lock:
+            self.conn.execute('DELETE FROM analysis WHERE accessed < ?', (cutoff,))
+            self.conn.execute('DELETE FROM analysis WHERE key NOT IN '
+                              '(SELECT key FROM analysis ORDER BY accessed DESC LIMIT ?)', (CONFIG.CACHE_MAX_ENTRIES,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+ANALYSIS_CACHE: Optional[AnalysisCache] = None
+
+# ---------------------------------------------------------------------------
+
+def analyze_track(input_file: str) -> Optional[dict]:
+    """
+    Measure one track for --volume auto: DSD peaks plus peaks of the resampled
+    PCM. Safe to run on a worker thread — nothing is written to the shared
+    logs here; the caller records the returned analyses in file order.
+    """
+    # With --decode-once the temp WAV is kept as float and reused by process_file
+    analysis_codec = DECODE_ONCE_CODEC if CONFIG.DECODE_ONCE else CONFIG.ACODEC
+    temp_wav = SCRATCH.path(input_file, 'temp.wav')
+
+    cached = ANALYSIS_CACHE.get(input_file, 'auto', analysis_codec) if ANALYSIS_CACHE else None
+    if cached:
+        logger.info(f"Using cached volume analysis for {input_file}")
+        return {'file': input_file, 'temp_wav': temp_wav, 'dsd': cached['dsd'], 'wav': cached['wav']}
+
+    # One DSD decode both measures the input and produces the resampled WAV
+    wav_args = ['-acodec', analysis_codec, '-ar', CONFIG.AR, temp_wav, '-y']
+    SCRATCH.track(temp_wav)
+    source = pcm_source(input_file)
+    if CONFIG.METER == 'numpy':
+        rate, channels = probe_audio(input_file)
+        dsd_tap = {'stream': source['dsd_stream'] or '0:a', 'filter': None, 'rate': rate, 'loudness': False}
+        results, stderr, rc = run_metered(source['args'], [dsd_tap], channels,
+                                          ['-map', '0:a', '-af', join_filters(source['filter'])] + wav_args,
+                                          feed=source['feed'])
+        dsd_analysis = results[0]
+    else:
+        cmd = ['ffmpeg'] + source['args'] + fused_filtergraph(join_filters(source['filter']), source['dsd_stream']) + wav_args
+        _, stderr, rc = run_command(cmd, feed=source['feed'], stage='analyze')
+        dsd_analysis = parse_analysis(stderr)
+    if rc != 0 or not os.path.exists(temp_wav):
+        logger.error(f"Failed to create temporary WAV for {input_file}: {stderr}")
+        SCRATCH.remove(temp_wav)
+        return None
+
+    wav_analysis, _, _ = analyze_audio(temp_wav)
+    complete = dsd_analysis['max_volume'] is not None and wav_analysis['max_volume'] is not None
+    if ANALYSIS_CACHE and complete:
+        ANALYSIS_CACHE.put(input_file, 'auto', {'dsd': dsd_analysis, 'wav': wav_analysis}, analysis_codec)
+    if CONFIG.DECODE_ONCE and complete:
+        RESAMPLED_PCM[input_file] = (temp_wav, pcm_decoder(source))
+    else:
+        SCRATCH.remove(temp_wav)
+    return {'file': input_file, 'temp_wav': temp_wav, 'dsd': dsd_analysis, 'wav': wav_analysis}
 
+def calculate_volume_adjustment(track_analyses: List[Optional[dict]], subdir: str, log_file: Optional[str] = None) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """Turn a group's track analyses (in file order) into per-track volumes."""
     volume_adjustments = []
-    temp_wav_files = []
-
-    for input_file in files:
-        base_name = Path(input_file).stem
-        temp_wav = f"/tmp/puretone_{os.getpid()}_{base_name}_temp.wav"
-        temp_wav_files.append(temp_wav)
-
-        cmd = ['ffmpeg', '-i', input_file, '-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR,
-               '-af', f"aresample=resampler={CONFIG.RESAMPLER}:precision={CONFIG.PRECISION}:cheby={CONFIG.CHEBY}", temp_wav, '-y']
-        _, stderr, rc = run_command(cmd)
-        if rc != 0 or not os.path.exists(temp_wav):
-            logger.error(f"Failed to create temporary WAV for {input_file}: {stderr}")
+    for track in track_analyses:
+        if track is None:
             continue
-
-        dsd_max_volume = analyze_peaks(input_file, TEMP_FILES['PEAK_LOG'], "DSD")
-        wav_max_volume = analyze_peaks(temp_wav, TEMP_FILES['PEAK_LOG'], "WAV")
-
-        if dsd_max_volume is None or wav_max_volume is None:
+        input_file = track['file']
+        volume_entry = record_track_analysis(track)
+        if volume_entry is None:
             logger.warning(f"Skipping volume calculation for {input_file}: peak data unavailable")
             continue
+        volume_adjustments.append(volume_entry)
 
-        y = -(wav_max_volume - dsd_max_volume)
-        logger.info(f"File {input_file}: DSD Max Volume = {dsd_max_volume:.1f} dB, WAV Max Volume = {wav_max_volume:.1f} dB, y = {y:.1f} dB")
+    return decide_group_volumes(volume_adjustments, subdir, log_file)
 
-        with open(TEMP_FILES['VOLUME_LOG'], 'a') as f:
-            f.write(f"{input_file}:{y:.1f}:{wav_max_volume:.1f}\n")
-        volume_adjustments.append({'file': input_file, 'y': y, 'wav_max_volume': wav_max_volume})
+def record_track_analysis(track: dict) -> Optional[dict]:
+    """Store a track's DSD/WAV analysis in the results and derive its y value."""
+    input_file = track['file']
+    dsd_max_volume = record_peaks(input_file, "DSD", track['dsd'])
+    wav_max_volume = record_peaks(input_file, "WAV", track['wav'])
+    if dsd_max_volume is None or wav_max_volume is None:
+        return None
+
+    y = -(wav_max_volume - dsd_max_volume)
+    logger.info(f"File {input_file}: DSD Max Volume = {dsd_max_volume:.1f} dB, WAV Max Volume = {wav_max_volume:.1f} dB, y = {y:.1f} dB")
 
-    for temp_wav in temp_wav_files:
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
+    RESULTS.record(input_file, 'volume', {'y': y, 'wav_max_volume': wav_max_volume})
+    return {'file': input_file, 'y': y, 'wav_max_volume': wav_max_volume}
 
+def decide_group_volumes(volume_adjustments: List[dict], subdir: str, log_file: Optional[str] = None) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """Group-level headroom, volume-increase and addition logic over per-track y values."""
     if not volume_adjustments:
         logger.error(f"No valid volume data calculated for files in {subdir or 'current directory'}")
         return [], []
@@ -186,6 +1885,7 @@ def calculate_volume_adjustment(files: List[str], subdir: str, log_file: Optiona
                 base_volume = f"{base_volume_value:.1f}dB"
             final_volume = add_db(base_volume, CONFIG.ADDITION)
             final_volumes.append((entry['file'], final_volume))
+            RESULTS.record(entry['file'], 'volume', {'applied': final_volume})
     else:
         logger.info(f"No adjusted volumes exceed {CONFIG.HEADROOM_LIMIT} dB. Using individual y values as volume adjustments")
         for entry in volume_adjustments:
@@ -195,6 +1895,7 @@ def calculate_volume_adjustment(files: List[str], subdir: str, log_file: Optiona
                 base_volume = f"{base_volume_value:.1f}dB"
             final_volume = add_db(base_volume, CONFIG.ADDITION)
             final_volumes.append((entry['file'], final_volume))
+            RESULTS.record(entry['file'], 'volume', {'applied': final_volume})
 
     if log_file:
         with open(log_file, 'a') as f:
@@ -209,141 +1910,620 @@ def calculate_volume_adjustment(files: List[str], subdir: str, log_file: Optiona
 
     return final_volumes, volume_adjustments
 
-def process_file(input_file: str, output_dir: str, volume: str = None, log_file: Optional[str] = None) -> bool:
+def measure_track_loudness(input_file: str) -> Optional[dict]:
+    """
+    Measure one track for --loudnorm album with a single decode: the input
+    peaks, plus the block loudness histogram and true peak of the resampled
+    PCM. With --decode-once the same decode also keeps that PCM, so the
+    encode only applies the album gain. Safe to run on a worker thread.
+    """
+    cached = ANALYSIS_CACHE.get(input_file, 'album') if ANALYSIS_CACHE else None
+    if cached:
+        logger.info(f"Using cached loudness analysis for {input_file}")
+        return {'file': input_file, 'input': cached['input'], 'loudness': cached['loudness']}
+
+    temp_wav = SCRATCH.path(input_file, 'temp.wav')
+    wav_args = ['-acodec', DECODE_ONCE_CODEC, '-ar', CONFIG.AR, temp_wav, '-y'] if CONFIG.DECODE_ONCE else []
+    if wav_args:
+        SCRATCH.track(temp_wav)
+    source = pcm_source(input_file)
+    if CONFIG.METER == 'numpy':
+        rate, channels = probe_audio(input_file)
+        taps = [{'stream': source['dsd_stream'] or '0:a', 'filter': None, 'rate': rate, 'loudness': False},
+                {'filter': source['filter'], 'rate': int(CONFIG.AR), 'loudness': True}]
+        output_args = ['-map', '0:a', '-af', join_filters(source['filter'])] + wav_args if wav_args else None
+        results, stderr, rc = run_metered(source['args'], taps, channels, output_args, feed=source['feed'])
+        input_analysis = results[0]
+        loudness = {'blocks': results[1]['blocks'], 'true_peak': results[1]['true_peak']}
+    else:
+        # aformat pins the resampler's output to the encoded rate and to the float PCM --decode-once keeps
+        chain = join_filters(source['filter'], f"aformat=sample_fmts=flt:sample_rates={CONFIG.AR}", LOUDNESS_FILTERS)
+        cmd = (['ffmpeg'] + source['args'] + fused_filtergraph(chain, source['dsd_stream']) +
+               (wav_args or ['-f', 'null', '-']))
+        stdout, stderr, rc = run_command(cmd, feed=source['feed'], stage='analyze')
+        input_analysis = parse_analysis(stderr)
+        loudness = parse_loudness(stdout, stderr)
+    if rc != 0 or loudness is None or input_analysis['max_volume'] is None:
+        logger.error(f"Failed to measure loudness of {input_file}: {stderr}")
+        SCRATCH.remove(temp_wav)
+        return None
+
+    if ANALYSIS_CACHE:
+        ANALYSIS_CACHE.put(input_file, 'album', {'input': input_analysis, 'loudness': loudness})
+    if wav_args:
+        RESAMPLED_PCM[input_file] = (temp_wav, pcm_decoder(source))
+    return {'file': input_file, 'input': input_analysis, 'loudness': loudness}
+
+def decide_album_gain(track_analyses: List[Optional[dict]], subdir: str, log_file: Optional[str] = None) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """
+    --loudnorm album: one linear gain for the whole group, taking the gated
+    integrated loudness of all its blocks to LOUDNORM_I unless that would push
+    the album's highest true peak over LOUDNORM_TP.
+    """
+    measured = []
+    for track in track_analyses:
+        if track is None:
+            continue
+        record_peaks(track['file'], "Input", track['input'])
+        measured.append(track)
+    album = subdir or 'current directory'
+    integrated = histogram_loudness([track['loudness']['blocks'] for track in measured])
+    if integrated is None:
+        logger.error(f"No valid loudness data measured for files in {album}")
+        return [], []
+
+    true_peak = max(track['loudness']['true_peak'] for track in measured)
+    gain = float(CONFIG.LOUDNORM_I) - integrated
+    limited = true_peak + gain > float(CONFIG.LOUDNORM_TP)
+    if limited:
+        gain = float(CONFIG.LOUDNORM_TP) - true_peak
+    volume = f"{gain:.2f}dB"
+    logger.info(f"Album {album}: Integrated = {integrated:.2f} LUFS, True Peak = {true_peak:.2f} dBTP, gain = {volume}" +
+                (f" (limited by the {CONFIG.LOUDNORM_TP} dBTP true peak limit)" if limited else ""))
+
+    volume_data = []
+    for track in measured:
+        track_integrated = histogram_loudness([track['loudness']['blocks']])
+        entry = {'integrated': track_integrated, 'true_peak': track['loudness']['true_peak'],
+                 'album_integrated': integrated, 'album_true_peak': true_peak, 'applied': volume}
+        RESULTS.record(track['file'], 'loudness', entry)
+        volume_data.append(dict(entry, file=track['file']))
+
+    if log_file:
+        with open(log_file, 'a') as f:
+            for entry in volume_data:
+                track_integrated = 'silent' if entry['integrated'] is None else f"{entry['integrated']:.2f} LUFS"
+                f.write(f"File {entry['file']}: Integrated = {track_integrated}, True Peak = {entry['true_peak']:.2f} dBTP\n")
+            f.write(f"Album {album}: Integrated = {integrated:.2f} LUFS, True Peak = {true_peak:.2f} dBTP, applied {volume} to every track" +
+                    (f" (limited by the {CONFIG.LOUDNORM_TP} dBTP true peak limit)\n" if limited else "\n"))
+
+    return [(track['file'], volume) for track in measured], volume_data
+
+# ---------------------------------------------------------------------------
+# FLAC metadata
+# ---------------------------------------------------------------------------
+
+FLAC_STREAMINFO = 0
+FLAC_PADDING = 1
+FLAC_VORBIS_COMMENT = 4
+FLAC_MAX_BLOCK = 0xFFFFFF
+
+# ID3v2 frames (v2.3/2.4 and v2.2 ids) carried over from DSFs as Vorbis comment fields
+ID3_VORBIS_FIELDS = {
+    'TIT2': 'TITLE', 'TT2': 'TITLE', 'TALB': 'ALBUM', 'TAL': 'ALBUM',
+    'TPE1': 'ARTIST', 'TP1': 'ARTIST', 'TPE2': 'ALBUMARTIST', 'TP2': 'ALBUMARTIST',
+    'TPE3': 'CONDUCTOR', 'TP3': 'CONDUCTOR', 'TCOM': 'COMPOSER', 'TCM': 'COMPOSER',
+    'TEXT': 'LYRICIST', 'TXT': 'LYRICIST', 'TCON': 'GENRE', 'TCO': 'GENRE',
+    'TDRC': 'DATE', 'TYER': 'DATE', 'TYE': 'DATE', 'TCOP': 'COPYRIGHT', 'TCR': 'COPYRIGHT',
+    'TPUB': 'ORGANIZATION', 'TPB': 'ORGANIZATION', 'TSRC': 'ISRC', 'TRC': 'ISRC',
+    'TRCK': 'TRACKNUMBER', 'TRK': 'TRACKNUMBER', 'TPOS': 'DISCNUMBER', 'TPA': 'DISCNUMBER',
+    # Kept beside PureTone's processing history (see tag_flac)
+    'COMM': 'COMMENT', 'COM': 'COMMENT',
+}
+# "n/total" numbering frames and the field their total goes to
+ID3_TOTAL_FIELDS = {'TRACKNUMBER': 'TRACKTOTAL', 'DISCNUMBER': 'DISCTOTAL'}
+ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+
+def syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def id3_strings(payload: bytes) -> List[str]:
+    """NUL-separated strings of a text frame body (encoding byte first)."""
+    text = payload[1:].decode(ID3_ENCODINGS.get(payload[0], 'latin-1'), errors='replace')
+    return [value.lstrip('\ufeff').strip() for value in text.split('\0')]
+
+def parse_id3(tag: bytes) -> Dict[str, List[str]]:
+    """Vorbis comment fields of an ID3v2.2-2.4 tag's text, TXXX and COMM frames."""
+    if len(tag) < 10 or tag[:3] != b'ID3' or not 2 <= tag[3] <= 4:
+        return {}
+    version, flags = tag[3], tag[5]
+    data = tag[10:10 + syncsafe(tag[6:10])]
+    if flags & 0x80 and version < 4:
+        data = data.replace(b'\xff\x00', b'\xff')
+    position = 0
+    if flags & 0x40 and version == 3:
+        position = struct.unpack_from('>I', data)[0] + 4
+    elif flags & 0x40 and version == 4:
+        position = syncsafe(data[:4])
+    id_size, header_size = (3, 6) if version == 2 else (4, 10)
+
+    fields: Dict[str, List[str]] = {}
+    while position + header_size <= len(data):
+        frame_id = data[position:position + id_size]
+        if not frame_id.strip(b'\0'):
+            break  # padding
+        if version == 2:
+            length, frame_flags = int.from_bytes(data[position + 3:position + 6], 'big'), 0
+        elif version == 3:
+            length, frame_flags = struct.unpack_from('>I', data, position + 4)[0], data[position + 9] & 0xC0
+        else:
+            length, frame_flags = syncsafe(data[position + 4:position + 8]), data[position + 9]
+        payload = data[position + header_size:position + header_size + length]
+        position += header_size + length
+        if version == 4:
+            # Compressed (0x08) and encrypted (0x04) frames are skipped like v2.3's 0xC0
+            if frame_flags & 0x0C:
+                continue
+            if frame_flags & 0x01:
+                payload = payload[4:]
+            if frame_flags & 0x02:
+                payload = payload.replace(b'\xff\x00', b'\xff')
+        elif frame_flags:
+            continue
+        if not payload:
+            continue
+        name = frame_id.decode('latin-1')
+        if name in ('TXXX', 'TXX'):
+            strings = id3_strings(payload)
+            field, values = strings[0].upper(), strings[1:]
+            if not field or '=' in field or not all(0x20 <= ord(c) <= 0x7D for c in field):
+                continue
+        elif name in ID3_VORBIS_FIELDS:
+            field = ID3_VORBIS_FIELDS[name]
+            if name in ('COMM', 'COM'):
+                # Language code, then a description; only the plain comment is carried over
+                strings = id3_strings(payload[:1] + payload[4:])
+                if strings[0]:
+                    continue
+                values = strings[1:]
+            else:
+                values = id3_strings(payload)
+        else:
+            continue
+        values = [value for value in values if value]
+        if field in ID3_TOTAL_FIELDS and values and '/' in values[0]:
+            number, total = values[0].split('/', 1)
+            values = [number.strip()]
+            if total.strip():
+                fields.setdefault(ID3_TOTAL_FIELDS[field], [total.strip()])
+        if values:
+            fields.setdefault(field, values)
+    return fields
+
+def dsf_id3_tags(path: str) -> Dict[str, List[str]]:
+    """Vorbis comment fields of the ID3v2 chunk at the end of a DSF (sacd_extract's id3tag=5); {} without one."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(28)
+            if len(header) < 28 or header[:4] != b'DSD ':
+                return {}
+            offset, = struct.unpack_from('<Q', header, 20)
+            if not offset:
+                return {}
+            f.seek(offset)
+            return parse_id3(f.read())
+    except OSError:
+        return {}
+
+class FlacMetadata:
+    """
+    The metadata blocks of a FLAC file and its Vorbis comment fields. write()
+    stores them back in place, taking the room for the comments from the
+    PADDING block reserved at encode time, so the audio frames never move;
+    only a file without enough padding is rewritten, behind a temp name.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            head = f.read(10)
+            # A leading ID3v2 tag (not written by ffmpeg, but allowed) is kept as it is
+            self.start = 10 + syncsafe(head[6:10]) if head[:3] == b'ID3' and len(head) == 10 else 0
+            f.seek(self.start)
+            if f.read(4) != b'fLaC':
+                raise ValueError(f"{path} is not a FLAC file")
+            self.blocks: List[Tuple[int, bytes]] = []
+            last = False
+            while not last:
+                header = f.read(4)
+                if len(header) < 4:
+                    raise ValueError(f"{path}: truncated metadata")
+                last, kind, length = bool(header[0] & 0x80), header[0] & 0x7F, int.from_bytes(header[1:], 'big')
+                payload = f.read(length)
+                if len(payload) < length:
+                    raise ValueError(f"{path}: truncated metadata block")
+                self.blocks.append((kind, payload))
+            self.audio_offset = f.tell()
+        if self.blocks[0][0] != FLAC_STREAMINFO:
+            raise ValueError(f"{path}: missing STREAMINFO")
+        self.vendor, self.comments = 'PureTone', []
+        comment = next((payload for kind, payload in self.blocks if kind == FLAC_VORBIS_COMMENT), None)
+        if comment is not None:
+            self.vendor, self.comments = self.parse_comments(comment)
+
+    @staticmethod
+    def parse_comments(payload: bytes) -> Tuple[str, List[Tuple[str, str]]]:
+        length, = struct.unpack_from('<I', payload)
+        vendor = payload[4:4 + length].decode('utf-8', errors='replace')
+        position = 4 + length
+        count, = struct.unpack_from('<I', payload, position)
+        position += 4
+        comments = []
+        for _ in range(count):
+            length, = struct.unpack_from('<I', payload, position)
+            entry = payload[position + 4:position + 4 + length].decode('utf-8', errors='replace')
+            position += 4 + length
+            name, _, value = entry.partition('=')
+            comments.append((name, value))
+        return vendor, comments
+
+    def comment_block(self) -> bytes:
+        entries = [f"{name}={value}".encode() for name, value in self.comments]
+        vendor = self.vendor.encode()
+        return (struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', len(entries)) +
+                b''.join(struct.pack('<I', len(entry)) + entry for entry in entries))
+
+    def tags(self, name: str) -> List[str]:
+        return [value for key, value in self.comments if key.upper() == name.upper()]
+
+    def set_tag(self, name: str, values: List[str]):
+        """Replace every value of a field (unlike metaflac --set-tag, which appends)."""
+        self.comments = [(key, value) for key, value in self.comments if key.upper() != name.upper()]
+        self.comments += [(name, value) for value in values]
+
+    def add_missing(self, fields: Dict[str, List[str]]):
+        """Add the fields the file does not carry yet."""
+        for name, values in fields.items():
+            if not self.tags(name):
+                self.set_tag(name, values)
+
+    @staticmethod
+    def encode_blocks(blocks: List[Tuple[int, bytes]]) -> bytes:
+        return b''.join(bytes([kind | (0x80 if i == len(blocks) - 1 else 0)]) + len(payload).to_bytes(3, 'big') + payload
+                        for i, (kind, payload) in enumerate(blocks))
+
+    def write(self) -> bool:
+        """Store the blocks with the current comments; True when they fitted in place."""
+        comment = self.comment_block()
+        if len(comment) > FLAC_MAX_BLOCK:
+            raise ValueError(f"{self.path}: Vorbis comments exceed a metadata block")
+        blocks = [(kind, comment if kind == FLAC_VORBIS_COMMENT else payload)
+                  for kind, payload in self.blocks if kind != FLAC_PADDING]
+        if not any(kind == FLAC_VORBIS_COMMENT for kind, _ in blocks):
+            blocks.insert(1, (FLAC_VORBIS_COMMENT, comment))
+        room = self.audio_offset - self.start - 4 - sum(4 + len(payload) for _, payload in blocks)
+        if room == 0 or 4 <= room <= 4 + FLAC_MAX_BLOCK:
+            if room:
+                blocks.append((FLAC_PADDING, bytes(room - 4)))
+            with open(self.path, 'r+b') as f:
+                f.seek(self.start + 4)
+                f.write(self.encode_blocks(blocks))
+            self.blocks = blocks
+            return True
+
+        # Padding exhausted: copy the frames behind new metadata with fresh padding
+        blocks.append((FLAC_PADDING, bytes(CONFIG.FLAC_PADDING)))
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(self.path, 'rb') as src, open(temp_path, 'wb') as dst:
+                dst.write(src.read(self.start) + b'fLaC' + self.encode_blocks(blocks))
+                src.seek(self.audio_offset)
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(temp_path, self.path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.audio_offset = self.start + 4 + sum(4 + len(payload) for _, payload in blocks)
+        self.blocks = blocks
+        return False
+
+def tag_flac(flac_file: str, tags: Dict[str, str], carried: Optional[Dict[str, List[str]]] = None) -> bool:
+    """
+    Set tags (replacing any values they had) and add the carried fields the
+    file lacks; a carried field that is also set (the disc's ID3 comment
+    beside PureTone's COMMENT) keeps its values after the new one. Then read
+    the metadata back to verify it: False when the comments read back differ
+    from the ones written.
+    """
+    carried = carried or {}
+    metadata = FlacMetadata(flac_file)
+    metadata.add_missing({name: values for name, values in carried.items() if name not in tags})
+    for name, value in tags.items():
+        metadata.set_tag(name, [value] + [kept for kept in carried.get(name, []) if kept != value])
+    if not metadata.write():
+        logger.warning(f"{flac_file} had too little padding for its tags; rewrote the file")
+    written = FlacMetadata(flac_file)
+    return written.comments == metadata.comments and written.audio_offset == metadata.audio_offset
+
+# ---------------------------------------------------------------------------
+
+def stream_encodable(output_format: str) -> bool:
+    """WAV output is always written directly; FLAC/WavPack only when ACODEC maps to an encoder sample format."""
+    return output_format == 'wav' or CONFIG.ACODEC in PCM_SAMPLE_FORMATS
+
+def can_stream_encode() -> bool:
+    """Every requested format is encoded straight from the filtered stream, without an intermediate WAV."""
+    return all(stream_encodable(f) for f in CONFIG.OUTPUT_FORMATS)
+
+def compression_args(output_format: str) -> List[str]:
+    if output_format == 'wavpack':
+        return ['-compression_level', CONFIG.WAVPACK_COMPRESSION]
+    if output_format == 'flac':
+        return ['-compression_level', CONFIG.FLAC_COMPRESSION]
+    return []
+
+def encode_args(output_file: str, output_format: str) -> List[str]:
+    """Output arguments that encode the filtered stream straight into output_format."""
+    if output_format == 'wav':
+        return ['-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, output_file, '-y']
+    sample_fmt, bits = PCM_SAMPLE_FORMATS[CONFIG.ACODEC]
+    if output_format == 'wavpack':
+        # The WavPack encoder only takes planar samples
+        sample_fmt += 'p'
+    return (['-c:a', output_format, '-sample_fmt', sample_fmt, '-bits_per_raw_sample', bits, '-ar', CONFIG.AR] +
+            compression_args(output_format) + padding_args(output_format) + [output_file, '-y'])
+
+def padding_args(output_format: str) -> List[str]:
+    """Room the FLAC muxer leaves in front of the frames, so the tags are written in place after the encode."""
+    return ['-metadata_header_padding', str(CONFIG.FLAC_PADDING)] if output_format == 'flac' else []
+
+def process_file(input_file: str, output_dir: str, volume: str = None, log_file: Optional[str] = None,
+                 visualize: bool = True, journal: Optional['AlbumJournal'] = None) -> bool:
+    """
+    Convert one track into every --format from a single decode: the
+    resample + gain chain runs once and asplit feeds one encoder per format,
+    each writing to its own OUTPUT_DIRS sibling of output_dir. Outputs are
+    encoded and tagged under hidden partial names and renamed into place only
+    when complete, so an interrupted run never leaves a truncated file under
+    the final name.
+    """
     logger.debug(f"Processing file: {input_file}")
-    base_name = Path(input_file).stem
-    intermediate_wav = normalize_path(os.path.join(output_dir, f"{base_name}_intermediate.wav"))
-    output_file = normalize_path(os.path.join(output_dir, f"{base_name}.{FORMAT_EXTENSIONS[CONFIG.OUTPUT_FORMAT]}"))
-    spectrogram_dir = normalize_path(os.path.join(output_dir, 'spectrogram'))
+    intermediate_wav = SCRATCH.path(input_file, 'intermediate.wav')
+    final_files = {fmt: output_path(input_file, output_dir, fmt) for fmt in CONFIG.OUTPUT_FORMATS}
     local_log = normalize_path(os.path.join(output_dir, 'log.txt'))
 
-    os.makedirs(output_dir, exist_ok=True)
-    if CONFIG.ENABLE_VISUALIZATION:
-        os.makedirs(spectrogram_dir, exist_ok=True)
+    for directory in {os.path.dirname(path) for path in final_files.values()}:
+        os.makedirs(directory, exist_ok=True)
 
-    if os.path.exists(output_file):
+    existing = [fmt for fmt, path in final_files.items() if os.path.exists(path)]
+    if existing:
         if CONFIG.SKIP_EXISTING:
-            logger.info(f"Skipping {input_file}: {output_file} already exists (--skip-existing enabled)")
-            return True
+            if len(existing) == len(final_files):
+                logger.info(f"Skipping {input_file}: {', '.join(final_files.values())} already exist(s) (--skip-existing enabled)")
+                release_resampled_pcm(input_file)
+                return True
+            logger.info(f"Keeping existing {', '.join(final_files[fmt] for fmt in existing)} (--skip-existing enabled)")
+            final_files = {fmt: path for fmt, path in final_files.items() if fmt not in existing}
         elif CONFIG.OVERWRITE:
-            logger.info(f"Overwriting {output_file} due to OVERWRITE=True")
+            for fmt in existing:
+                logger.info(f"Overwriting {final_files[fmt]} due to OVERWRITE=True")
 
-    af_base = f"aresample=resampler={CONFIG.RESAMPLER}:precision={CONFIG.PRECISION}:cheby={CONFIG.CHEBY}"
-    analyze_peaks(input_file, TEMP_FILES['PEAK_LOG'], "Input")
+    output_files = {fmt: partial_path(path) for fmt, path in final_files.items()}
+    # The picture is rendered from the encode's own PCM, not by decoding the output again
+    vis_file = None
+    if CONFIG.ENABLE_VISUALIZATION and visualize:
+        vis_file = visualization_path(output_path(input_file, output_dir), output_dir)
+        os.makedirs(os.path.dirname(vis_file), exist_ok=True)
+    partial_files = list(output_files.values()) + ([partial_path(vis_file)] if vis_file else [])
+    for path in partial_files:
+        SCRATCH.track(path)
 
-    if volume:
-        af = f"{af_base},volume={volume}"
-        cmd = ['ffmpeg', '-i', input_file, '-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, '-af', af, intermediate_wav, '-y']
-        _, stderr, rc = run_command(cmd)
-        if rc != 0 or not os.path.exists(intermediate_wav):
-            logger.error(f"Error creating intermediate WAV for {input_file}. Check {local_log}")
-            with open(local_log, 'a') as f:
-                f.write(stderr + '\n')
-            return False
+    def discard_outputs():
+        for path in partial_files:
+            if os.path.exists(path):
+                os.remove(path)
+            SCRATCH.remove(path)
+
+    tap_input_peaks = False
+    feed = None
+    segments = None
+
+    resampled_pcm, decoder = RESAMPLED_PCM.get(input_file, (None, None))
+    plan = segment_plan(input_file) if volume and not resampled_pcm else None
+    # The path the PCM takes, recorded in the FLAC COMMENT
+    chain = ['SACD ISO' if input_file in SACD_TRACKS else 'DSF']
+    if volume and resampled_pcm:
+        # Decode-once: the soxr pass already ran during analysis, only apply the gain
+        chain += [decoder, 'PCM kept from analysis']
+        if input_file in SACD_TRACKS:
+            inputs, metadata = ['-i', resampled_pcm], sacd_metadata_args(input_file)
+        else:
+            inputs, metadata = ['-i', resampled_pcm, '-i', input_file], ['-map_metadata', '1']
+        filters, simple_map = f"volume={volume}", ['-map', '0:a']
+    elif plan:
+        # Long track: resampled and gain-adjusted in segments on separate cores, stitched into the encoders
+        source = segmented_source(input_file, volume, plan)
+        feed, segments = source['feed'], source['segments']
+        inputs, metadata, simple_map = source['args'], source['metadata'], source['map']
+        filters = None
+        chain += ['native decimator', f"{len(plan)} PCM segments"]
+    elif volume:
+        source = pcm_source(input_file)
+        feed = source['feed']
+        inputs, metadata, simple_map = source['args'], source['metadata'], source['map']
+        filters = join_filters(source['filter'], f"volume={volume}")
+        tap_input_peaks = not source['native']
+        chain.append(pcm_decoder(source))
     else:
-        af_first = f"{af_base},loudnorm=I={CONFIG.LOUDNORM_I}:TP={CONFIG.LOUDNORM_TP}:LRA={CONFIG.LOUDNORM_LRA}:print_format=summary"
-        _, stderr, rc = run_command(['ffmpeg', '-i', input_file, '-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, '-af', af_first, '-f', 'null', '-'])
-        if rc != 0:
-            logger.error(f"Error analyzing loudness for {input_file}. Check {local_log}")
-            with open(local_log, 'a') as f:
-                f.write(stderr + '\n')
-            return False
+        analysis = ANALYSIS_CACHE.get(input_file, 'loudnorm') if ANALYSIS_CACHE else None
+        if analysis:
+            logger.info(f"Using cached loudness analysis for {input_file}")
+            stderr = ''
+        else:
+            analysis, stderr, rc = analyze_audio(input_file, loudnorm=True)
+            if rc != 0:
+                logger.error(f"Error analyzing loudness for {input_file}. Check {local_log}")
+                with open(local_log, 'a') as f:
+                    f.write(stderr + '\n')
+                discard_outputs()
+                return False
+            if ANALYSIS_CACHE and analysis['loudnorm'] is not None:
+                ANALYSIS_CACHE.put(input_file, 'loudnorm', analysis)
+        record_peaks(input_file, "Input", analysis)
 
-        metrics = {
-            'measured_I': re.search(r'Input Integrated: *([-0-9.]*)', stderr),
-            'measured_LRA': re.search(r'Input LRA: *([0-9.]*)', stderr),
-            'measured_TP': re.search(r'Input True Peak: *([-0-9.]*)', stderr),
-            'measured_thresh': re.search(r'Input Threshold: *([-0-9.]*)', stderr)
-        }
-        if not all(m.group(1) for m in metrics.values() if m):
+        if analysis['loudnorm'] is None:
             logger.error(f"Failed to extract loudness metrics for {input_file}. Check {local_log}")
             with open(local_log, 'a') as f:
                 f.write(stderr + '\n')
+            discard_outputs()
             return False
 
-        af_second = (f"{af_base},loudnorm=I={CONFIG.LOUDNORM_I}:TP={CONFIG.LOUDNORM_TP}:LRA={CONFIG.LOUDNORM_LRA}:" +
-                     f"measured_I={metrics['measured_I'].group(1)}:measured_LRA={metrics['measured_LRA'].group(1)}:" +
-                     f"measured_TP={metrics['measured_TP'].group(1)}:measured_thresh={metrics['measured_thresh'].group(1)}")
-        cmd = ['ffmpeg', '-i', input_file, '-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, '-af', af_second, intermediate_wav, '-y']
-        _, stderr, rc = run_command(cmd)
-        if rc != 0 or not os.path.exists(intermediate_wav):
-            logger.error(f"Error creating intermediate WAV for {input_file}. Check {local_log}")
-            with open(local_log, 'a') as f:
-                f.write(stderr + '\n')
+        source = pcm_source(input_file)
+        feed = source['feed']
+        inputs, metadata, simple_map = source['args'], source['metadata'], source['map']
+        filters = join_filters(source['filter'], loudnorm_filter(analysis['loudnorm']))
+        chain.append(pcm_decoder(source))
+
+    # Formats the filtered stream can feed directly; the rest are encoded from an intermediate WAV
+    direct = [fmt for fmt in output_files if stream_encodable(fmt)]
+    indirect = [fmt for fmt in output_files if not stream_encodable(fmt)]
+    encodes = [encode_args(output_files[fmt], fmt) for fmt in direct]
+    if indirect:
+        SCRATCH.track(intermediate_wav)
+        encodes.append(['-acodec', CONFIG.ACODEC, '-ar', CONFIG.AR, intermediate_wav, '-y'])
+
+    # Resample, gain and encode in one ffmpeg — one decode however many formats
+    # The output peaks are measured on the stream the encoders receive, not by decoding an output again
+    graph_args, output_args = fan_out_filtergraph(filters, len(encodes), tap_input_peaks, simple_map,
+                                                  visualization_filter() if vis_file else None, tap_output=True)
+    cmd = ['ffmpeg'] + inputs + graph_args
+    for selection, encode in zip(output_args, encodes):
+        cmd += selection + metadata + encode
+    if vis_file:
+        cmd += output_args[-1] + ['-frames:v', '1', '-update', '1', partial_path(vis_file), '-y']
+    _, stderr, rc = run_command(cmd, feed=feed, stage='encode' if direct else 'resample')
+    release_resampled_pcm(input_file)
+    written = [output_files[fmt] for fmt in direct] + ([intermediate_wav] if indirect else []) + \
+        ([partial_path(vis_file)] if vis_file else [])
+    if rc != 0 or (segments and segments['error']) or not all(os.path.exists(path) for path in written):
+        what = f"converting {input_file} to {', '.join(direct)}" if direct else f"creating intermediate WAV for {input_file}"
+        logger.error(f"Error {what}. Check {local_log}")
+        with open(local_log, 'a') as f:
+            f.write(stderr + (f"\nSegmented resampling: {segments['error']}" if segments and segments['error'] else '') + '\n')
+        discard_outputs()
+        SCRATCH.remove(intermediate_wav)
+        return False
+    if segments:
+        RESULTS.record(input_file, 'segments', {'count': segments['count'], 'seconds': CONFIG.SEGMENT_SECONDS})
+        if CONFIG.SEGMENT_VERIFY and not verify_segments(input_file, volume, segments):
+            discard_outputs()
+            SCRATCH.remove(intermediate_wav)
             return False
+    if tap_input_peaks:
+        record_peaks(input_file, "Input", parse_analysis(stderr))
+    record_peaks(input_file, "Output", parse_analysis(stderr, OUTPUT_TAP))
 
-    if CONFIG.OUTPUT_FORMAT == 'wav':
-        os.rename(intermediate_wav, output_file)
-    else:
-        final_cmd = ['ffmpeg', '-i', intermediate_wav, '-c:a', CONFIG.OUTPUT_FORMAT, '-map_metadata', '0']
-        if CONFIG.OUTPUT_FORMAT == 'wavpack':
-            final_cmd.extend(['-compression_level', CONFIG.WAVPACK_COMPRESSION])
-        elif CONFIG.OUTPUT_FORMAT == 'flac':
-            final_cmd.extend(['-compression_level', CONFIG.FLAC_COMPRESSION])
-        final_cmd.extend([output_file, '-y'])
-        try:
-            _, stderr, rc = run_command(final_cmd)
+    if indirect:
+        final_cmd = ['ffmpeg', '-i', intermediate_wav]
+        for fmt in indirect:
+            final_cmd += ['-c:a', fmt, '-map_metadata', '0'] + compression_args(fmt) + padding_args(fmt) + [output_files[fmt], '-y']
+        try:
+            _, stderr, rc = run_command(final_cmd, stage='encode')
             if rc != 0:
-                logger.error(f"Error converting {input_file} to {CONFIG.OUTPUT_FORMAT}. Check {local_log}")
+                logger.error(f"Error converting {input_file} to {', '.join(indirect)}. Check {local_log}")
                 with open(local_log, 'a') as f:
                     f.write(stderr + '\n')
+                discard_outputs()
                 return False
         finally:
-            if os.path.exists(intermediate_wav):
-                os.remove(intermediate_wav)
+            SCRATCH.remove(intermediate_wav)
 
-    if not os.path.getsize(output_file):
-        logger.error(f"Output file {output_file} is empty")
-        return False
+    for path in output_files.values():
+        if not os.path.getsize(path):
+            logger.error(f"Output file {path} is empty")
+            discard_outputs()
+            return False
 
-    analyze_peaks(output_file, TEMP_FILES['PEAK_LOG'], "Output")
-    with open(TEMP_FILES['PEAK_LOG']) as f:
-        for line in f:
-            if line.startswith(f"{output_file}:Output:"):
-                _, _, output_max_volume, output_peak_level = line.strip().split(':', 3)
-                break
-    file_size_kb = os.path.getsize(output_file) / 1024
-    logger.info(f"Converted {input_file} -> {output_file} (Size: {file_size_kb:.1f} KB)")
-    logger.debug(f"Output - Max Volume: {output_max_volume}, Peak Level: {output_peak_level}")
+    output_peaks = RESULTS.get(input_file, "Output")
+    logger.debug(f"Output - Max Volume: {output_peaks['max_volume']}, Peak Level: {output_peaks['peak_level']}")
 
-    if CONFIG.OUTPUT_FORMAT == 'flac':
+    if 'flac' in output_files:
+        flac_file = output_files['flac']
         if volume:
             applied_volume = volume
         else:
             applied_volume = f"loudnorm=I={CONFIG.LOUDNORM_I}:TP={CONFIG.LOUDNORM_TP}:LRA={CONFIG.LOUDNORM_LRA}"
+        # Streamed encodes reach the FLAC encoder straight from the filtergraph; the rest via the intermediate WAV
+        chain += (['WAV'] if 'flac' in indirect else []) + ['FLAC']
+        if 'native decimator' in chain:
+            conversion = f"Decimator: native with precision {CONFIG.PRECISION}"
+        else:
+            conversion = f"Resampler: {CONFIG.RESAMPLER} with precision {CONFIG.PRECISION} and cheby"
         comment_content = (
-            f"DSF > WAV > FLAC, Codec: {CONFIG.ACODEC}, "
-            f"Resampler: {CONFIG.RESAMPLER} with precision {CONFIG.PRECISION} and cheby, "
+            f"{' > '.join(chain)}, Codec: {CONFIG.ACODEC}, {conversion}, "
             f"Applied Volume: {applied_volume}, Compression Level: {CONFIG.FLAC_COMPRESSION}"
         )
-        metaflac_cmd = ['metaflac', '--set-tag', f"COMMENT={comment_content}", output_file]
-        _, stderr, rc = run_command(metaflac_cmd)
-        if rc != 0:
-            logger.error(f"Failed to apply COMMENT to {output_file}: {stderr}")
+        # The DSF's own ID3 tags (sacd_extract) fill in whatever ffmpeg did not map
+        carried = {} if input_file in SACD_TRACKS else dsf_id3_tags(input_file)
+        try:
+            verified = tag_flac(flac_file, {'COMMENT': comment_content}, carried)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Failed to apply COMMENT to {flac_file}: {e}")
+            discard_outputs()
             return False
-        logger.debug(f"Applied COMMENT to {output_file}: {comment_content}")
-        verify_cmd = ['metaflac', '--list', '--block-type=VORBIS_COMMENT', output_file]
-        stdout, stderr, rc = run_command(verify_cmd)
-        if rc == 0 and "COMMENT=" in stdout:
-            logger.debug(f"Verified COMMENT in {output_file}: Present")
-        else:
-            logger.error(f"COMMENT not found in {output_file} after application:\n{stdout}\n{stderr}")
+        if not verified:
+            logger.error(f"Tags read back from {flac_file} differ from the ones written")
+            discard_outputs()
             return False
+        logger.debug(f"Applied and verified COMMENT in {flac_file}: {comment_content}")
 
-    if CONFIG.ENABLE_VISUALIZATION:
-        vis_file = normalize_path(os.path.join(spectrogram_dir, f"{base_name}.png"))
-        if CONFIG.VISUALIZATION_TYPE == 'waveform':
-            cmd = ['ffmpeg', '-i', output_file, '-filter_complex', f"showwavespic=s={CONFIG.VISUALIZATION_SIZE}", vis_file, '-y']
-        else:
-            cmd = ['ffmpeg', '-i', output_file, '-lavfi', f"showspectrumpic=s={CONFIG.VISUALIZATION_SIZE}:mode={CONFIG.SPECTROGRAM_MODE}", vis_file, '-y']
-        _, stderr, rc = run_command(cmd)
-        if rc != 0:
-            logger.error(f"Error generating {CONFIG.VISUALIZATION_TYPE} for {output_file}. Check {local_log}")
-            with open(local_log, 'a') as f:
-                f.write(stderr + '\n')
-        else:
-            logger.info(f"Generated {CONFIG.VISUALIZATION_TYPE}: {vis_file}")
+    for fmt, path in output_files.items():
+        file_size_kb = os.path.getsize(path) / 1024
+        os.replace(path, final_files[fmt])
+        SCRATCH.remove(path)
+        logger.info(f"Converted {input_file} -> {final_files[fmt]} (Size: {file_size_kb:.1f} KB)")
+    # Every format holds the same PCM; the first one stands for all in the peak report
+    RESULTS.record(input_file, "Output", {'measured': next(iter(final_files.values()))})
+    if journal:
+        journal.record('encoded', input_file, volume=volume)
+        if 'flac' in output_files:
+            journal.record('tagged', input_file)
+
+    if vis_file:
+        os.replace(partial_path(vis_file), vis_file)
+        SCRATCH.remove(partial_path(vis_file))
+        logger.info(f"Generated {CONFIG.VISUALIZATION_TYPE}: {vis_file}")
+        if journal:
+            journal.record('visualized', input_file)
+
+    return True
 
+def visualization_filter() -> str:
+    if CONFIG.VISUALIZATION_TYPE == 'waveform':
+        return f"showwavespic=s={CONFIG.VISUALIZATION_SIZE}"
+    return f"showspectrumpic=s={CONFIG.VISUALIZATION_SIZE}:mode={CONFIG.SPECTROGRAM_MODE}"
+
+def visualization_path(output_file: str, output_dir: str) -> str:
+    return normalize_path(os.path.join(output_dir, 'spectrogram', f"{Path(output_file).stem}.png"))
+
+def render_visualization(output_file: str, output_dir: str) -> bool:
+    """Render the picture of an existing output (encoded by an earlier run); new encodes render it themselves."""
+    local_log = normalize_path(os.path.join(output_dir, 'log.txt'))
+    vis_file = visualization_path(output_file, output_dir)
+    os.makedirs(os.path.dirname(vis_file), exist_ok=True)
+    partial_file = partial_path(vis_file)
+    cmd = ['ffmpeg', '-i', output_file, '-filter_complex', visualization_filter(), partial_file, '-y']
+    SCRATCH.track(partial_file)
+    _, stderr, rc = run_command(cmd, stage='visualize')
+    if rc != 0:
+        logger.error(f"Error generating {CONFIG.VISUALIZATION_TYPE} for {output_file}. Check {local_log}")
+        with open(local_log, 'a') as f:
+            f.write(stderr + '\n')
+        SCRATCH.remove(partial_file)
+        return False
+    os.replace(partial_file, vis_file)
+    SCRATCH.remove(partial_file)
+    logger.info(f"Generated {CONFIG.VISUALIZATION_TYPE}: {vis_file}")
     return True
 
 # ---------------------------------------------------------------------------
@@ -372,20 +2552,70 @@ def locate_sacd_extract() -> Optional[str]:
 
 def prepare_sacd_cfg() -> str:
     """Create the temporary directory and sacd_extract.cfg required for execution."""
-    os.makedirs(SACD_TEMP_DIR, exist_ok=True)
-    cfg_path = os.path.join(SACD_TEMP_DIR, 'sacd_extract.cfg')
+    sacd_dir = SCRATCH.directory('sacd')
+    cfg_path = os.path.join(sacd_dir, 'sacd_extract.cfg')
     with open(cfg_path, 'w') as f:
         f.write('id3tag=5\n')
     logger.debug(f"Created sacd_extract.cfg at {cfg_path}")
-    return SACD_TEMP_DIR
+    return sacd_dir
+
+def dsf_complete(path: Path, size: int) -> bool:
+    """True once the DSD chunk's total file size matches what is on disk."""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(28)
+    except OSError:
+        return False
+    return len(header) == 28 and header[:4] == b'DSD ' and struct.unpack_from('<Q', header, 12)[0] == size
 
-def extract_iso(iso_path: str, sacd_bin: str, output_dir: Optional[str] = None) -> Optional[str]:
+def run_watched(cmd: List[str], capture_output: bool, cwd: str, watch_dir: str,
+                on_file: Callable[[str], None]) -> Tuple[str, str, int]:
+    """
+    run_command variant for sacd_extract that reports every DSF under
+    watch_dir as soon as it is completely written: its header declares its
+    final size and that size has been stable for one poll interval.
+    """
+    done = SUPERVISOR.start(cmd, capture_output=capture_output, cwd=cwd, stage='extract')
+
+    sizes = {}
+    reported = set()
+    while True:
+        running = not done.done()
+        for dsf in sorted(Path(watch_dir).rglob('*.dsf')):
+            if dsf in reported:
+                continue
+            try:
+                size = dsf.stat().st_size
+            except OSError:
+                continue
+            # After a clean exit every remaining file is final
+            finished = not running and done.result()[2] == 0
+            if finished or (sizes.get(dsf) == size and dsf_complete(dsf, size)):
+                reported.add(dsf)
+                logger.debug(f"DSF ready: {dsf}")
+                on_file(str(dsf))
+            sizes[dsf] = size
+        if not running:
+            break
+        time.sleep(CONFIG.STREAM_POLL_INTERVAL)
+
+    out, err, returncode = done.result()
+    stdout = out.decode(errors='replace') if out else ''
+    stderr = err.decode(errors='replace') if err else ''
+    if returncode != 0:
+        logger.error(f"Command failed with return code {returncode}: {stderr}")
+    return stdout, stderr, returncode
+
+def extract_iso(iso_path: str, sacd_bin: str, output_dir: Optional[str] = None,
+                on_track: Optional[Callable[[str], None]] = None) -> Optional[str]:
     """
     Extract DSFs from a SACD ISO to <base_dir>/<iso_stem>/dsf/.
     The iso_stem (filename without extension) scopes each album to its own
     directory, mirroring the way the original DSF flow derives output dirs
     from the input path — preventing collisions between different albums.
     If output_dir is not provided, uses the ISO's own directory as base.
+    With on_track, each DSF is passed to it as soon as it is completely
+    written, while sacd_extract is still running.
     Returns the dsf/ directory path on success, None on failure.
     """
     iso_path = os.path.abspath(iso_path)
@@ -411,7 +2641,11 @@ def extract_iso(iso_path: str, sacd_bin: str, output_dir: Optional[str] = None)
 
     # In debug mode, let sacd_extract write directly to the terminal
     capture = not logger.isEnabledFor(logging.DEBUG)
-    stdout, stderr, rc = run_command(cmd, capture_output=capture, cwd=cfg_cwd)
+    with profile_scope(album=iso_path):
+        if on_track is None:
+            stdout, stderr, rc = run_command(cmd, capture_output=capture, cwd=cfg_cwd, stage='extract')
+        else:
+            stdout, stderr, rc = run_watched(cmd, capture, cfg_cwd, dsf_dir, on_track)
 
     if rc != 0:
         logger.error(f"sacd_extract failed (rc={rc}):\n{stderr}")
@@ -447,33 +2681,260 @@ def cleanup_dsf_dir(dsf_dir: str):
     except Exception as e:
         logger.error(f"Failed to remove DSF directory {target}: {e}")
 
+# ---------------------------------------------------------------------------
+# Native SACD ISO reader
+# ---------------------------------------------------------------------------
+
+SACD_SECTOR = 2048
+SACD_MASTER_TOC = 510
+SACD_FRAME_RATE = 75
+SACD_AUDIO_PACKET = 2
+# Area/master text character sets (Scarlet Book codes)
+SACD_CHARSETS = {1: 'ascii', 2: 'latin-1', 3: 'shift_jis', 4: 'euc_kr', 5: 'gb2312', 6: 'big5', 7: 'latin-1'}
+SACD_TRACK_TEXT = {0x01: 'title', 0x02: 'artist', 0x03: 'lyricist', 0x04: 'composer'}
+# DSF channel type codes by channel count
+DSF_CHANNEL_TYPES = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 7}
+DSF_BLOCK_SIZE = 4096
+MSB_TO_LSB = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+SACD_TRACKS = {}  # virtual track path -> (SacdIso, track)
+
+def sacd_text(data: bytes, position: int, charset: str) -> str:
+    end = data.find(b'\0', position)
+    raw = data[position:end if end >= 0 else len(data)]
+    return raw.decode(charset, errors='replace').strip()
+
+class SacdIso:
+    """
+    Read-only view of a plain-DSD SACD image. Parses the Master TOC (sector
+    510), the master text and the 2-channel Area TOC with its track lists
+    (SACDTRL1/SACDTRL2) and track text, and serves each track's audio
+    straight from the memory-mapped image. DST-coded discs raise ValueError
+    and are left to sacd_extract.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.parse()
+        except (ValueError, struct.error, IndexError) as e:
+            self.map.close()
+            raise ValueError(str(e)) from e
+
+    def sector(self, lsn: int, count: int = 1) -> bytes:
+        start = lsn * SACD_SECTOR
+        if start + count * SACD_SECTOR > len(self.map):
+            raise ValueError(f"sector {lsn} is beyond the end of the image")
+        return self.map[start:start + count * SACD_SECTOR]
+
+    def parse(self):
+        master = self.sector(SACD_MASTER_TOC)
+        if master[:8] != b'SACDMTOC':
+            raise ValueError("no SACD Master TOC")
+        area_start, = struct.unpack_from('>I', master, 64)
+        area_size, = struct.unpack_from('>H', master, 84)
+        if not area_start or not area_size:
+            raise ValueError("disc has no 2-channel area")
+
+        self.metadata = {}
+        year, = struct.unpack_from('>H', master, 120)
+        if year:
+            self.metadata['date'] = str(year)
+        master_text = self.sector(SACD_MASTER_TOC + 1)
+        if master_text[:8] == b'SACDText':
+            charset = SACD_CHARSETS.get(master[138], 'latin-1')
+            for key, offset in (('album', 16), ('album_artist', 18)):
+                position, = struct.unpack_from('>H', master_text, offset)
+                if position and sacd_text(master_text, position, charset):
+                    self.metadata[key] = sacd_text(master_text, position, charset)
+
+        area = self.sector(area_start, area_size)
+        if area[:8] != b'TWOCHTOC':
+            raise ValueError("no 2-channel Area TOC")
+        if area[21] & 0x0F == 0:
+            raise ValueError("DST-coded disc")
+        if area[20] != 4:
+            raise ValueError(f"unsupported sample frequency code {area[20]}")
+        self.sample_rate = 64 * 44100
+        self.channels = area[32]
+        track_count = area[69]
+        charset = SACD_CHARSETS.get(area[90], 'latin-1')
+
+        starts = lengths = durations = None
+        texts = {}
+        for index in range(1, area_size):
+            sector = area[index * SACD_SECTOR:(index + 1) * SACD_SECTOR]
+            kind = sector[:8]
+            if kind == b'SACDTRL1':
+                starts = struct.unpack_from('>255I', sector, 8)
+                lengths = struct.unpack_from('>255I', sector, 8 + 4 * 255)
+            elif kind == b'SACDTRL2':
+                durations = [(m * 60 + s) * SACD_FRAME_RATE + f
+                             for m, s, f, _ in struct.iter_unpack('>4B', sector[8 + 4 * 255:8 + 8 * 255])]
+            elif kind == b'SACDTTxt' and not texts:
+                # Text positions are relative to this sector and may run into the following ones
+                text_area = area[index * SACD_SECTOR:]
+                for number, position in enumerate(struct.unpack_from(f'>{track_count}H', sector, 8)):
+                    if position:
+                        texts[number] = self.track_text(text_area, position, charset)
+        if starts is None:
+            raise ValueError("missing track list (SACDTRL1)")
+
+        self.tracks = [{'number': i + 1, 'start': starts[i], 'length': lengths[i],
+                        'frames': durations[i] if durations else None, 'metadata': texts.get(i, {})}
+                       for i in range(track_count)]
+
+    @staticmethod
+    def track_text(data: bytes, position: int, charset: str) -> dict:
+        """Track text items: a count, then (type, padding, NUL-terminated string) entries."""
+        fields = {}
+        count = data[position]
+        position += 4
+        for _ in range(count):
+            kind = data[position]
+            position += 2
+            value = sacd_text(data, position, charset)
+            if kind in SACD_TRACK_TEXT and value:
+                fields[SACD_TRACK_TEXT[kind]] = value
+            position = data.find(b'\0', position)
+            while 0 <= position < len(data) and data[position] == 0:
+                position += 1
+            if position < 0 or position >= len(data):
+                break
+        return fields
+
+    def track_packets(self, track: dict) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        (offset, length) of a track's audio packets in the image, from its
+        first frame start, and the byte count of whole frames to play (cut
+        to the SACDTRL2 duration).
+        """
+        frame_bytes = self.sample_rate // 8 // SACD_FRAME_RATE * self.channels
+        packets = []
+        started = False
+        total = 0
+        for lsn in range(track['start'], track['start'] + track['length']):
+            base = lsn * SACD_SECTOR
+            header = self.map[base]
+            if header & 0x80:
+                raise ValueError(f"DST-coded audio in sector {lsn}")
+            frame_infos, packet_infos = (header >> 3) & 7, header & 7
+            offset = base + 1 + 2 * packet_infos + 3 * frame_infos
+            for i in range(packet_infos):
+                info, = struct.unpack_from('>H', self.map, base + 1 + 2 * i)
+                length = info & 0x7FF
+                if (info >> 11) & 7 == SACD_AUDIO_PACKET:
+                    # Audio ahead of the first frame start belongs to the previous track
+                    started = started or bool(info & 0x8000)
+                    if started:
+                        packets.append((offset, length))
+                        total += length
+                offset += length
+        frames = total // frame_bytes
+        if track['frames']:
+            frames = min(frames, track['frames'])
+        return packets, frames * frame_bytes
+
+    def write_dsf(self, track: dict, stream):
+        """
+        Write a track to a binary stream as a DSF: the image's byte-interleaved
+        MSB-first audio regrouped into LSB-first 4096-byte channel blocks.
+        """
+        packets, audio_bytes = self.track_packets(track)
+        channels = self.channels
+        channel_bytes = audio_bytes // channels
+        span = DSF_BLOCK_SIZE * channels
+        data_size = -(-channel_bytes // DSF_BLOCK_SIZE) * span
+        stream.write(b'DSD ' + struct.pack('<QQQ', 28, 28 + 52 + 12 + data_size, 0) +
+                     b'fmt ' + struct.pack('<QIIIIIIQII', 52, 1, 0, DSF_CHANNEL_TYPES.get(channels, 2), channels,
+                                          self.sample_rate, 1, channel_bytes * 8, DSF_BLOCK_SIZE, 0) +
+                     b'data' + struct.pack('<Q', 12 + data_size))
+
+        pending = bytearray()
+        remaining = audio_bytes
+        view = memoryview(self.map)
+        try:
+            for offset, length in packets:
+                length = min(length, remaining)
+                if length <= 0:
+                    break
+                pending += view[offset:offset + length]
+                remaining -= length
+                while len(pending) >= span:
+                    stream.write(self.dsf_block(pending[:span], channels))
+                    del pending[:span]
+            if pending:
+                stream.write(self.dsf_block(pending, channels))
+        finally:
+            view.release()
+
+    @staticmethod
+    def dsf_block(data: bytearray, channels: int) -> bytes:
+        # The last block of each channel is padded with DSD silence
+        return b''.join(bytes(data[c::channels]).translate(MSB_TO_LSB).ljust(DSF_BLOCK_SIZE, bytes([DSD_SILENCE]))
+                        for c in range(channels))
+
+    def register_tracks(self) -> List[str]:
+        """
+        Expose the tracks to the pipeline under virtual paths inside the ISO,
+        named like sacd_extract's files so outputs keep the same names.
+        """
+        files = []
+        for track in self.tracks:
+            title = re.sub(r'[\\/:*?"<>|]', '_', track['metadata'].get('title', '')).strip()
+            name = f"{track['number']:02d} - {title}.dsf" if title else f"{track['number']:02d}.dsf"
+            path = os.path.join(self.path, name)
+            SACD_TRACKS[path] = (self, track)
+            files.append(path)
+        return files
+
+    def close(self):
+        for path in [p for p, (disc, _) in SACD_TRACKS.items() if disc is self]:
+            del SACD_TRACKS[path]
+        self.map.close()
+
+def sacd_metadata_args(input_file: str) -> List[str]:
+    """ffmpeg -metadata options carrying an ISO track's disc and track text."""
+    disc, track = SACD_TRACKS[input_file]
+    tags = dict(disc.metadata, track=f"{track['number']}/{len(disc.tracks)}", **track['metadata'])
+    args = []
+    for key, value in tags.items():
+        args += ['-metadata', f"{key}={value}"]
+    return args
+
+def feed_sacd_track(input_file: str, stream):
+    """Write an ISO track as a DSF stream to an ffmpeg stdin pipe."""
+    disc, track = SACD_TRACKS[input_file]
+    try:
+        disc.write_dsf(track, stream)
+    except BrokenPipeError:
+        logger.debug(f"ffmpeg closed its input early for {input_file}")
+    except Exception as e:
+        logger.error(f"ISO reader failed on {input_file}: {e}")
+    finally:
+        try:
+            stream.close()
+        except BrokenPipeError:
+            pass
+
+def open_sacd_iso(iso_path: str) -> Optional[SacdIso]:
+    try:
+        return SacdIso(iso_path)
+    except (OSError, ValueError) as e:
+        logger.info(f"Native ISO reader skipped for {iso_path} ({e}). Using sacd_extract.")
+        return None
+
 # ---------------------------------------------------------------------------
 
 def cleanup(signum=None, frame=None):
     elapsed_time = int(time.time() - START_TIME)
     logger.info(f"Script interrupted after {elapsed_time} seconds. Cleaning up temporary files...")
-    for temp_file in TEMP_FILES.values():
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-                logger.debug(f"Removed temporary file: {temp_file}")
-            except Exception as e:
-                logger.error(f"Failed to remove {temp_file}: {e}")
-    # Clean up sacd_extract temporary directory
-    if os.path.exists(SACD_TEMP_DIR):
-        try:
-            shutil.rmtree(SACD_TEMP_DIR)
-            logger.debug(f"Removed SACD temp dir: {SACD_TEMP_DIR}")
-        except Exception as e:
-            logger.error(f"Failed to remove SACD temp dir {SACD_TEMP_DIR}: {e}")
-    for dirpath, _, filenames in os.walk('.'):
-        for file in [f for f in filenames if f.endswith('_intermediate.wav')]:
-            file_path = os.path.join(dirpath, file)
-            try:
-                os.remove(file_path)
-                logger.debug(f"Removed intermediate file: {file_path}")
-            except Exception as e:
-                logger.error(f"Failed to remove {file_path}: {e}")
+    # Kill and reap the running ffmpeg/sacd_extract groups first, so nothing writes to the paths removed next
+    SUPERVISOR.shutdown()
+    # Temp WAVs and the sacd_extract dir: exactly the paths handed out by the scratch manager
+    SCRATCH.cleanup()
     if ORIGINAL_TERMINAL_STATE is not None and sys.stdin.isatty():
         sys.stdout.flush()
         sys.stderr.flush()
@@ -481,34 +2942,580 @@ def cleanup(signum=None, frame=None):
     logger.info("Cleanup completed. Exiting.")
     sys.exit(1)
 
-def resolve_path(path_str: str) -> Path:
-    if '/' in path_str or path_str.startswith('./') or path_str.startswith('../'):
-        return Path(path_str)
-    return Path(os.path.join(os.getcwd(), path_str))
+def resolve_path(path_str: str) -> Path:
+    if '/' in path_str or path_str.startswith('./') or path_str.startswith('../'):
+        return Path(path_str)
+    return Path(os.path.join(os.getcwd(), path_str))
+
+# ---------------------------------------------------------------------------
+# Adaptive concurrency (--parallel auto)
+# ---------------------------------------------------------------------------
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def available_memory() -> Optional[int]:
+    """MemAvailable in bytes, or None when /proc/meminfo is unreadable."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def scratch_on_tmpfs() -> bool:
+    """True when SCRATCH_DIR lives in RAM, so temp WAVs compete with the processes for memory."""
+    scratch = os.path.realpath(CONFIG.SCRATCH_DIR)
+    best, fstype = '', ''
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount = fields[1].replace('\\040', ' ')
+                if (scratch == mount or scratch.startswith(mount.rstrip('/') + '/')) and len(mount) > len(best):
+                    best, fstype = mount, fields[2]
+    except OSError:
+        return False
+    return fstype in ('tmpfs', 'ramfs')
+
+def scratch_bytes_per_worker() -> int:
+    """Temp WAV one --volume auto worker may hold: AUTO_TRACK_SECONDS of stereo PCM at CONFIG.AR."""
+    codec = DECODE_ONCE_CODEC if CONFIG.DECODE_ONCE else CONFIG.ACODEC
+    width = int(re.search(r'(\d+)', codec).group(1)) // 8
+    return CONFIG.AUTO_TRACK_SECONDS * int(CONFIG.AR) * 2 * width
+
+def auto_parallel_jobs(uses_scratch: bool) -> int:
+    """
+    Size the worker pool from cores, MemAvailable and free scratch space, and
+    pin ffmpeg's threads so workers x threads does not exceed the cores.
+    """
+    cores = available_cores()
+    # Each worker runs one ffmpeg filtergraph, or ENGINE_THREADS decimator threads with --engine native
+    per_worker_cores = CONFIG.ENGINE_THREADS if CONFIG.ENGINE == 'native' else 1
+    limits = {'cores': max(1, cores // per_worker_cores)}
+
+    scratch = scratch_bytes_per_worker() if uses_scratch else 0
+    memory = available_memory()
+    if memory is not None:
+        per_worker_memory = CONFIG.AUTO_WORKER_MEMORY + (scratch if scratch_on_tmpfs() else 0)
+        limits['memory'] = memory // per_worker_memory
+    if scratch:
+        limits['scratch'] = shutil.disk_usage(CONFIG.SCRATCH_DIR).free // scratch
+
+    workers = max(1, min(limits.values()))
+    CONFIG.FFMPEG_THREADS = max(1, cores // workers)
+    logger.info(f"--parallel auto: {workers} worker(s), ffmpeg -threads {CONFIG.FFMPEG_THREADS} "
+                f"(limits: {', '.join(f'{k} {v}' for k, v in limits.items())})")
+    return workers
+
+def pin_threads(cmd: List[str]) -> List[str]:
+    """Cap an ffmpeg command's decoder and filtergraph threads when --parallel auto sized the pool."""
+    if not CONFIG.FFMPEG_THREADS or not cmd or cmd[0] != 'ffmpeg':
+        return cmd
+    threads = str(CONFIG.FFMPEG_THREADS)
+    return [cmd[0], '-threads', threads, '-filter_threads', threads, '-filter_complex_threads', threads] + cmd[1:]
+
+class LoadGovernor:
+    """
+    Back-off check for the job scheduler under --parallel auto: while the
+    1-minute load average per core or the scratch usage is over its
+    threshold, no new job starts unless nothing is running.
+    """
+
+    def __init__(self, uses_scratch: bool):
+        self.cores = available_cores()
+        self.scratch_needed = scratch_bytes_per_worker() if uses_scratch else 0
+        self.throttled = False
+
+    def __call__(self, running: int) -> bool:
+        if running == 0:
+            return False
+        reasons = []
+        load = os.getloadavg()[0]
+        if load > self.cores * CONFIG.AUTO_MAX_LOAD:
+            reasons.append(f"load average {load:.1f}")
+        if self.scratch_needed:
+            usage = shutil.disk_usage(CONFIG.SCRATCH_DIR)
+            if usage.used / usage.total > CONFIG.AUTO_MAX_SCRATCH_USAGE or usage.free < self.scratch_needed:
+                reasons.append(f"scratch {usage.used / usage.total:.0%} used")
+        throttled = bool(reasons)
+        if throttled != self.throttled:
+            if throttled:
+                logger.info(f"Backing off: {', '.join(reasons)}. Holding new jobs ({running} running)")
+            else:
+                logger.info("Resuming job admission")
+            self.throttled = throttled
+        return throttled
+
+def new_scheduler() -> 'JobScheduler':
+    governor = LoadGovernor(CONFIG.VOLUME == 'auto' or CONFIG.DECODE_ONCE) if CONFIG.PARALLEL_AUTO else None
+    if COORDINATOR:
+        # Encodes only wait on workers here; local CPU work keeps to --parallel
+        return JobScheduler(CONFIG.PARALLEL_JOBS + CONFIG.REMOTE_JOBS, governor,
+                            {'analyze': CONFIG.PARALLEL_JOBS, 'encode': CONFIG.REMOTE_JOBS})
+    return JobScheduler(CONFIG.PARALLEL_JOBS, governor)
+
+# ---------------------------------------------------------------------------
+# Album journal (--resume)
+
+# Where earlier versions kept the journal, inside the output directory
+LEGACY_JOURNAL_FILE = '.puretone-journal.jsonl'
+
+# Output directory -> its album's journal, shared by every group writing there
+JOURNALS: Dict[str, 'AlbumJournal'] = {}
+JOURNALS_LOCK = threading.Lock()
+
+def journal_settings() -> dict:
+    """Everything that changes the converted audio; a journal is only resumed under the same settings."""
+    return {key: getattr(CONFIG, key) for key in (
+        'OUTPUT_FORMATS', 'ACODEC', 'AR', 'VOLUME', 'VOLUME_INCREASE', 'ADDITION', 'HEADROOM_LIMIT',
+        'LOUDNORM_I', 'LOUDNORM_TP', 'LOUDNORM_LRA', 'LOUDNORM_MODE', 'RESAMPLER', 'PRECISION', 'CHEBY',
+        'ENGINE', 'WAVPACK_COMPRESSION', 'FLAC_COMPRESSION')}
+
+def journal_path(output_dir: str) -> str:
+    """The journal of an output directory: CONFIG.JOURNAL_DIR/<album>-<hash of the output path>.jsonl."""
+    output_dir = os.path.abspath(output_dir)
+    digest = hashlib.sha256(output_dir.encode()).hexdigest()[:16]
+    return os.path.join(CONFIG.JOURNAL_DIR, f"{Path(output_dir).parent.name or 'root'}-{digest}.jsonl")
+
+def track_key(input_file: str) -> str:
+    """Tracks are journaled by output stem, so an extracted DSF and its native ISO track match."""
+    return Path(input_file).stem
+
+class AlbumJournal:
+    """
+    Crash-safe record of an album's completed stages, one fsync'ed JSON line
+    per stage in journal_path(output_dir), outside the output directory:
+      album:  extracted (dsf_dir, files), decided (gain per track)
+      track:  analysed (metrics), encoded (volume), tagged, visualized
+    A fresh run truncates it; --resume replays it and skips what is done.
+    A torn last line (crash mid-write) is cut off when the journal is replayed.
+    """
+
+    def __init__(self, output_dir: str, resume: bool = False):
+        self.output_dir = output_dir
+        self.path = journal_path(output_dir)
+        self.lock = threading.Lock()
+        self.album: Dict[str, dict] = {}
+        self.tracks: Dict[str, Dict[str, dict]] = {}
+        settings = journal_settings()
+        os.makedirs(CONFIG.JOURNAL_DIR, exist_ok=True)
+        legacy = os.path.join(output_dir, LEGACY_JOURNAL_FILE)
+        if os.path.exists(legacy):
+            # A journal an earlier version left in the library: take it over (or drop it) and clean up
+            if resume and not os.path.exists(self.path):
+                shutil.move(legacy, self.path)
+            else:
+                os.remove(legacy)
+        if resume and self.replay(settings):
+            logger.info(f"Resuming from {self.path}: {sum(1 for t in self.tracks.values() if 'encoded' in t)} track(s) already encoded")
+            return
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps({'stage': 'settings', 'settings': settings, 'output_dir': os.path.abspath(output_dir)}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def replay(self, settings: dict) -> bool:
+        try:
+            with open(self.path) as f:
+                content = f.read()
+        except OSError:
+            return False
+        lines = content.splitlines()
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+        if not entries or entries[0].get('settings') != settings:
+            logger.warning(f"{self.path} was written with different settings; starting the album over")
+            return False
+        if len(entries) < len(lines) or not content.endswith('\n'):
+            # Drop the torn tail, or the next record would be appended to it and lost with it
+            logger.warning(f"{self.path} ends in a torn line; cutting it off")
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        for entry in entries[1:]:
+            self.apply(entry)
+        return True
+
+    def apply(self, entry: dict):
+        data = {key: value for key, value in entry.items() if key not in ('track', 'stage')}
+        if entry.get('track') is None:
+            self.album[entry['stage']] = data
+        else:
+            self.tracks.setdefault(entry['track'], {})[entry['stage']] = data
+
+    def record(self, stage: str, input_file: Optional[str] = None, **data):
+        entry = dict(data, stage=stage, track=track_key(input_file) if input_file else None)
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.apply(entry)
+
+    def done(self, stage: str, input_file: Optional[str] = None) -> Optional[dict]:
+        with self.lock:
+            stages = self.album if input_file is None else self.tracks.get(track_key(input_file), {})
+            return stages.get(stage)
+
+    def complete(self, files: List[str]) -> bool:
+        """Every file encoded (and visualized, when enabled) and its output still on disk."""
+        needed = ['encoded'] + (['visualized'] if CONFIG.ENABLE_VISUALIZATION else [])
+        return bool(files) and all(self.done(stage, f) is not None for f in files for stage in needed) \
+            and all(os.path.exists(path) for f in files for path in output_paths(f, self.output_dir))
+
+def open_journal(output_dir: str, resume: Optional[bool] = None) -> AlbumJournal:
+    """The album's journal, replayed on first use when resume (default: --resume) is set."""
+    output_dir = os.path.abspath(output_dir)
+    with JOURNALS_LOCK:
+        if output_dir not in JOURNALS:
+            JOURNALS[output_dir] = AlbumJournal(output_dir, CONFIG.RESUME if resume is None else resume)
+        return JOURNALS[output_dir]
+
+def forget_journal(output_dir: str):
+    """Drop a finished album's journal, so the next open reads the file again."""
+    with JOURNALS_LOCK:
+        JOURNALS.pop(os.path.abspath(output_dir), None)
+
+def partial_path(path: str) -> str:
+    """Hidden temp name beside path with the same extension, so ffmpeg picks the same muxer."""
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{stem}.partial{ext}")
+
+# ---------------------------------------------------------------------------
+# Job scheduler
+# ---------------------------------------------------------------------------
+
+class Job:
+    def __init__(self, fn, args: tuple, stage: str, name: str, scratch: Dict[str, int], album: str = ''):
+        self.fn = fn
+        self.args = args
+        self.stage = stage
+        self.name = name
+        self.album = album
+        self.scratch = scratch
+        self.result = None
+        self.done = False
+        self.dependents = []
+        self.waiting = 0
+
+class JobScheduler:
+    """
+    One bounded worker pool draining a DAG of jobs across every album group.
+    A job becomes ready when all of its dependencies have finished; among
+    ready jobs, later pipeline stages run first so finished analyses turn into
+    encodes (and free scratch space) before more analyses start. Jobs may be
+    added while the scheduler is running. limits caps the running jobs of a
+    stage (e.g. local analyses while encodes wait on remote workers).
+    """
+    STAGE_PRIORITY = {'cleanup': 0, 'visualize': 1, 'encode': 2, 'decide': 3, 'analyze': 4}
+
+    def __init__(self, workers: int, throttle: Optional[Callable[[int], bool]] = None,
+                 limits: Optional[Dict[str, int]] = None):
+        self.workers = workers
+        self.throttle = throttle
+        self.limits = limits or {}
+        self.stage_running: Dict[str, int] = {}
+        self.cond = threading.Condition()
+        self.ready = []
+        self.sequence = 0
+        self.unfinished = 0
+        self.album_unfinished: Dict[str, int] = {}
+        self.running = 0
+        self.closed = False
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def add(self, fn, *args, deps: Optional[List[Job]] = None, stage: str = 'encode', name: str = '',
+            scratch: Optional[Dict[str, int]] = None, album: str = '') -> Job:
+        job = Job(fn, args, stage, name, scratch or {}, album)
+        with self.cond:
+            self.unfinished += 1
+            self.album_unfinished[album] = self.album_unfinished.get(album, 0) + 1
+            for dep in deps or []:
+                if not dep.done:
+                    dep.dependents.append(job)
+                    job.waiting += 1
+            if job.waiting == 0:
+                self.push(job)
+        return job
+
+    def push(self, job: Job):
+        self.sequence += 1
+        heapq.heappush(self.ready, (self.STAGE_PRIORITY.get(job.stage, len(self.STAGE_PRIORITY)), self.sequence, job))
+        self.cond.notify()
+
+    def worker(self):
+        while True:
+            with self.cond:
+                while True:
+                    while not self.ready and not self.closed:
+                        self.cond.wait()
+                    if not self.ready:
+                        return
+                    # Throttled: re-check after a pause or when a running job finishes
+                    if self.throttle and self.throttle(self.running):
+                        self.cond.wait(CONFIG.AUTO_BACKOFF_INTERVAL)
+                        continue
+                    entry = self.admit()
+                    if entry is None:
+                        self.cond.wait(CONFIG.AUTO_BACKOFF_INTERVAL)
+                        continue
+                    break
+                self.ready.remove(entry)
+                heapq.heapify(self.ready)
+                job = entry[2]
+                self.running += 1
+                self.stage_running[job.stage] = self.stage_running.get(job.stage, 0) + 1
+            logger.debug(f"Starting {job.stage} job: {job.name}")
+            try:
+                with profile_scope(job.name if job.stage != 'decide' else None, job.album):
+                    job.result = job.fn(*job.args)
+            except Exception as e:
+                logger.error(f"{job.stage.capitalize()} job failed for {job.name}: {e}")
+                job.result = None
+            SCRATCH.settle(job.scratch)
+            with self.cond:
+                job.done = True
+                for dependent in job.dependents:
+                    dependent.waiting -= 1
+                    if dependent.waiting == 0:
+                        self.push(dependent)
+                self.unfinished -= 1
+                self.album_unfinished[job.album] -= 1
+                if not self.album_unfinished[job.album]:
+                    del self.album_unfinished[job.album]
+                self.running -= 1
+                self.stage_running[job.stage] -= 1
+                self.cond.notify_all()
+
+    def admit(self) -> Optional[tuple]:
+        """
+        Highest-priority ready job whose scratch reservation fits the budget.
+        With nothing running the top job is admitted regardless, so an
+        oversized track cannot stall the run.
+        """
+        allowed = [entry for entry in sorted(self.ready)
+                   if self.stage_running.get(entry[2].stage, 0) < self.limits.get(entry[2].stage, self.workers)]
+        for entry in allowed:
+            if SCRATCH.reserve(entry[2].scratch):
+                return entry
+        if self.running == 0 and allowed:
+            entry = allowed[0]
+            logger.warning(f"Scratch budget exceeded; running {entry[2].name} anyway")
+            SCRATCH.reserve(entry[2].scratch, force=True)
+            return entry
+        return None
+
+    def wait(self, album: Optional[str] = None):
+        """Block until every job added so far (and any they add) has finished, or only the album's jobs."""
+        with self.cond:
+            while self.album_unfinished.get(album, 0) if album is not None else self.unfinished:
+                self.cond.wait()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+def output_path(input_file: str, output_dir: str, output_format: Optional[str] = None) -> str:
+    """
+    Where input_file's output in output_format (default: the first --format) goes.
+    output_dir belongs to the first format; the others write to its OUTPUT_DIRS siblings.
+    """
+    output_format = output_format or CONFIG.OUTPUT_FORMAT
+    if output_format != CONFIG.OUTPUT_FORMAT:
+        output_dir = os.path.join(os.path.dirname(output_dir), OUTPUT_DIRS[output_format])
+    return normalize_path(os.path.join(output_dir, f"{Path(input_file).stem}.{FORMAT_EXTENSIONS[output_format]}"))
+
+def output_paths(input_file: str, output_dir: str) -> List[str]:
+    return [output_path(input_file, output_dir, fmt) for fmt in CONFIG.OUTPUT_FORMATS]
+
+def analysis_job(group: dict, input_file: str) -> Optional[dict]:
+    """A track's auto or album-loudness analysis, from the journal when a previous run already measured it."""
+    journal = group['journal']
+    keys = ('input', 'loudness') if group['album_loudness'] else ('dsd', 'wav')
+    stored = journal.done('analysed', input_file)
+    if stored is not None:
+        logger.info(f"Using journaled analysis for {input_file}")
+        return dict({key: stored[key] for key in keys}, file=input_file)
+    track = measure_track_loudness(input_file) if group['album_loudness'] else analyze_track(input_file)
+    if track is not None:
+        journal.record('analysed', input_file, **{key: track[key] for key in keys})
+    return track
+
+def decide_job(group: dict, analysis_jobs: List[Job]) -> dict:
+    """Runs once every analysis job of the group has finished."""
+    decide = decide_album_gain if group['album_loudness'] else calculate_volume_adjustment
+    group['volume_map'], group['volume_data'] = decide([job.result for job in analysis_jobs], group['label'], group['log_file'])
+    journal = group['journal']
+    stored = journal.done('decided')
+    if stored is not None:
+        # Tracks encoded before the interruption used these gains; keep the album consistent
+        group['volume_map'] = [(f, stored['volumes'].get(track_key(f), vol)) for f, vol in group['volume_map']]
+    elif group['volume_map']:
+        journal.record('decided', volumes={track_key(f): vol for f, vol in group['volume_map']})
+    return dict(group['volume_map'])
+
+def encode_job(group: dict, input_file: str, volume: Optional[str], decision: Optional[Job] = None) -> Tuple[bool, Optional[str]]:
+    """Convert one track; returns (success, output path still missing its visualization)."""
+    if decision is not None:
+        volume = (decision.result or {}).get(input_file)
+        if volume is None:
+            release_resampled_pcm(input_file)
+            return False, None
+    output_file = output_path(input_file, group['output_dir'])
+    journal = group['journal']
+    if journal.done('encoded', input_file) and all(os.path.exists(path) for path in output_paths(input_file, group['output_dir'])):
+        logger.info(f"Skipping {input_file}: encoded by a previous run")
+        release_resampled_pcm(input_file)
+        # Still hand the output on if its visualization never finished
+        return True, None if journal.done('visualized', input_file) else output_file
+    # A new encode renders its visualization in the same pass, remotely when coordinating workers
+    if COORDINATOR:
+        return COORDINATOR.convert(group, input_file, volume), None
+    return process_file(input_file, group['output_dir'], volume, group['log_file'], journal=journal), None
+
+def visualize_job(group: dict, encode: Job) -> bool:
+    if not encode.result or not encode.result[1]:
+        return False
+    if not render_visualization(encode.result[1], group['output_dir']):
+        return False
+    group['journal'].record('visualized', encode.name)
+    return True
+
+def open_group(output_dir: str, volume: Optional[str], log_file: Optional[str], label: str = "") -> dict:
+    return {'files': [], 'output_dir': output_dir, 'volume': volume, 'log_file': log_file, 'label': label,
+            'album_loudness': volume is None and CONFIG.LOUDNORM_MODE == 'album',
+            'volume_map': [], 'volume_data': [], 'analysis_jobs': {}, 'encode_jobs': [],
+            'journal': open_journal(output_dir)}
+
+def group_analysed(group: dict) -> bool:
+    """Groups whose gains are decided over all their tracks: --volume auto and --loudnorm album."""
+    return group['volume'] == 'auto' or group['album_loudness']
+
+def schedule_encode(scheduler: JobScheduler, group: dict, input_file: str, decision: Optional[Job] = None):
+    # Encodes that cannot stream into the final format go through an intermediate WAV
+    scratch = {} if can_stream_encode() else {SCRATCH.path(input_file, 'intermediate.wav'): scratch_estimate(input_file, CONFIG.ACODEC)}
+    if CONFIG.SEGMENT_SECONDS and (decision or group['volume']) and not CONFIG.DECODE_ONCE and not COORDINATOR:
+        scratch[SCRATCH.path(input_file, 'segments')] = segment_scratch_estimate(input_file)
+    encode = scheduler.add(encode_job, group, input_file, None if decision else group['volume'], decision,
+                           deps=[decision] if decision else [], stage='encode', name=input_file, scratch=scratch,
+                           album=group_name(group))
+    group['encode_jobs'].append(encode)
+    if CONFIG.ENABLE_VISUALIZATION:
+        scheduler.add(visualize_job, group, encode, deps=[encode], stage='visualize', name=input_file,
+                      album=group_name(group))
+
+def group_name(group: dict) -> str:
+    return group['label'] or group['output_dir']
+
+def add_group_track(scheduler: JobScheduler, group: dict, input_file: str):
+    """Start work on a track as soon as it is available: its analysis (auto, album loudness) or its encode."""
+    group['files'].append(input_file)
+    if group_analysed(group):
+        codec = DECODE_ONCE_CODEC if CONFIG.DECODE_ONCE else CONFIG.ACODEC
+        scratch = {SCRATCH.path(input_file, 'temp.wav'): scratch_estimate(input_file, codec)}
+        # Album loudness only writes a temp WAV to keep it for --decode-once
+        if group['journal'].done('analysed', input_file) is not None or (group['album_loudness'] and not CONFIG.DECODE_ONCE):
+            scratch = {}
+        group['analysis_jobs'][input_file] = scheduler.add(analysis_job, group, input_file, stage='analyze', name=input_file,
+                                                           scratch=scratch, album=group_name(group))
+    else:
+        schedule_encode(scheduler, group, input_file)
+
+def close_group(scheduler: JobScheduler, group: dict, complete: bool = True):
+    """
+    No more tracks will join the group. With --volume auto or --loudnorm album
+    this adds the group gain decision (over every track, in file order) and
+    the encodes that wait for it; an incomplete group gets no decision, since
+    its gains would not be the album's.
+    """
+    group['files'].sort()
+    if not group_analysed(group) or not complete:
+        return
+    analysis_jobs = [group['analysis_jobs'][f] for f in group['files']]
+    decision = scheduler.add(decide_job, group, analysis_jobs, deps=analysis_jobs, stage='decide',
+                             name=group_name(group), album=group_name(group))
+    for input_file in group['files']:
+        schedule_encode(scheduler, group, input_file, decision)
+
+def schedule_group(scheduler: JobScheduler, files: List[str], output_dir: str, volume: Optional[str],
+                   log_file: Optional[str], label: str = "") -> dict:
+    """
+    Add one album group to the DAG: per-track analysis -> group gain decision
+    -> per-track encode -> visualization. Only --volume auto and --loudnorm album
+    have the first two stages; their per-group volume semantics are those of
+    calculate_volume_adjustment and decide_album_gain.
+    """
+    group = open_group(output_dir, volume, log_file, label)
+    for input_file in sorted(files):
+        add_group_track(scheduler, group, input_file)
+    close_group(scheduler, group)
+    return group
 
-def process_files_in_parallel(files: List[str], output_dir: str, volume_map: List[Tuple[str, str]], log_file: Optional[str] = None) -> bool:
-    logger.info(f"Starting parallel processing with {CONFIG.PARALLEL_JOBS} workers for {len(files)} files")
-    with ThreadPoolExecutor(max_workers=CONFIG.PARALLEL_JOBS) as executor:
-        results = []
-        for file, volume in volume_map:
-            results.append(executor.submit(process_file, file, output_dir, volume, log_file))
-        outcomes = [future.result() for future in results]
-    success = all(outcomes)
-    logger.info(f"Completed parallel processing for {len(files)} files. Success: {success}")
+def collect_groups(scheduled: List[dict]) -> bool:
+    """Success flag of finished groups; their measurements are in RESULTS."""
+    total = sum(len(group['files']) for group in scheduled)
+    success = all((not group_analysed(group) or group['volume_map']) and all(job.result and job.result[0] for job in group['encode_jobs'])
+                  for group in scheduled)
+    logger.info(f"Completed parallel processing for {total} files. Success: {success}")
     return success
 
-def print_volume_summary(volume_data: List[dict], volume_maps: List[List[Tuple[str, str]]], log_file: Optional[str] = None):
+def run_groups(groups: List[Tuple[List[str], str, str]], volume: Optional[str],
+               log_file: Optional[str], scheduler: Optional[JobScheduler] = None) -> bool:
+    """
+    Run (files, output_dir, label) groups on one scheduler; returns overall success.
+    A shared scheduler (serve) is left running and only these groups are waited for.
+    """
+    total = sum(len(files) for files, _, _ in groups)
+    logger.info(f"Starting parallel processing with {CONFIG.PARALLEL_JOBS} workers for {total} files in {len(groups)} group(s)")
+    own_scheduler = scheduler is None
+    scheduler = scheduler or new_scheduler()
+    try:
+        scheduled = [schedule_group(scheduler, files, output_dir, volume, log_file, label) for files, output_dir, label in groups]
+        wait_groups(scheduler, scheduled, own_scheduler)
+    finally:
+        if own_scheduler:
+            scheduler.close()
+    return collect_groups(scheduled)
+
+def wait_groups(scheduler: JobScheduler, groups: List[dict], everything: bool):
+    if everything:
+        scheduler.wait()
+        return
+    for group in groups:
+        scheduler.wait(group_name(group))
+
+def print_volume_summary(log_file: Optional[str] = None):
+    volume_data = RESULTS.volume_rows()
     logger.info("\n=== Volume Adjustment Summary ===")
     col_widths = [60, 15, 20, 20]
     logger.info(f"{'File':<60} {'y (dB) ffmpeg':^15} {'WAV Max Volume (dB)':^20} {'Applied Volume (dB)':^20}")
     logger.info("-" * sum(col_widths))
 
-    volume_dict = {}
-    for v_map in volume_maps:
-        volume_dict.update({file: vol for file, vol in v_map})
-
     for entry in volume_data:
-        applied_volume = volume_dict.get(entry['file'], "N/A")
+        applied_volume = entry.get('applied', "N/A")
         logger.info(f"{entry['file'][:58]:<60} {entry['y']:^15.1f} {entry['wav_max_volume']:^20.1f} {applied_volume:^20}")
     logger.info("-" * sum(col_widths))
 
@@ -521,19 +3528,14 @@ def print_volume_summary(volume_data: List[dict], volume_maps: List[List[Tuple[s
             f.write(f"{'File':<60} {'y (dB) ffmpeg':^15} {'WAV Max Volume (dB)':^20} {'Applied Volume (dB)':^20}\n")
             f.write("-" * sum(col_widths) + "\n")
             for entry in volume_data:
-                applied_volume = volume_dict.get(entry['file'], "N/A")
+                applied_volume = entry.get('applied', "N/A")
                 f.write(f"{entry['file'][:58]:<60} {entry['y']:^15.1f} {entry['wav_max_volume']:^20.1f} {applied_volume:^20}\n")
             f.write("-" * sum(col_widths) + "\n")
             if CONFIG.ADDITION != '0dB':
                 f.write(f"Applied additional volume adjustment: {CONFIG.ADDITION}\n")
 
-def process_dsf_directory(dsf_dir: str, args, log_file: Optional[str]) -> bool:
-    """Process a directory of DSF files — used by both the ISO flow and the direct DSF flow."""
-    files = [str(f) for f in Path(dsf_dir).glob('*.dsf')]
-    if not files:
-        logger.error(f"No .dsf files found in {dsf_dir}")
-        return False
-
+def album_output_dir(dsf_dir: str, output_format: str) -> str:
+    """Converted-file directory of an extracted ISO album, a sibling of its dsf/."""
     # Walk up from the actual DSF directory to find the album container:
     # <output_dir>/<iso_stem>/dsf/<album_internal>/  -> actual_dsf_dir  (4 levels)
     # <output_dir>/<iso_stem>/dsf/                   -> dsf_parent
@@ -546,24 +3548,1084 @@ def process_dsf_directory(dsf_dir: str, args, log_file: Optional[str]) -> bool:
     else:
         # dsf_dir is dsf/ itself (no internal album subdir) — go up one level
         album_dir = dsf_parent
-    output_dir = os.path.join(album_dir, OUTPUT_DIRS[args.format])
-    all_volume_data = []
-    all_volume_maps = []
-    success = True
+    return os.path.join(album_dir, OUTPUT_DIRS[output_format])
+
+def finish_iso_album(dsf_dir: str, pending: threading.Semaphore) -> bool:
+    """Remove an album's extracted DSFs once all its encodes are done and free its extraction slot."""
+    try:
+        cleanup_dsf_dir(dsf_dir)
+    finally:
+        pending.release()
+    return True
+
+def close_sacd_iso(disc: SacdIso) -> bool:
+    disc.close()
+    return True
+
+def group_jobs(group: dict) -> List[Job]:
+    """Every job of a closed group that reads its input tracks."""
+    return list(group['analysis_jobs'].values()) + group['encode_jobs']
+
+def iso_album_output(iso: str, output_dir: Optional[str], output_format: str) -> str:
+    """Converted-file directory of an ISO album: <output_dir or the ISO's dir>/<iso_stem>/<format>."""
+    return os.path.join(output_dir or os.path.dirname(iso), Path(iso).stem, OUTPUT_DIRS[output_format])
+
+def process_iso_batch(isos: List[str], sacd_bin: Optional[str], args, log_file: Optional[str],
+                      scheduler: Optional[JobScheduler] = None) -> bool:
+    """
+    Extract and convert a list of ISOs as a pipeline. Extraction (I/O bound)
+    runs on its own --extract-jobs pool; each album is handed to the shared
+    conversion scheduler (--parallel workers) as soon as its extraction ends,
+    so the next ISO is extracted while the current one is converted. At most
+    --extract-jobs + 1 albums sit extracted but unconverted on disk.
+    With --iso-reader native, plain-DSD discs skip extraction: their tracks
+    are read straight from the image and nothing is written to dsf/.
+    """
+    output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+    if CONFIG.EXTRACT_ONLY:
+        with ThreadPoolExecutor(max_workers=CONFIG.EXTRACT_JOBS) as executor:
+            dsf_dirs = list(executor.map(lambda iso: extract_iso(iso, sacd_bin, output_dir), isos))
+        for iso, dsf_dir in zip(isos, dsf_dirs):
+            if dsf_dir is None:
+                logger.error(f"ISO extraction failed: {iso}")
+            else:
+                logger.info(f"--extract-only active. DSFs available at: {dsf_dir}")
+        return all(dsf_dirs)
+
+    logger.info(f"Processing {len(isos)} ISO(s) with {CONFIG.EXTRACT_JOBS} extraction worker(s) and {CONFIG.PARALLEL_JOBS} conversion worker(s)")
+    own_scheduler = scheduler is None
+    scheduler = scheduler or new_scheduler()
+    pending = threading.Semaphore(CONFIG.EXTRACT_JOBS + 1)
+    scheduled = {}
+
+    def album_output(iso: str) -> str:
+        return iso_album_output(iso, output_dir, CONFIG.OUTPUT_FORMAT)
+
+    def extract_and_schedule(index: int, iso: str) -> bool:
+        if CONFIG.ISO_READER == 'native':
+            disc = open_sacd_iso(iso)
+            if disc is not None:
+                return schedule_native(index, iso, disc)
+        if sacd_bin is None:
+            logger.error(f"sacd_extract not found; cannot extract {iso}")
+            return False
+        journal = open_journal(album_output(iso))
+        extracted = journal.done('extracted')
+        if extracted and journal.complete(extracted['files']):
+            logger.info(f"Skipping {iso}: all tracks were converted by a previous run")
+            return True
+        pending.acquire()
+        if extracted and all(os.path.exists(f) and dsf_complete(f, os.path.getsize(f)) for f in extracted['files']):
+            # Interrupted after extraction: the DSFs on disk are complete, only convert what is left
+            logger.info(f"Using DSFs extracted by a previous run: {extracted['dsf_dir']}")
+            dsf_dir, files = extracted['dsf_dir'], extracted['files']
+        elif CONFIG.STREAM_EXTRACT:
+            return extract_streaming(index, iso)
+        else:
+            dsf_dir = extract_iso(iso, sacd_bin, output_dir)
+            files = [str(f) for f in Path(dsf_dir).glob('*.dsf')] if dsf_dir else []
+            if not files:
+                logger.error(f"ISO extraction failed: {iso}")
+                pending.release()
+                return False
+            journal.record('extracted', dsf_dir=dsf_dir, files=sorted(files))
+        group = schedule_group(scheduler, files, album_output_dir(dsf_dir, CONFIG.OUTPUT_FORMAT), args.volume, log_file, iso)
+        scheduler.add(finish_iso_album, dsf_dir, pending, deps=group['encode_jobs'], stage='cleanup', name=dsf_dir,
+                      album=group_name(group))
+        scheduled[index] = group
+        return True
+
+    def extract_streaming(index: int, iso: str) -> bool:
+        # The group opens with the first finished DSF, whose parent is the album's dsf dir
+        state = {}
+
+        def on_track(dsf: str):
+            if 'group' not in state:
+                state['dsf_dir'] = os.path.dirname(dsf)
+                state['group'] = open_group(album_output_dir(state['dsf_dir'], CONFIG.OUTPUT_FORMAT), args.volume, log_file, iso)
+            add_group_track(scheduler, state['group'], dsf)
+
+        dsf_dir = extract_iso(iso, sacd_bin, output_dir, on_track=on_track)
+        group = state.get('group')
+        if group is None:
+            logger.error(f"ISO extraction failed: {iso}")
+            pending.release()
+            return False
+        close_group(scheduler, group, complete=dsf_dir is not None)
+        if dsf_dir is not None:
+            group['journal'].record('extracted', dsf_dir=state['dsf_dir'], files=group['files'])
+        # Every job of the group exists now; the DSFs go once all of them are done
+        scheduler.add(finish_iso_album, state['dsf_dir'], pending, deps=group_jobs(group), stage='cleanup', name=state['dsf_dir'],
+                      album=group_name(group))
+        scheduled[index] = group
+        if dsf_dir is None:
+            logger.error(f"ISO extraction failed: {iso}")
+        return dsf_dir is not None
+
+    def schedule_native(index: int, iso: str, disc: SacdIso) -> bool:
+        files = disc.register_tracks()
+        if not files:
+            logger.error(f"No 2-channel tracks found in {iso}")
+            disc.close()
+            return False
+        if open_journal(album_output(iso)).complete(files):
+            logger.info(f"Skipping {iso}: all tracks were converted by a previous run")
+            disc.close()
+            return True
+        logger.info(f"Reading {len(files)} track(s) directly from {iso}")
+        group = schedule_group(scheduler, files, album_output(iso), args.volume, log_file, iso)
+        scheduler.add(close_sacd_iso, disc, deps=group_jobs(group), stage='cleanup', name=iso, album=group_name(group))
+        scheduled[index] = group
+        return True
+
+    try:
+        with ThreadPoolExecutor(max_workers=CONFIG.EXTRACT_JOBS) as executor:
+            extracted = list(executor.map(extract_and_schedule, range(len(isos)), isos))
+        wait_groups(scheduler, list(scheduled.values()), own_scheduler)
+    finally:
+        if own_scheduler:
+            scheduler.close()
+    return collect_groups([scheduled[i] for i in sorted(scheduled)]) and all(extracted)
+
+def directory_groups(abs_path: Path, output_format: str) -> List[Tuple[List[str], str, str]]:
+    """(files, output_dir, label) groups of a DSF directory: its own DSFs and each subdirectory with DSFs."""
+    files = [str(f) for f in abs_path.glob('*.dsf')]
+    subdirs = [d for d in abs_path.iterdir() if d.is_dir() and any(f.suffix == '.dsf' for f in d.glob('*.dsf'))]
+
+    # Root group and every subdirectory group share one scheduler, so one
+    # album's analysis overlaps another's encodes
+    groups = []
+    if files:
+        logger.info(f"Processing directory: {abs_path}")
+        groups.append((files, str(abs_path / OUTPUT_DIRS[output_format]), ""))
+    if subdirs:
+        logger.info(f"Processing subdirectories in {abs_path}: {', '.join(d.name for d in subdirs)}")
+        for subdir in subdirs:
+            subdir_files = [str(f) for f in subdir.glob('*.dsf')]
+            groups.append((subdir_files, str(subdir / OUTPUT_DIRS[output_format]), str(subdir)))
+    return groups
+
+def list_isos(paths: List[Path]) -> Optional[List[str]]:
+    """ISO inputs named directly or found at the top level of directories; None when the paths are not an ISO batch."""
+    isos = []
+    for path in paths:
+        if path.is_file() and path.suffix.lower() == '.iso':
+            isos.append(str(path.resolve()))
+        elif path.is_dir():
+            found = sorted(str(f.resolve()) for f in path.iterdir() if f.is_file() and f.suffix.lower() == '.iso')
+            if not found:
+                return None
+            isos.extend(found)
+        else:
+            return None
+    return isos
+
+# ---------------------------------------------------------------------------
+# Watch-folder daemon (puretone serve)
+# ---------------------------------------------------------------------------
+
+# inotify(7) event bits
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+INBOX_EVENTS = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Finished entries kept in the queue file for `serve --status`
+SERVE_HISTORY = 200
+
+def inbox_ignored(name: str) -> bool:
+    """Output, extraction and hidden (.partial) entries PureTone itself writes inside an inbox."""
+    return name.startswith('.') or name in OUTPUT_DIRS.values()
+
+def album_kind(path: str) -> Optional[str]:
+    """'iso' (an image or a directory of images), 'dsf' (a loose track), 'dir' (a DSF album) or None."""
+    entry = Path(path)
+    if entry.is_file():
+        return {'.iso': 'iso', '.dsf': 'dsf'}.get(entry.suffix.lower())
+    if not entry.is_dir():
+        return None
+    if any(entry.glob('*.dsf')) or any(sub.is_dir() and not inbox_ignored(sub.name) and any(sub.glob('*.dsf'))
+                                       for sub in entry.iterdir()):
+        return 'dir'
+    if any(f.suffix.lower() == '.iso' for f in entry.iterdir() if f.is_file()):
+        return 'iso'
+    return None
 
-    if args.volume == 'auto':
-        volume_map, volume_data = calculate_volume_adjustment(files, dsf_dir, log_file)
-        all_volume_data.extend(volume_data)
-        all_volume_maps.append(volume_map)
-        success = process_files_in_parallel(files, output_dir, volume_map, log_file)
+def album_inputs(path: str) -> List[str]:
+    """Every input file of an inbox entry: the files PureTone would read for it."""
+    entry = Path(path)
+    if entry.is_file():
+        return [str(entry)]
+    files = [f for f in entry.iterdir() if f.is_file() and f.suffix.lower() in ('.dsf', '.iso')]
+    for sub in entry.iterdir():
+        if sub.is_dir() and not inbox_ignored(sub.name):
+            files.extend(sub.glob('*.dsf'))
+    return sorted(str(f) for f in files)
+
+def album_signature(path: str) -> Optional[str]:
+    """Digest of the entry's input names, sizes and mtimes; None while it has no inputs."""
+    digest = hashlib.sha1()
+    files = album_inputs(path)
+    for file in files:
+        try:
+            st = os.stat(file)
+        except OSError:
+            return None
+        digest.update(f"{file}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest() if files else None
+
+def album_copied(path: str) -> bool:
+    """Every DSF's header size matches the file and every ISO is whole sectors."""
+    for file in album_inputs(path):
+        size = os.path.getsize(file)
+        if file.lower().endswith('.dsf') and not dsf_complete(file, size):
+            return False
+        if file.lower().endswith('.iso') and (size == 0 or size % SACD_SECTOR):
+            return False
+    return True
+
+class InboxWatcher:
+    """
+    inotify watches on the inbox directories and every subdirectory below
+    them (new ones are added as they appear). poll() returns the top-level
+    inbox entries that changed. Without inotify (non-Linux) it only sleeps
+    and the caller's periodic rescan finds new entries.
+    """
+
+    def __init__(self, inboxes: List[str]):
+        self.inboxes = inboxes
+        self.watches: Dict[int, str] = {}
+        self.fd = None
+        try:
+            import ctypes
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            fd = -1
+        if fd < 0:
+            logger.warning("inotify unavailable; new albums are found by rescanning the inboxes")
+            return
+        self.fd = fd
+        for inbox in inboxes:
+            self.watch_tree(inbox)
+
+    def watch_tree(self, directory: str):
+        for root, dirs, _ in os.walk(directory):
+            dirs[:] = [d for d in dirs if not inbox_ignored(d)]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), INBOX_EVENTS)
+            if wd >= 0:
+                self.watches[wd] = root
+
+    def top_level(self, path: str) -> Optional[str]:
+        for inbox in self.inboxes:
+            relative = os.path.relpath(path, inbox)
+            if relative == '.' or relative.startswith('..'):
+                continue
+            parts = Path(relative).parts
+            if any(inbox_ignored(part) for part in parts):
+                return None
+            return os.path.join(inbox, parts[0])
+        return None
+
+    def poll(self, timeout: float) -> Tuple[set, bool]:
+        """(changed top-level entries, whether events were lost and a full rescan is needed)."""
+        if self.fd is None:
+            time.sleep(timeout)
+            return set(), False
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set(), False
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set(), False
+        changed = set()
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b'\0')
+            offset += INOTIFY_EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if wd not in self.watches:
+                continue
+            path = os.path.join(self.watches[wd], os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and not inbox_ignored(os.path.basename(path)):
+                self.watch_tree(path)
+            top = self.top_level(path)
+            if top is not None:
+                changed.add(top)
+        return changed, overflow
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+
+class WorkQueue:
+    """
+    Persistent album queue (JSON, replaced atomically on every change).
+    Entries move queued -> running -> done/failed; entries still running
+    when the daemon stopped are queued again on start and resumed from
+    their album journals.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.cond = threading.Condition()
+        self.stopped = False
+        self.entries: List[dict] = []
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)['entries']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable queue file {path}: {e}")
+        for entry in self.entries:
+            if entry['state'] == 'running':
+                entry.update(state='queued', resume=True)
+                logger.info(f"Resuming interrupted album: {entry['path']}")
+        self.save()
+
+    def save(self):
+        finished = [e for e in self.entries if e['state'] in ('done', 'failed')]
+        for entry in finished[:max(0, len(finished) - SERVE_HISTORY)]:
+            self.entries.remove(entry)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'entries': self.entries}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def add(self, path: str, kind: str, signature: str) -> bool:
+        """Queue an album unless it is already pending or was processed with these exact inputs."""
+        with self.cond:
+            for entry in self.entries:
+                if entry['path'] != path:
+                    continue
+                if entry['state'] in ('queued', 'running') or entry['signature'] == signature:
+                    return False
+            self.entries.append({'path': path, 'kind': kind, 'signature': signature, 'state': 'queued',
+                                 'resume': False, 'added': time.time(), 'started': None, 'finished': None})
+            self.save()
+            self.cond.notify()
+        logger.info(f"Queued {kind} album: {path}")
+        return True
+
+    def take(self) -> Optional[dict]:
+        """Block for the oldest queued entry and mark it running; None once stopped."""
+        with self.cond:
+            while not self.stopped:
+                entry = next((e for e in self.entries if e['state'] == 'queued'), None)
+                if entry is not None:
+                    entry.update(state='running', started=time.time())
+                    self.save()
+                    return entry
+                self.cond.wait()
+            return None
+
+    def finish(self, entry: dict, success: bool):
+        with self.cond:
+            entry.update(state='done' if success else 'failed', finished=time.time())
+            self.save()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+    def snapshot(self) -> List[dict]:
+        with self.cond:
+            return [dict(entry) for entry in self.entries]
+
+def process_album(entry: dict, scheduler: JobScheduler, sacd_bin: Optional[str], args, log_file: Optional[str]) -> bool:
+    """Convert one inbox entry on the daemon's shared scheduler."""
+    path = Path(entry['path'])
+    if album_kind(entry['path']) != entry['kind']:
+        logger.error(f"{path} is gone or changed type since it was queued")
+        return False
+    if entry['kind'] == 'iso':
+        isos = list_isos([path]) or []
+        output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+        outputs = [iso_album_output(iso, output_dir, CONFIG.OUTPUT_FORMAT) for iso in isos]
     else:
-        volume_map = [(f, args.volume) for f in files]
-        success = process_files_in_parallel(files, output_dir, volume_map, log_file)
+        groups = directory_groups(path, CONFIG.OUTPUT_FORMAT) if entry['kind'] == 'dir' else \
+            [([str(path)], os.path.join(path.parent, OUTPUT_DIRS[CONFIG.OUTPUT_FORMAT]), "")]
+        outputs = [output for _, output, _ in groups]
+    # Interrupted entries continue from their journals; new ones start them over
+    for output in outputs:
+        open_journal(output, resume=entry['resume'])
+    try:
+        if entry['kind'] == 'iso':
+            return process_iso_batch(isos, sacd_bin, args, log_file, scheduler)
+        return run_groups(groups, args.volume, log_file, scheduler)
+    finally:
+        for output in outputs:
+            forget_journal(output)
 
-    if all_volume_data and args.volume == 'auto':
-        print_volume_summary(all_volume_data, all_volume_maps, log_file)
+def album_roots(entry: dict, args) -> List[str]:
+    """Directories holding an inbox entry's inputs: the entry itself, plus the album dirs ISOs are extracted to."""
+    roots = [entry['path']]
+    if entry['kind'] == 'iso':
+        output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
+        roots += [os.path.dirname(iso_album_output(iso, output_dir, CONFIG.OUTPUT_FORMAT)) for iso in list_isos([Path(entry['path'])]) or []]
+    return roots
 
-    return success
+def serve_status(socket_path: str) -> dict:
+    """Ask a running daemon for its status."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        data = b''
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+def serve(inboxes: List[str], args, sacd_bin: Optional[str], log_file: Optional[str], results_file: Optional[str]):
+    """
+    Watch-folder daemon: albums copied into the inboxes are queued once they
+    have been quiet for --settle seconds and are complete on disk, then
+    converted on one long-lived scheduler, CONFIG.SERVE_ALBUMS at a time so
+    one album's analysis overlaps another's encodes. The queue survives
+    restarts; a status snapshot is served as JSON on a Unix socket.
+    """
+    queue = WorkQueue(os.path.join(CONFIG.SERVE_STATE_DIR, 'queue.json'))
+    scheduler = new_scheduler()
+    watcher = InboxWatcher(inboxes)
+    settling: Dict[str, Tuple[Optional[str], float]] = {}
+    settling_lock = threading.Lock()
+    started = time.time()
+
+    def status() -> dict:
+        with scheduler.cond:
+            jobs = {'running': scheduler.running, 'ready': len(scheduler.ready), 'unfinished': scheduler.unfinished,
+                    'albums': dict(scheduler.album_unfinished)}
+        with settling_lock:
+            waiting = sorted(settling)
+        return {'pid': os.getpid(), 'uptime': int(time.time() - started), 'inboxes': inboxes,
+                'workers': CONFIG.PARALLEL_JOBS, 'jobs': jobs, 'settling': waiting, 'queue': queue.snapshot()}
+
+    class StatusHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            self.request.sendall(json.dumps(status(), indent=2).encode() + b'\n')
+
+    if os.path.exists(CONFIG.SERVE_SOCKET):
+        try:
+            serve_status(CONFIG.SERVE_SOCKET)
+            logger.error(f"Another PureTone daemon is listening on {CONFIG.SERVE_SOCKET}")
+            sys.exit(1)
+        except (OSError, ValueError):
+            os.unlink(CONFIG.SERVE_SOCKET)
+    os.makedirs(os.path.dirname(CONFIG.SERVE_SOCKET), exist_ok=True)
+    server = socketserver.ThreadingUnixStreamServer(CONFIG.SERVE_SOCKET, StatusHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop(signum=None, frame=None):
+        queue.stop()
+        server.server_close()
+        try:
+            os.unlink(CONFIG.SERVE_SOCKET)
+        except OSError:
+            pass
+        cleanup(signum, frame)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    def dispatcher():
+        while True:
+            entry = queue.take()
+            if entry is None:
+                return
+            logger.info(f"Converting {entry['path']}")
+            try:
+                success = process_album(entry, scheduler, sacd_bin, args, log_file)
+            except Exception as e:
+                logger.error(f"Album failed: {entry['path']}: {e}")
+                success = False
+            queue.finish(entry, success)
+            logger.info(f"{'Finished' if success else 'Failed'}: {entry['path']}")
+            if results_file:
+                # The album's measurements join the file's history and leave memory
+                try:
+                    RESULTS.write(results_file, RESULTS.take_under(album_roots(entry, args)), merge=True)
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to write results to {results_file}: {e}")
+            if PROFILER:
+                try:
+                    PROFILER.write(args.profile, args.profile_prometheus)
+                except OSError as e:
+                    logger.error(f"Failed to write profile: {e}")
+
+    for _ in range(CONFIG.SERVE_ALBUMS):
+        threading.Thread(target=dispatcher, daemon=True).start()
+
+    def rescan():
+        for inbox in inboxes:
+            for name in os.listdir(inbox):
+                if not inbox_ignored(name):
+                    track_change(os.path.join(inbox, name))
+
+    def track_change(path: str):
+        with settling_lock:
+            settling[path] = (None, time.monotonic())
+
+    logger.info(f"Watching {', '.join(inboxes)}; status on {CONFIG.SERVE_SOCKET}")
+    rescan()
+    last_scan = time.monotonic()
+    while True:
+        changed, overflow = watcher.poll(1.0)
+        for path in changed:
+            track_change(path)
+        # Lost events, or no inotify at all: look at everything again now and then
+        if overflow or (watcher.fd is None and time.monotonic() - last_scan >= CONFIG.SERVE_SETTLE):
+            rescan()
+            last_scan = time.monotonic()
+        now = time.monotonic()
+        with settling_lock:
+            candidates = list(settling.items())
+        for path, (signature, since) in candidates:
+            if path in changed:
+                continue
+            kind = album_kind(path)
+            current = album_signature(path) if kind else None
+            if current is None:
+                # Gone, or nothing convertible (yet); the next event brings it back
+                with settling_lock:
+                    settling.pop(path, None)
+                continue
+            if current != signature:
+                with settling_lock:
+                    settling[path] = (current, now)
+                continue
+            if now - since < CONFIG.SERVE_SETTLE or not album_copied(path):
+                continue
+            with settling_lock:
+                settling.pop(path, None)
+            queue.add(path, kind, current)
+
+# ---------------------------------------------------------------------------
+# Distributed conversion (--coordinator / puretone worker)
+# ---------------------------------------------------------------------------
+
+REMOTE_PROTOCOL = 3
+REMOTE_CHUNK = 1024 * 1024
+
+# Settings a worker takes from every job on top of journal_settings()
+REMOTE_SETTINGS = ('OUTPUT_FORMAT', 'ENABLE_VISUALIZATION', 'VISUALIZATION_TYPE', 'VISUALIZATION_SIZE',
+                   'SPECTROGRAM_MODE', 'METER')
+
+# Worker: ffmpeg -metadata options of ISO tracks received as bare DSF streams, keyed by the
+# slot-private path each one is fetched to (see run_remote_job), so no two jobs share an entry
+SHIPPED_METADATA: Dict[str, List[str]] = {}
+
+def parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    try:
+        return host, int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be [HOST:]PORT")
+
+def remote_settings() -> dict:
+    settings = journal_settings()
+    settings.update({key: getattr(CONFIG, key) for key in REMOTE_SETTINGS})
+    return settings
+
+def job_settings(settings: dict) -> dict:
+    """Worker: a job's settings snapshot, only the keys remote_settings() sends."""
+    allowed = set(journal_settings()) | set(REMOTE_SETTINGS)
+    for key in settings.keys() - allowed:
+        logger.warning(f"Ignoring setting {key!r} sent by the coordinator")
+    return {key: value for key, value in settings.items() if key in allowed}
+
+class RemoteSettings:
+    """
+    Worker: CONFIG is process-global and process_file reads it throughout an
+    encode, so the slots only run jobs under one settings snapshot at a time.
+    A job whose settings differ from those of the jobs running (another
+    coordinator's) is refused, and its coordinator hands it out again later.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.settings = None
+        self.running = 0
+
+    def acquire(self, settings: dict) -> bool:
+        with self.lock:
+            if self.running and settings != self.settings:
+                return False
+            if not self.running:
+                for key, value in settings.items():
+                    setattr(CONFIG, key, value)
+                self.settings = settings
+            self.running += 1
+            return True
+
+    def release(self):
+        with self.lock:
+            self.running -= 1
+
+REMOTE_SETTINGS_IN_USE = RemoteSettings()
+
+def is_loopback(host: str) -> bool:
+    return host == 'localhost' or host.startswith('127.') or host == '::1'
+
+def remote_proof(nonce: str) -> Optional[str]:
+    """HMAC of a peer's challenge under CONFIG.REMOTE_TOKEN, or None without a token."""
+    if not CONFIG.REMOTE_TOKEN:
+        return None
+    return hmac.new(CONFIG.REMOTE_TOKEN.encode(), nonce.encode(), hashlib.sha256).hexdigest()
+
+def proof_valid(nonce: str, proof) -> bool:
+    expected = remote_proof(nonce)
+    return expected is None or (isinstance(proof, str) and hmac.compare_digest(expected, proof))
+
+class RemoteError(Exception):
+    """A worker connection closed, timed out or delivered corrupt data."""
+
+class ChecksumError(RemoteError):
+    pass
+
+class WorkerBusy(RemoteError):
+    """A worker refused a track while it runs another coordinator's tracks under different settings."""
+
+class Channel:
+    """
+    One TCP connection carrying JSON-line messages. A message may be followed
+    by raw file payloads, whose SHA-256 digests trail in a 'checksum' message.
+    'alive' heartbeats are skipped on receipt.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.reader = sock.makefile('rb')
+        self.lock = threading.Lock()
+
+    def send(self, message: dict):
+        with self.lock:
+            self.sock.sendall(json.dumps(message).encode() + b'\n')
+
+    def send_files(self, message: dict, paths: List[str]):
+        """message, the files' bytes and their checksums, without a heartbeat slipping in between."""
+        with self.lock:
+            self.sock.sendall(json.dumps(message).encode() + b'\n')
+            digests = []
+            for path in paths:
+                digest = hashlib.sha256()
+                with open(path, 'rb') as f:
+                    while True:
+                        chunk = f.read(REMOTE_CHUNK)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        self.sock.sendall(chunk)
+                digests.append(digest.hexdigest())
+            self.sock.sendall(json.dumps({'type': 'checksum', 'sha256': digests}).encode() + b'\n')
+
+    def receive(self) -> dict:
+        while True:
+            line = self.reader.readline()
+            if not line:
+                raise RemoteError("connection closed")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                raise RemoteError("malformed message")
+            if message.get('type') != 'alive':
+                return message
+
+    def receive_files(self, paths: List[str], sizes: List[int]):
+        """Write the payloads that follow to paths and check them against the trailing checksums."""
+        digests = []
+        for path, size in zip(paths, sizes):
+            digest = hashlib.sha256()
+            with open(path, 'wb') as f:
+                while size:
+                    chunk = self.reader.read(min(size, REMOTE_CHUNK))
+                    if not chunk:
+                        raise RemoteError("connection closed mid-transfer")
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size -= len(chunk)
+            digests.append(digest.hexdigest())
+        trailer = self.receive()
+        if trailer.get('type') != 'checksum':
+            raise RemoteError("missing checksums")
+        if trailer.get('sha256') != digests:
+            raise ChecksumError("checksum mismatch")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+def keep_alive(sock: socket.socket):
+    """Notice a peer that vanished without closing the connection within about a minute."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (('TCP_KEEPIDLE', 30), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3)):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+class Coordinator:
+    """
+    Hands encodes to `puretone worker` processes over TCP while analyses and
+    group gain decisions stay local. Each worker connection runs one track at
+    a time: the coordinator sends the track (a path the worker reads from
+    shared storage when it finds the same file there, its bytes otherwise),
+    the decided gain and a settings snapshot; the worker runs process_file and
+    streams every output back with SHA-256 checksums. A track whose worker
+    disconnects, stays silent for REMOTE_TIMEOUT or sends corrupt data is
+    re-queued, up to REMOTE_ATTEMPTS times.
+    """
+
+    def __init__(self, address: Tuple[str, int]):
+        self.cond = threading.Condition()
+        self.pending = deque()
+        self.closed = False
+        coordinator = self
+
+        class WorkerHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                coordinator.serve_worker(self.request, f"{self.client_address[0]}:{self.client_address[1]}")
+
+        class WorkerServer(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = WorkerServer(address, WorkerHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        logger.info(f"Coordinator waiting for workers on {host}:{port}")
+
+    def convert(self, group: dict, input_file: str, volume: Optional[str]) -> bool:
+        """process_file on a worker: blocks until the outputs are in place or the track has failed."""
+        output_dir = group['output_dir']
+        if CONFIG.SKIP_EXISTING and all(os.path.exists(path) for path in output_paths(input_file, output_dir)):
+            logger.info(f"Skipping {input_file}: outputs already exist (--skip-existing enabled)")
+            return True
+        job = {'group': group, 'input_file': input_file, 'volume': volume, 'attempts': 0,
+               'done': threading.Event(), 'success': False}
+        with self.cond:
+            self.pending.append(job)
+            self.cond.notify()
+        job['done'].wait()
+        return job['success']
+
+    def take(self) -> Optional[dict]:
+        with self.cond:
+            while not self.pending and not self.closed:
+                self.cond.wait()
+            return self.pending.popleft() if self.pending else None
+
+    def finish(self, job: dict, success: bool):
+        job['success'] = success
+        job['done'].set()
+
+    def requeue(self, job: dict, worker: str, reason: str, attempt: bool = True):
+        if not attempt:
+            logger.debug(f"Worker {worker} is busy with other settings; re-queueing {job['input_file']}")
+            with self.cond:
+                self.pending.appendleft(job)
+                self.cond.notify()
+            return
+        job['attempts'] += 1
+        if job['attempts'] >= CONFIG.REMOTE_ATTEMPTS:
+            logger.error(f"Giving up on {job['input_file']} after {job['attempts']} attempts (last on {worker}: {reason})")
+            self.finish(job, False)
+            return
+        logger.warning(f"Worker {worker} failed on {job['input_file']} ({reason}); re-queueing it")
+        with self.cond:
+            self.pending.appendleft(job)
+            self.cond.notify()
+
+    def serve_worker(self, sock: socket.socket, worker: str):
+        keep_alive(sock)
+        sock.settimeout(CONFIG.REMOTE_TIMEOUT)
+        channel = Channel(sock)
+        nonce = os.urandom(16).hex()
+        try:
+            channel.send({'type': 'challenge', 'protocol': REMOTE_PROTOCOL, 'nonce': nonce})
+            hello = channel.receive()
+            if hello.get('type') != 'ready' or hello.get('protocol') != REMOTE_PROTOCOL:
+                logger.error(f"Rejected {worker}: not a PureTone worker speaking protocol {REMOTE_PROTOCOL}")
+                channel.close()
+                return
+            if not proof_valid(nonce, hello.get('proof')):
+                logger.error(f"Rejected {worker}: wrong or missing remote token")
+                channel.send({'type': 'rejected', 'error': "wrong or missing remote token"})
+                channel.close()
+                return
+            # Prove the token back, so workers do not convert for (and send files to) an impostor
+            channel.send({'type': 'welcome', 'proof': remote_proof(str(hello.get('nonce')))})
+        except (OSError, RemoteError):
+            channel.close()
+            return
+        worker = f"{hello.get('host')} ({worker})"
+        logger.info(f"Worker connected: {worker}")
+        try:
+            while True:
+                job = self.take()
+                if job is None:
+                    channel.send({'type': 'done'})
+                    return
+                try:
+                    self.finish(job, self.run(channel, job, worker))
+                except WorkerBusy as e:
+                    # Give the track to another slot and let this worker finish the other run's tracks first
+                    self.requeue(job, worker, str(e), attempt=False)
+                    time.sleep(CONFIG.REMOTE_RETRY_INTERVAL)
+                except (OSError, RemoteError) as e:
+                    self.requeue(job, worker, str(e) or type(e).__name__)
+                    logger.info(f"Worker disconnected: {worker}")
+                    return
+        except OSError:
+            pass
+        finally:
+            channel.close()
+
+    def run(self, channel: Channel, job: dict, worker: str) -> bool:
+        """One track on one worker. RemoteError/OSError mean the worker is lost and the track goes back to the queue."""
+        input_file, group = job['input_file'], job['group']
+        output_dir = group['output_dir']
+        local_log = normalize_path(os.path.join(output_dir, 'log.txt'))
+        # ISO tracks exist only inside the image; ship them as the DSF stream ffmpeg would have read
+        source = input_file
+        if input_file in SACD_TRACKS:
+            source = SCRATCH.path(input_file, 'remote.dsf')
+            SCRATCH.track(source)
+            disc, track = SACD_TRACKS[input_file]
+            with open(source, 'wb') as f:
+                disc.write_dsf(track, f)
+        try:
+            st = os.stat(source)
+            channel.send({'type': 'job', 'path': input_file, 'name': os.path.basename(input_file),
+                          'size': st.st_size, 'mtime': int(st.st_mtime), 'volume': job['volume'],
+                          'settings': remote_settings(),
+                          'metadata': sacd_metadata_args(input_file) if input_file in SACD_TRACKS else []})
+            reply = channel.receive()
+            if reply.get('type') == 'fetch':
+                channel.send_files({'type': 'input'}, [source])
+                reply = channel.receive()
+        finally:
+            if source != input_file:
+                SCRATCH.remove(source)
+        if reply.get('type') != 'result':
+            raise RemoteError(f"unexpected '{reply.get('type')}' message")
+        if not reply.get('ok'):
+            if reply.get('busy'):
+                raise WorkerBusy(reply.get('error', 'worker is busy'))
+            if reply.get('retry'):
+                raise RemoteError(reply.get('error', 'worker asked for a retry'))
+            logger.error(f"Worker {worker} failed to convert {input_file}: {reply.get('error')}. Check {local_log}")
+            os.makedirs(output_dir, exist_ok=True)
+            with open(local_log, 'a') as f:
+                f.write(reply.get('log', '') + '\n')
+            return False
+
+        final_files = {fmt: output_path(input_file, output_dir, fmt) for fmt in CONFIG.OUTPUT_FORMATS}
+        if CONFIG.ENABLE_VISUALIZATION:
+            final_files['visualization'] = visualization_path(final_files[CONFIG.OUTPUT_FORMAT], output_dir)
+        entries = reply.get('files')
+        if (not isinstance(entries, list) or not entries or
+                not all(isinstance(entry, dict) and entry.get('format') in final_files and
+                        isinstance(entry.get('size'), int) and entry['size'] >= 0 for entry in entries) or
+                len({entry['format'] for entry in entries}) != len(entries) or
+                not isinstance(reply.get('results'), dict)):
+            raise RemoteError("malformed result")
+        targets = [final_files[entry['format']] for entry in reply['files']]
+        partials = [partial_path(path) for path in targets]
+        for path in targets:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        for path in partials:
+            SCRATCH.track(path)
+        try:
+            channel.receive_files(partials, [entry['size'] for entry in reply['files']])
+        except (OSError, RemoteError):
+            for path in partials:
+                SCRATCH.remove(path)
+            raise
+
+        for entry, target, partial_file in zip(reply['files'], targets, partials):
+            if CONFIG.SKIP_EXISTING and os.path.exists(target):
+                logger.info(f"Keeping existing {target} (--skip-existing enabled)")
+                SCRATCH.remove(partial_file)
+                continue
+            os.replace(partial_file, target)
+            SCRATCH.remove(partial_file)
+            if entry['format'] == 'visualization':
+                logger.info(f"Generated {CONFIG.VISUALIZATION_TYPE}: {target}")
+            else:
+                logger.info(f"Converted {input_file} -> {target} on {worker} (Size: {entry['size'] / 1024:.1f} KB)")
+        for stage, values in reply['results'].items():
+            if stage == 'Output':
+                values['measured'] = final_files[reply['files'][0]['format']]
+            RESULTS.record(input_file, stage, values)
+
+        journal = group['journal']
+        journal.record('encoded', input_file, volume=job['volume'])
+        if 'flac' in final_files:
+            journal.record('tagged', input_file)
+        if 'visualization' in final_files:
+            journal.record('visualized', input_file)
+        return True
+
+    def close(self):
+        """Tell idle workers the run is over and stop listening."""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+COORDINATOR: Optional[Coordinator] = None
+
+def run_remote_job(channel: Channel, message: dict, work_dir: str):
+    """Worker side of one track: fetch it unless shared, run process_file, stream the outputs back."""
+    if not REMOTE_SETTINGS_IN_USE.acquire(job_settings(message['settings'])):
+        channel.send({'type': 'result', 'ok': False, 'busy': True,
+                      'error': "running another coordinator's tracks under different settings"})
+        return
+    try:
+        convert_remote_job(channel, message, work_dir)
+    finally:
+        REMOTE_SETTINGS_IN_USE.release()
+
+def convert_remote_job(channel: Channel, message: dict, work_dir: str):
+    name = os.path.basename(str(message['name']))
+    if name in ('', '.', '..'):
+        channel.send({'type': 'result', 'ok': False, 'error': f"invalid input name {message['name']!r}"})
+        return
+    path = message['path']
+    try:
+        st = os.stat(path)
+        # ISO tracks carry their tags beside the stream and always go to the slot's own copy
+        shared = (not message['metadata'] and stat.S_ISREG(st.st_mode) and st.st_size == message['size'] and
+                  int(st.st_mtime) == message['mtime'])
+    except OSError:
+        shared = False
+    if not shared:
+        path = os.path.join(work_dir, 'in', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        channel.send({'type': 'fetch'})
+        if channel.receive().get('type') != 'input':
+            raise RemoteError("expected the input file")
+        try:
+            channel.receive_files([path], [message['size']])
+        except ChecksumError:
+            channel.send({'type': 'result', 'ok': False, 'retry': True, 'error': "input checksum mismatch"})
+            return
+    if message['metadata']:
+        SHIPPED_METADATA[path] = message['metadata']
+    output_dir = os.path.join(work_dir, 'out', OUTPUT_DIRS[CONFIG.OUTPUT_FORMAT])
+    logger.info(f"Converting {message['path']}{' (shared)' if shared else ''}")
+
+    # Heartbeats tell the coordinator this slot is still busy rather than gone
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(CONFIG.REMOTE_HEARTBEAT):
+            try:
+                channel.send({'type': 'alive'})
+            except OSError:
+                return
+
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    error = None
+    try:
+        success = process_file(path, output_dir, message['volume'])
+    except Exception as e:
+        success, error = False, str(e)
+    finally:
+        stop.set()
+        beat.join()
+        SHIPPED_METADATA.pop(path, None)
+    results = RESULTS.take(path)
+
+    if not success:
+        local_log = os.path.join(output_dir, 'log.txt')
+        log = ''
+        if os.path.exists(local_log):
+            with open(local_log) as f:
+                log = f.read()
+        channel.send({'type': 'result', 'ok': False, 'error': error or "conversion failed", 'log': log})
+        return
+    outputs = [(fmt, output_path(path, output_dir, fmt)) for fmt in CONFIG.OUTPUT_FORMATS]
+    if CONFIG.ENABLE_VISUALIZATION:
+        outputs.append(('visualization', visualization_path(outputs[0][1], output_dir)))
+    files = [{'format': fmt, 'size': os.path.getsize(output)} for fmt, output in outputs]
+    channel.send_files({'type': 'result', 'ok': True, 'files': files, 'results': results},
+                       [output for _, output in outputs])
+
+def worker_slot(address: Tuple[str, int], slot: int, stop: Optional[threading.Event] = None):
+    """One connection to the coordinator, converting one track at a time; reconnects until stop is set."""
+    host = socket.gethostname()
+    work_dir = SCRATCH.directory(f"worker{slot}")
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            sock = socket.create_connection(address, timeout=CONFIG.REMOTE_TIMEOUT)
+        except OSError as e:
+            logger.debug(f"Slot {slot}: coordinator {address[0]}:{address[1]} unreachable ({e})")
+            stop.wait(CONFIG.REMOTE_RETRY_INTERVAL)
+            continue
+        keep_alive(sock)
+        channel = Channel(sock)
+        try:
+            challenge = channel.receive()
+            if challenge.get('type') != 'challenge' or challenge.get('protocol') != REMOTE_PROTOCOL:
+                raise RemoteError(f"not a PureTone coordinator speaking protocol {REMOTE_PROTOCOL}")
+            nonce = os.urandom(16).hex()
+            channel.send({'type': 'ready', 'host': host, 'protocol': REMOTE_PROTOCOL,
+                          'proof': remote_proof(str(challenge.get('nonce'))), 'nonce': nonce})
+            reply = channel.receive()
+            if reply.get('type') == 'rejected':
+                raise RemoteError(f"rejected: {reply.get('error')}")
+            if reply.get('type') != 'welcome' or not proof_valid(nonce, reply.get('proof')):
+                raise RemoteError("coordinator did not prove the remote token")
+            logger.info(f"Slot {slot}: connected to coordinator {address[0]}:{address[1]}")
+            while True:
+                # Idle until the coordinator has a track for this slot
+                sock.settimeout(None)
+                message = channel.receive()
+                if message.get('type') == 'done':
+                    logger.info(f"Slot {slot}: coordinator finished its run")
+                    break
+                sock.settimeout(CONFIG.REMOTE_TIMEOUT)
+                try:
+                    run_remote_job(channel, message, work_dir)
+                finally:
+                    for name in ('in', 'out'):
+                        shutil.rmtree(os.path.join(work_dir, name), ignore_errors=True)
+        except (OSError, RemoteError) as e:
+            logger.warning(f"Slot {slot}: lost coordinator {address[0]}:{address[1]} ({e})")
+        finally:
+            channel.close()
+        stop.wait(CONFIG.REMOTE_RETRY_INTERVAL)
+
+def run_worker(address: Tuple[str, int]):
+    """`puretone worker`: CONFIG.PARALLEL_JOBS slots, each pulling tracks from the coordinator."""
+    logger.info(f"Worker with {CONFIG.PARALLEL_JOBS} slot(s) for coordinator {address[0]}:{address[1]}")
+    signal.signal(signal.SIGINT, cleanup)
+    signal.signal(signal.SIGTERM, cleanup)
+    slots = [threading.Thread(target=worker_slot, args=(address, slot), daemon=True)
+             for slot in range(CONFIG.PARALLEL_JOBS)]
+    for thread in slots:
+        thread.start()
+    while True:
+        time.sleep(3600)
 
 def main():
     description = """
@@ -580,11 +4642,16 @@ and detailed logging.
 Detailed Workflow:
 ------------------
 1. Dependency Check: Verifies that ffmpeg and ffprobe are installed.
-2. Path Analysis: Accepts a .dsf file, .iso file, or directory as input.
-   - .iso: extracts DSFs via sacd_extract, then processes normally.
+2. Path Analysis: Accepts a .dsf file, .iso file(s), or directory as input.
+   - .iso: extracts DSFs via sacd_extract, then processes normally. Several
+     ISOs (or a directory of ISOs) are pipelined: the next ISO is extracted
+     while the current one is converted.
    - .dsf: processes the file directly.
    - directory: recursively processes all .dsf files found.
 3. ISO Extraction (if input is .iso):
+   - By default (--iso-reader native) plain-DSD discs are read straight from
+     the image and streamed to ffmpeg; no DSFs are written.
+   - Otherwise (DST discs, --keep-dsf, --extract-only):
    - Locates sacd_extract (embedded or in PATH).
    - Generates sacd_extract.cfg in a temporary directory.
    - Extracts DSFs to <output_dir>/dsf/ using --2ch-tracks --output-dsf.
@@ -602,12 +4669,13 @@ Directory Structure (ISO input):
 
 Defaults:
 ---------
-- Output format (--format): wav
+- Output format (--format): wav (several formats: e.g. flac,wavpack)
 - Audio codec (--codec): pcm_s24le
 - Sample rate (--sample-rate): 176400 Hz
 - Integrated loudness target (--loudnorm-I): -14 LUFS
 - True peak limit (--loudnorm-TP): -1 dBTP
 - Loudness range (--loudnorm-LRA): 20 LU
+- Loudness normalization (--loudnorm): track (album: one gain per album)
 - Volume adjustment (--volume): None (uses loudnorm by default)
 - Optional volume increase (--volume-increase): 1dB
 - Additional adjustment (--addition): 0dB
@@ -624,13 +4692,32 @@ Defaults:
             --spectrogram 3840x2160
             --spectrogram 3840x2160 waveform
             --spectrogram 3840x2160 spectrogram separate
-- Compression level (--compression-level): 0
+- Compression level (--compression-level): 0 (per format: e.g. flac=8,wavpack=3)
 - Skip existing (--skip-existing): False
-- Parallel jobs (--parallel): 2
+- Resume from album journals (--resume / --journal-dir): False, $XDG_STATE_HOME/puretone/journals
+- Parallel jobs (--parallel): 2 (or auto)
+- Subprocess timeout (--timeout): None
+- Progress lines (--progress-interval): every 30 s
 - Log file (--log): None
+- Results file (--results): <log>.results.json with --log, else None
+- Profile report (--profile / --profile-prometheus): None
 - Keep extracted DSFs (--keep-dsf): False
 - Extract DSFs only (--extract-only): False
+- Concurrent ISO extractions (--extract-jobs): 1
+- Convert tracks while extracting (--stream-extract): False
+- ISO track reader (--iso-reader): native
 - Debug mode (--debug): False
+- Analysis cache (--no-cache / --cache-dir): Enabled, $XDG_CACHE_HOME/puretone
+- Measurement engine (--meter): ffmpeg
+- DSD to PCM engine (--engine): ffmpeg
+- Decode once (--decode-once): False
+- Segmented tracks (--segment / --segment-jobs / --segment-verify): None; all CPU cores; False
+- Scratch directory (--scratch-dir): /tmp
+- Scratch budget (--scratch-budget): 90% of the scratch dir's free space
+- Daemon mode (serve): quiet period (--settle) 30 s, queue in --state-dir $XDG_STATE_HOME/puretone,
+  status socket (--socket) <state-dir>/puretone.sock
+- Distributed conversion (--coordinator): None (host 127.0.0.1); --remote-jobs 16 tracks in flight on workers;
+  shared secret (--remote-token-file / $PURETONE_REMOTE_TOKEN) required beyond loopback
 
 Practical Examples:
 -------------------
@@ -643,11 +4730,22 @@ Practical Examples:
 3. Convert ISO and keep the extracted DSFs:
    ./puretone --format flac --keep-dsf /path/to/album.iso
 
+   Convert a whole collection of ISOs, extracting the next while converting the current:
+   ./puretone --format flac --volume auto --output-dir /path/to/out /path/to/isos/
+
 4. Convert all DSF files in a directory to WavPack:
    ./puretone --format wavpack --volume auto --parallel 4 /path/to/directory
 
 5. Convert a single DSF file to WAV with loudness normalization:
    ./puretone /path/to/file.dsf
+
+6. Run as a daemon converting every album copied into an inbox:
+   ./puretone serve --format flac --volume auto --output-dir /path/to/out /path/to/inbox
+   ./puretone serve --status
+
+7. Spread the encodes of a run over other machines (one worker per host, --parallel slots each):
+   ./puretone --coordinator 7070 --format flac --volume auto /path/to/isos/
+   ./puretone worker --parallel 4 coordinator-host:7070
 """
 
     parser = argparse.ArgumentParser(
@@ -657,18 +4755,38 @@ Practical Examples:
     )
 
     parser.add_argument('-h', '--help', action='help', help="Show this help message and exit.")
-    parser.add_argument('--format', choices=['wav', 'wavpack', 'flac'], default='wav', help="Output format: 'wav', 'wavpack' or 'flac'. Default: wav")
+    parser.add_argument('--format', type=parse_formats, default=['wav'], help=(
+        "Output format: 'wav', 'wavpack' or 'flac', or several separated by commas (e.g. flac,wavpack), all encoded "
+        "from one decode into their own directories. The first one holds the journal and visualizations. Default: wav"))
     parser.add_argument('--codec', help="Audio codec for WAV output (e.g. pcm_s32le). Default: pcm_s24le")
     parser.add_argument('--sample-rate', type=int, help="Sample rate in Hz (e.g. 88200). Default: 176400")
     parser.add_argument('--loudnorm-I', help="Integrated loudness target in LUFS. Default: -14")
     parser.add_argument('--loudnorm-TP', help="True peak limit in dBTP. Default: -1")
     parser.add_argument('--loudnorm-LRA', help="Loudness range in LU. Default: 20")
+    parser.add_argument('--loudnorm', choices=['track', 'album'], help=(
+        "Loudness normalization used without --volume: 'track' runs the two-pass loudnorm on each track; 'album' "
+        "measures every track of a group (directory, subdirectory or ISO) in parallel with one decode each and "
+        "applies one gain taking the album's gated integrated loudness to --loudnorm-I, limited by --loudnorm-TP. "
+        "Default: track"))
     parser.add_argument('--volume', help="Volume adjustment: fixed value (e.g. '2.5dB'), 'auto' or 'analysis'. Default: None")
     parser.add_argument('--volume-increase', default='1dB', help="Optional volume increase (e.g. '1dB') applied when --volume auto and all tracks have headroom. Default: 1dB")
     parser.add_argument('--addition', help="Additional volume adjustment (e.g. '1dB'), only with --volume auto. Negative values not allowed. Default: 0dB")
     parser.add_argument('--headroom-limit', type=float, help="Maximum allowed volume in dB. Default: -0.5")
     parser.add_argument('--resampler', help="Resampling engine (e.g. soxr). Default: soxr")
     parser.add_argument('--precision', type=int, help="Resampler precision (e.g. 20-28). Default: 28")
+    parser.add_argument('--engine', choices=['ffmpeg', 'native'], help=(
+        "DSD to PCM engine: ffmpeg's DSD decoder followed by --resampler, or the built-in multicore NumPy "
+        "decimator (needs AR to divide the DSD rate by a multiple of 8, e.g. 88200/176400/352800). Default: ffmpeg"))
+    parser.add_argument('--engine-threads', type=int, help="Decimation threads per track for --engine native. Default: half the CPU cores")
+    parser.add_argument('--segment', type=float, metavar='SECONDS', help=(
+        "With --engine native and a gain (--volume, --loudnorm album), split tracks of at least two SECONDS-long "
+        "segments, resample and gain-adjust the segments on separate cores and stitch them at exact sample "
+        "boundaries; the output is bit-identical to an unsegmented conversion. Default: None"))
+    parser.add_argument('--segment-jobs', type=int, help="Segments of one track resampled at once with --segment. Default: all CPU cores")
+    parser.add_argument('--segment-verify', action='store_true', help=(
+        "With --segment, also run every segmented track's chain unsegmented and fail the track unless the SHA-256 "
+        "of both PCM streams match. Default: False"))
+    parser.add_argument('--engine-benchmark', action='store_true', help="Compare the native and ffmpeg engines on the input DSFs (speed and accuracy), then exit. Default: False")
     parser.add_argument('--cheby', choices=['0', '1'], help="Enable Chebyshev mode for SoX resampler. Default: 1")
     parser.add_argument('--spectrogram', nargs='*', help=(
         "Enable visualization. All arguments are optional and positional: "
@@ -684,23 +4802,95 @@ Practical Examples:
         "--spectrogram 3840x2160 waveform; "
         "--spectrogram 3840x2160 spectrogram separate"
     ))
-    parser.add_argument('--compression-level', type=int, help="Compression level: 0-6 for WavPack, 0-12 for FLAC. Default: 0")
+    parser.add_argument('--compression-level', help=(
+        "Compression level: 0-6 for WavPack, 0-12 for FLAC. A single value applies to every compressed --format; "
+        "use e.g. flac=8,wavpack=3 to set each one. Default: 0"))
     parser.add_argument('--skip-existing', action='store_true', help="Skip if the output file already exists. Default: False")
-    parser.add_argument('--parallel', type=int, help="Number of parallel jobs. Default: 2")
+    parser.add_argument('--resume', action='store_true', help=(
+        "Continue an interrupted run from each album's journal (kept in --journal-dir): "
+        "skip finished extractions, analyses, gain decisions, encodes and visualizations. Default: False"))
+    parser.add_argument('--parallel', type=parse_parallel, help=(
+        "Number of parallel jobs, or 'auto' to size the pool from cores, free RAM and scratch space, pin ffmpeg "
+        "threads and back off under high load or scratch usage. Default: 2"))
+    parser.add_argument('--timeout', type=float, metavar='SECONDS', help=(
+        "Kill any ffmpeg/sacd_extract process (with its whole process group) still running after SECONDS; "
+        "its track or ISO fails. Default: None"))
+    parser.add_argument('--progress-interval', type=float, metavar='SECONDS', help=(
+        "Log each running ffmpeg's track, stage, progress and ETA every SECONDS; 0 disables. Default: 30"))
     parser.add_argument('--log', help="File to save analysis results. Default: None")
+    parser.add_argument('--results', help=(
+        "Write every per-file measurement (DSD/WAV/input/output peaks, y, applied volume) to this file, "
+        "as CSV if it ends in .csv and JSON otherwise. Default: <log>.results.json with --log, else None"))
     parser.add_argument('--debug', action='store_true', help="Enable debug logging. Default: False")
+    parser.add_argument('--decode-once', action='store_true', help=(
+        "With --volume auto or --loudnorm album, keep the resampled analysis PCM (32-bit float) in the scratch directory and "
+        "apply the gain to it instead of resampling the DSD again. Needs about 1.4 MB/s of audio per track "
+        "of scratch space. Default: False"))
+    parser.add_argument('--scratch-dir', help="Directory for temporary WAVs and the sacd_extract work dir. Default: /tmp")
+    parser.add_argument('--scratch-budget', type=parse_size, help=(
+        "Byte budget for temporary files (e.g. 20G, 500M). Jobs start only while their estimated temp WAVs fit. "
+        "Default: 90%% of the scratch dir's free space"))
+    parser.add_argument('--profile', metavar='FILE', help=(
+        "Record wall time, CPU time, peak RSS and bytes read/written of every subprocess by stage "
+        "(extract, probe, analyze, resample, encode, visualize, verify), per track and per album, "
+        "and write them to FILE as JSON. Default: None"))
+    parser.add_argument('--profile-prometheus', metavar='FILE', help=(
+        "Also write the per-stage totals as a Prometheus node_exporter textfile (implies profiling). Default: None"))
+    parser.add_argument('--meter', choices=['ffmpeg', 'numpy'], help=(
+        "Peak/loudness measurement engine: ffmpeg filters (volumedetect, astats, loudnorm) or an in-process "
+        "NumPy meter fed by a PCM pipe, which returns unrounded values. Default: ffmpeg"))
+    parser.add_argument('--no-cache', action='store_true', help="Disable the persistent analysis cache. Default: False")
+    parser.add_argument('--cache-dir', help="Directory for the analysis cache. Default: $XDG_CACHE_HOME/puretone")
+    parser.add_argument('--journal-dir', help="Directory for the album journals (--resume). Default: $XDG_STATE_HOME/puretone/journals")
     # SACD arguments
     parser.add_argument('--keep-dsf', action='store_true', help="Keep extracted .dsf files after conversion. Default: False")
     parser.add_argument('--extract-only', action='store_true', help="Extract DSFs from the ISO without converting. Implies --keep-dsf. Default: False")
     parser.add_argument('--output-dir', help="Output directory for extracted DSFs and converted files (ISO input only). Default: same directory as the ISO")
-    parser.add_argument('path', help="Path to a .dsf file, .iso file, or directory")
+    parser.add_argument('--iso-reader', choices=['native', 'sacd_extract'], help=(
+        "How ISO tracks are read for conversion: 'native' streams plain-DSD tracks straight from the image without "
+        "writing DSFs (DST discs, --keep-dsf and --extract-only still use sacd_extract). Default: native"))
+    parser.add_argument('--stream-extract', action='store_true', help=(
+        "Start converting (or, with --volume auto, analysing) each track as soon as sacd_extract has finished writing "
+        "its DSF, instead of waiting for the whole disc. Default: False"))
+    parser.add_argument('--extract-jobs', type=int, help="Number of ISOs extracted concurrently in a multi-ISO batch; conversion uses --parallel. Default: 1")
+    # Daemon mode
+    parser.add_argument('--settle', type=float, help=(
+        "serve: seconds an inbox album must stay unchanged (and complete on disk) before it is queued. Default: 30"))
+    parser.add_argument('--state-dir', help="serve: directory of the persistent queue. Default: $XDG_STATE_HOME/puretone")
+    parser.add_argument('--socket', help="serve: Unix socket serving the queue status as JSON. Default: <state-dir>/puretone.sock")
+    parser.add_argument('--status', action='store_true', help="serve: print the running daemon's status and exit. Default: False")
+    # Distributed conversion
+    parser.add_argument('--coordinator', type=parse_address, metavar='[HOST:]PORT', help=(
+        "Listen for 'puretone worker' processes and run every encode on them; analyses and group gain decisions "
+        "stay here. HOST defaults to 127.0.0.1; any other address needs --remote-token-file. Default: None"))
+    parser.add_argument('--remote-jobs', type=int, help="--coordinator: tracks queued for or running on workers at once. Default: 16")
+    parser.add_argument('--remote-token-file', metavar='FILE', help=(
+        "--coordinator and worker: file holding the shared secret both ends prove with an HMAC challenge "
+        "(also read from $PURETONE_REMOTE_TOKEN); required to listen on a non-loopback address. Default: None"))
+    parser.add_argument('path', nargs='*', help=(
+        "Path to a .dsf file, one or more .iso files, a directory of .iso files, or a directory of .dsf files. "
+        "With 'serve' as the first argument: the inbox directories to watch. "
+        "With 'worker': the coordinator's HOST:PORT"))
 
-    args = parser.parse_args()
+    argv = sys.argv[1:]
+    serve_mode = argv[:1] == ['serve']
+    worker_mode = argv[:1] == ['worker']
+    args = parser.parse_args(argv[1:] if serve_mode or worker_mode else argv)
+    if not args.path and not (serve_mode and args.status):
+        parser.error("the following arguments are required: path")
+    if worker_mode:
+        if len(args.path) != 1:
+            parser.error("worker takes exactly one coordinator address")
+        try:
+            worker_address = parse_address(args.path[0])
+        except argparse.ArgumentTypeError as e:
+            parser.error(f"coordinator address {e}")
 
     if args.debug:
         logger.setLevel(logging.DEBUG)
 
-    CONFIG.OUTPUT_FORMAT = args.format
+    CONFIG.OUTPUT_FORMATS = args.format
+    CONFIG.OUTPUT_FORMAT = args.format[0]
     if args.volume:
         if args.volume not in ('auto', 'analysis') and not validate_volume(args.volume):
             logger.error("Volume must be 'auto', 'analysis', or in the format 'XdB' (e.g. '3dB', '-2.5dB')")
@@ -727,6 +4917,11 @@ Practical Examples:
     if args.loudnorm_I: CONFIG.LOUDNORM_I = args.loudnorm_I
     if args.loudnorm_TP: CONFIG.LOUDNORM_TP = args.loudnorm_TP
     if args.loudnorm_LRA: CONFIG.LOUDNORM_LRA = args.loudnorm_LRA
+    if args.loudnorm:
+        if args.volume and args.loudnorm == 'album':
+            logger.error("--loudnorm album cannot be combined with --volume")
+            sys.exit(1)
+        CONFIG.LOUDNORM_MODE = args.loudnorm
     if args.headroom_limit is not None: CONFIG.HEADROOM_LIMIT = args.headroom_limit
     if args.resampler: CONFIG.RESAMPLER = args.resampler
     if args.precision: CONFIG.PRECISION = str(args.precision)
@@ -743,116 +4938,201 @@ Practical Examples:
         # Next token: optional mode (combined or separate), only for spectrogram type
         if params and CONFIG.VISUALIZATION_TYPE == 'spectrogram' and params[0] in ('combined', 'separate'):
             CONFIG.SPECTROGRAM_MODE = params.pop(0)
-    if args.compression_level:
-        if CONFIG.OUTPUT_FORMAT == 'wavpack' and 0 <= args.compression_level <= 6:
-            CONFIG.WAVPACK_COMPRESSION = str(args.compression_level)
-        elif CONFIG.OUTPUT_FORMAT == 'flac' and 0 <= args.compression_level <= 12:
-            CONFIG.FLAC_COMPRESSION = str(args.compression_level)
-        else:
-            logger.error(f"Invalid compression level for {CONFIG.OUTPUT_FORMAT}")
+    if args.compression_level and args.compression_level != '0':
+        levels = parse_compression_levels(args.compression_level, CONFIG.OUTPUT_FORMATS)
+        if levels is None:
+            logger.error(f"Invalid compression level for {','.join(CONFIG.OUTPUT_FORMATS)}")
             sys.exit(1)
+        for fmt, level in levels.items():
+            setattr(CONFIG, COMPRESSION_LEVELS[fmt][1], str(level))
     if args.skip_existing: CONFIG.SKIP_EXISTING = True
-    if args.parallel: CONFIG.PARALLEL_JOBS = max(1, args.parallel)
+    if args.parallel == 'auto':
+        CONFIG.PARALLEL_AUTO = True
+    elif args.parallel:
+        CONFIG.PARALLEL_JOBS = max(1, args.parallel)
+    if args.extract_jobs: CONFIG.EXTRACT_JOBS = max(1, args.extract_jobs)
+    CONFIG.STREAM_EXTRACT = args.stream_extract
+    if args.resume: CONFIG.RESUME = True
+    if args.journal_dir: CONFIG.JOURNAL_DIR = os.path.abspath(args.journal_dir)
     CONFIG.KEEP_DSF = args.keep_dsf or args.extract_only
     CONFIG.EXTRACT_ONLY = args.extract_only
+    if args.iso_reader: CONFIG.ISO_READER = args.iso_reader
+    # DSFs to keep can only come from sacd_extract
+    if CONFIG.KEEP_DSF: CONFIG.ISO_READER = 'sacd_extract'
     log_file = args.log
+    if args.no_cache: CONFIG.CACHE_ENABLED = False
+    if args.engine:
+        if args.engine == 'native' and np is None:
+            logger.error("--engine native requires NumPy. Please install it.")
+            sys.exit(1)
+        CONFIG.ENGINE = args.engine
+    if args.engine_threads: CONFIG.ENGINE_THREADS = max(1, args.engine_threads)
+    if args.segment is not None:
+        # Only the native decimator's output is independent of where a segment starts
+        if CONFIG.ENGINE != 'native':
+            logger.error("--segment requires --engine native: ffmpeg's resampler output depends on where the stream starts")
+            sys.exit(1)
+        if args.segment <= 0:
+            logger.error("--segment must be a positive number of seconds")
+            sys.exit(1)
+        CONFIG.SEGMENT_SECONDS = args.segment
+    if args.segment_jobs: CONFIG.SEGMENT_JOBS = max(1, args.segment_jobs)
+    if args.segment_verify:
+        if not CONFIG.SEGMENT_SECONDS:
+            logger.error("--segment-verify can only be used with --segment")
+            sys.exit(1)
+        CONFIG.SEGMENT_VERIFY = True
+    if args.engine_benchmark and np is None:
+        logger.error("--engine-benchmark requires NumPy. Please install it.")
+        sys.exit(1)
+    if args.meter:
+        if args.meter == 'numpy' and np is None:
+            logger.error("--meter numpy requires NumPy. Please install it.")
+            sys.exit(1)
+        CONFIG.METER = args.meter
+    if args.decode_once:
+        if args.volume != 'auto' and CONFIG.LOUDNORM_MODE != 'album':
+            logger.error("--decode-once can only be used with --volume auto or --loudnorm album")
+            sys.exit(1)
+        if args.coordinator:
+            logger.error("--decode-once cannot be combined with --coordinator: encodes run on the workers")
+            sys.exit(1)
+        CONFIG.DECODE_ONCE = True
+    if args.timeout is not None:
+        if args.timeout <= 0:
+            logger.error("--timeout must be a positive number of seconds")
+            sys.exit(1)
+        CONFIG.PROCESS_TIMEOUT = args.timeout
+    if args.progress_interval is not None: CONFIG.PROGRESS_INTERVAL = max(0.0, args.progress_interval)
+    if args.scratch_dir:
+        CONFIG.SCRATCH_DIR = os.path.abspath(args.scratch_dir)
+        os.makedirs(CONFIG.SCRATCH_DIR, exist_ok=True)
+    if args.scratch_budget: CONFIG.SCRATCH_BUDGET = args.scratch_budget
+    SCRATCH.budget = CONFIG.SCRATCH_BUDGET or int(shutil.disk_usage(CONFIG.SCRATCH_DIR).free * CONFIG.SCRATCH_BUDGET_FREE_FRACTION)
+    logger.debug(f"Scratch budget: {SCRATCH.budget / 2**30:.1f} GiB in {CONFIG.SCRATCH_DIR}")
+    if args.cache_dir: CONFIG.CACHE_DIR = os.path.abspath(args.cache_dir)
+    if CONFIG.PARALLEL_AUTO:
+        CONFIG.PARALLEL_JOBS = auto_parallel_jobs(args.volume == 'auto' or CONFIG.DECODE_ONCE)
+    if args.state_dir:
+        CONFIG.SERVE_STATE_DIR = os.path.abspath(args.state_dir)
+        CONFIG.SERVE_SOCKET = os.path.join(CONFIG.SERVE_STATE_DIR, 'puretone.sock')
+    if args.socket: CONFIG.SERVE_SOCKET = os.path.abspath(args.socket)
+    if args.settle is not None: CONFIG.SERVE_SETTLE = max(0.0, args.settle)
+    if args.remote_jobs: CONFIG.REMOTE_JOBS = max(1, args.remote_jobs)
+    if args.remote_token_file:
+        try:
+            with open(args.remote_token_file) as f:
+                CONFIG.REMOTE_TOKEN = f.read().strip() or None
+        except OSError as e:
+            logger.error(f"Cannot read --remote-token-file: {e}")
+            sys.exit(1)
+    if args.coordinator:
+        # Listen on loopback unless a host is given, and never beyond it without a token
+        args.coordinator = (args.coordinator[0] or '127.0.0.1', args.coordinator[1])
+        if not is_loopback(args.coordinator[0]) and not CONFIG.REMOTE_TOKEN:
+            logger.error("--coordinator on a non-loopback address requires --remote-token-file or $PURETONE_REMOTE_TOKEN")
+            sys.exit(1)
+
+    if serve_mode and args.status:
+        try:
+            print(json.dumps(serve_status(CONFIG.SERVE_SOCKET), indent=2))
+        except (OSError, ValueError) as e:
+            logger.error(f"No PureTone daemon answering on {CONFIG.SERVE_SOCKET}: {e}")
+            sys.exit(1)
+        return
 
     # Verify base dependencies
     required_commands = ['ffmpeg', 'ffprobe']
-    if CONFIG.OUTPUT_FORMAT == 'flac':
-        required_commands.append('metaflac')
     for cmd in required_commands:
         if shutil.which(cmd) is None:
             logger.error(f"{cmd} not found. Please install it.")
             sys.exit(1)
 
-    for temp_file in TEMP_FILES.values():
-        with open(temp_file, 'w'): pass
+    global ANALYSIS_CACHE, PROFILER, COORDINATOR
+    if args.profile or args.profile_prometheus:
+        PROFILER = Profiler()
+    if CONFIG.CACHE_ENABLED:
+        try:
+            ANALYSIS_CACHE = AnalysisCache(CONFIG.CACHE_DIR)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Analysis cache unavailable ({e}). Continuing without cache.")
+
+    if worker_mode:
+        run_worker(worker_address)
+        return
+
+    if args.coordinator:
+        try:
+            COORDINATOR = Coordinator(args.coordinator)
+        except OSError as e:
+            logger.error(f"Cannot listen on {args.coordinator[0]}:{args.coordinator[1]}: {e}")
+            sys.exit(1)
+
+    results_file = args.results or (f"{os.path.splitext(log_file)[0]}.results.json" if log_file else None)
+    paths = [resolve_path(p) for p in args.path]
+
+    if serve_mode:
+        inboxes = [str(p.resolve()) for p in paths]
+        for inbox in inboxes:
+            if not os.path.isdir(inbox):
+                logger.error(f"Inbox is not a directory: {inbox}")
+                sys.exit(1)
+        serve(inboxes, args, locate_sacd_extract(), log_file, results_file)
+        return
 
-    path = resolve_path(args.path)
+    path = paths[0]
+    isos = list_isos(paths)
+    if isos is None and len(paths) > 1:
+        logger.error("Multiple paths are only supported for .iso files and directories of .iso files")
+        sys.exit(1)
     start_time = time.time()
     success = True
-    all_volume_data = []
-    all_volume_maps = []
 
     signal.signal(signal.SIGINT, cleanup)
     signal.signal(signal.SIGTERM, cleanup)
 
+    if args.engine_benchmark:
+        files = [str(path)] if path.is_file() else sorted(str(f) for f in path.rglob('*.dsf'))
+        if not files:
+            logger.error(f"No .dsf files found at {path}")
+            sys.exit(1)
+        benchmark_engines(files)
+        return
+
     # ------------------------------------------------------------------
-    # ISO SACD flow
+    # ISO SACD flow (one or more ISOs)
     # ------------------------------------------------------------------
-    if path.is_file() and path.suffix.lower() == '.iso':
+    if isos:
         sacd_bin = locate_sacd_extract()
-        if sacd_bin is None:
+        if sacd_bin is None and CONFIG.ISO_READER != 'native':
             logger.error("sacd_extract not found. Install it on the system or place the binary at bin/sacd_extract.")
             sys.exit(1)
 
-        output_dir = os.path.abspath(args.output_dir) if args.output_dir else None
-        dsf_dir = extract_iso(str(path), sacd_bin, output_dir)
-        if dsf_dir is None:
-            logger.error("ISO extraction failed. Aborting.")
+        stems = [Path(iso).stem for iso in isos]
+        if args.output_dir and len(set(stems)) != len(stems):
+            logger.error("Several ISOs share the same file name; they would be extracted to the same <output_dir>/<iso_stem>")
             sys.exit(1)
 
-        if CONFIG.EXTRACT_ONLY:
-            logger.info(f"--extract-only active. DSFs available at: {dsf_dir}")
-        else:
-            success = process_dsf_directory(dsf_dir, args, log_file)
-            cleanup_dsf_dir(dsf_dir)
+        success = process_iso_batch(isos, sacd_bin, args, log_file)
 
     # ------------------------------------------------------------------
     # Single DSF file flow
     # ------------------------------------------------------------------
     elif path.is_file() and path.suffix == '.dsf':
-        output_dir = os.path.join(path.parent, OUTPUT_DIRS[args.format])
-        if args.volume == 'auto':
-            volume_map, volume_data = calculate_volume_adjustment([str(path)], "", log_file)
-            all_volume_data.extend(volume_data)
-            all_volume_maps.append(volume_map)
-            if volume_map:
-                success &= process_file(str(path), output_dir, volume_map[0][1], log_file)
-            else:
-                success = False
-        else:
-            success &= process_file(str(path), output_dir, args.volume, log_file)
+        output_dir = os.path.join(path.parent, OUTPUT_DIRS[CONFIG.OUTPUT_FORMAT])
+        success = run_groups([([str(path)], output_dir, "")], args.volume, log_file)
 
     # ------------------------------------------------------------------
     # Directory flow
     # ------------------------------------------------------------------
     elif path.is_dir():
         abs_path = path.resolve()
-        files = [str(f) for f in abs_path.glob('*.dsf')]
-        subdirs = [d for d in abs_path.iterdir() if d.is_dir() and any(f.suffix == '.dsf' for f in d.glob('*.dsf'))]
-
-        if args.volume == 'auto':
-            if files:
-                logger.info(f"Processing directory: {abs_path}")
-                volume_map, volume_data = calculate_volume_adjustment(files, "", log_file)
-                all_volume_data.extend(volume_data)
-                all_volume_maps.append(volume_map)
-                success &= process_files_in_parallel(files, str(abs_path / OUTPUT_DIRS[args.format]), volume_map, log_file)
-            if subdirs:
-                logger.info(f"Processing subdirectories in {abs_path}: {', '.join(d.name for d in subdirs)}")
-                for subdir in subdirs:
-                    subdir_files = [str(f) for f in subdir.glob('*.dsf')]
-                    volume_map, volume_data = calculate_volume_adjustment(subdir_files, str(subdir), log_file)
-                    all_volume_data.extend(volume_data)
-                    all_volume_maps.append(volume_map)
-                    success &= process_files_in_parallel(subdir_files, str(subdir / OUTPUT_DIRS[args.format]), volume_map, log_file)
-            if not files and not subdirs:
-                logger.error(f"No .dsf files found in {abs_path} or its subdirectories")
-                success = False
+        groups = directory_groups(abs_path, CONFIG.OUTPUT_FORMAT)
+        if groups:
+            success = run_groups(groups, args.volume, log_file)
         else:
-            if files:
-                logger.info(f"Processing directory: {abs_path}")
-                success &= process_files_in_parallel(files, str(abs_path / OUTPUT_DIRS[args.format]), [(f, args.volume) for f in files], log_file)
-            if subdirs:
-                logger.info(f"Processing subdirectories in {abs_path}: {', '.join(d.name for d in subdirs)}")
-                for subdir in subdirs:
-                    subdir_files = [str(f) for f in subdir.glob('*.dsf')]
-                    success &= process_files_in_parallel(subdir_files, str(subdir / OUTPUT_DIRS[args.format]), [(f, args.volume) for f in subdir_files], log_file)
-            if not files and not subdirs:
-                logger.error(f"No .dsf files found in {abs_path} or its subdirectories")
-                success = False
+            logger.error(f"No .dsf files found in {abs_path} or its subdirectories")
+            success = False
     else:
         logger.error(f"Invalid path or unsupported format: {args.path}")
         sys.exit(1)
@@ -864,15 +5144,26 @@ Practical Examples:
         logger.error("Process completed with errors!")
     logger.info(f"Elapsed time: {elapsed_time} seconds")
 
-    if all_volume_data and args.volume == 'auto':
-        print_volume_summary(all_volume_data, all_volume_maps, log_file)
+    if args.volume == 'auto' and RESULTS.volume_rows():
+        print_volume_summary(log_file)
+
+    if results_file:
+        try:
+            RESULTS.write(results_file)
+        except OSError as e:
+            logger.error(f"Failed to write results to {results_file}: {e}")
+
+    if PROFILER:
+        try:
+            PROFILER.write(args.profile, args.profile_prometheus)
+        except OSError as e:
+            logger.error(f"Failed to write profile: {e}")
 
-    # Clean up temporary files
-    for temp_file in TEMP_FILES.values():
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-    if os.path.exists(SACD_TEMP_DIR):
-        shutil.rmtree(SACD_TEMP_DIR, ignore_errors=True)
+    if COORDINATOR:
+        COORDINATOR.close()
+    SCRATCH.cleanup()
+    if ANALYSIS_CACHE:
+        ANALYSIS_CACHE.close()
 
     if ORIGINAL_TERMINAL_STATE is not None and sys.stdin.isatty():
         sys.stdout.flush()
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# puretone.py is a single script at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from benchmark import dsf
+
+
+@pytest.fixture(autouse=True)
+def journal_dir(tmp_path_factory, monkeypatch):
+    """Album journals go to a per-test state dir, not the user's."""
+    import puretone
+    path = tmp_path_factory.mktemp('journals')
+    monkeypatch.setattr(puretone.CONFIG, 'JOURNAL_DIR', str(path))
+    return path
+
+
+@pytest.fixture(scope='session')
+def pink_dsf(tmp_path_factory):
+    """2.5 s of stereo DSD64 pink noise."""
+    path = str(tmp_path_factory.mktemp('dsf') / 'pink.dsf')
+    dsf.write_dsf(path, dsf.pink_signal(2.5, 1), 2.5)
+    return path
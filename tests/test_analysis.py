@@ -0,0 +1,38 @@
+import pytest
+
+import puretone
+
+# An encode with both taps: the input's unnamed filters and the output's named ones report side by side
+ENCODE_STDERR = """\
+[Parsed_volumedetect_1 @ 0x5581] n_samples: 1058400
+[Parsed_volumedetect_1 @ 0x5581] max_volume: -6.2 dB
+[volumedetect@output @ 0x55a0] n_samples: 1058400
+[volumedetect@output @ 0x55a0] max_volume: -0.8 dB
+[Parsed_astats_2 @ 0x5590] Channel: 1
+[Parsed_astats_2 @ 0x5590] Peak level dB: -6.200000
+[Parsed_astats_2 @ 0x5590] Overall
+[Parsed_astats_2 @ 0x5590] Peak level dB: -6.150000
+[astats@output @ 0x55b0] Channel: 1
+[astats@output @ 0x55b0] Peak level dB: -0.800000
+[astats@output @ 0x55b0] Overall
+[astats@output @ 0x55b0] Peak level dB: -0.750000
+size=N/A time=00:00:06.00 bitrate=N/A speed=41.2x
+"""
+
+
+def test_input_and_output_taps_are_told_apart():
+    assert puretone.parse_analysis(ENCODE_STDERR) == \
+        {'max_volume': -6.2, 'peak_level': -6.15, 'loudnorm': None}
+    assert puretone.parse_analysis(ENCODE_STDERR, puretone.OUTPUT_TAP) == \
+        {'max_volume': -0.8, 'peak_level': -0.75, 'loudnorm': None}
+
+
+@pytest.mark.parametrize('tap_input', [False, True])
+def test_output_tap_measures_the_encoders_stream(tap_input):
+    graph_args, maps = puretone.fan_out_filtergraph('volume=2.5dB', 1, tap_input, ['-map', '0:a'],
+                                                    tap_output=True)
+    graph = graph_args[1]
+    assert 'volume=2.5dB,asplit=2[out0][measure]' in graph
+    assert f"[measure]{puretone.OUTPUT_ANALYSIS_FILTERS},anullsink" in graph
+    assert graph.startswith('[0:a]asplit=2[analysis][main]') == tap_input
+    assert maps == [['-map', '[out0]']]
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmark import dsf
+
+
+@pytest.fixture(scope='module')
+def sine_dsf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('dsf') / 'sine.dsf')
+    dsf.write_dsf(path, dsf.sine_signal(1.5, 1, level_db=-6.0), 1.5)
+    return path
+
+
+def test_peak_reads_the_modulated_level(sine_dsf, monkeypatch):
+    peaks = dsf.peak_db(sine_dsf)
+    assert peaks == pytest.approx({'left': -6.0, 'right': -6.0}, abs=0.1)
+    # Blocks of any size measure the same peak
+    monkeypatch.setattr(dsf, 'PEAK_BLOCKS', 3)
+    assert dsf.peak_db(sine_dsf) == pytest.approx(peaks, abs=1e-9)
+    assert dsf.peak_db(sine_dsf, seconds=0.5) == pytest.approx({'left': -6.0, 'right': -6.0}, abs=0.1)
@@ -0,0 +1,171 @@
+import struct
+
+import pytest
+
+import puretone
+from benchmark import dsf
+
+
+def syncsafe(value):
+    return bytes((value >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def unsync(data):
+    return data.replace(b'\xff', b'\xff\x00')
+
+
+def text(value, encoding=3):
+    codec = {0: 'latin-1', 1: 'utf-16', 3: 'utf-8'}[encoding]
+    return bytes([encoding]) + value.encode(codec)
+
+
+def frame(version, frame_id, body, flags=0):
+    if version == 2:
+        return frame_id.encode() + len(body).to_bytes(3, 'big') + body
+    size = syncsafe(len(body)) if version == 4 else struct.pack('>I', len(body))
+    return frame_id.encode() + size + bytes([0, flags]) + body
+
+
+def tag(version, frames, flags=0):
+    return b'ID3' + bytes([version, 0, flags]) + syncsafe(len(frames)) + frames
+
+
+def test_id3v24_frames():
+    # UTF-16 TXXX (a BOM per string), a frame-level unsynchronised title with a data-length indicator
+    title = text('ÿ Título', encoding=0)
+    frames = (frame(4, 'TIT2', syncsafe(len(title)) + unsync(title), flags=0x03) +
+              frame(4, 'TPE1', text('Artist A\0Artist B')) +
+              frame(4, 'TRCK', text('3/12')) +
+              frame(4, 'TXXX', text('Catalog\0SACD-001', encoding=1)) +
+              frame(4, 'COMM', b'\x03eng' + b'\0' + 'Recorded live'.encode()) +
+              frame(4, 'COMM', b'\x03eng' + b'iTunNORM\0' + b'junk') +
+              frame(4, 'APIC', b'\0image/png\0\x03\0png') +
+              bytes(32))
+    assert puretone.parse_id3(tag(4, frames)) == {
+        'TITLE': ['ÿ Título'], 'ARTIST': ['Artist A', 'Artist B'], 'TRACKNUMBER': ['3'], 'TRACKTOTAL': ['12'],
+        'CATALOG': ['SACD-001'], 'COMMENT': ['Recorded live']}
+
+
+def test_id3v23_with_tag_unsynchronisation_and_extended_header():
+    frames = frame(3, 'TALB', text('Álbum ÿ', encoding=0)) + frame(3, 'TPOS', text('1/2', encoding=1))
+    extended = struct.pack('>I', 6) + bytes(6)
+    data = unsync(extended + frames)
+    assert puretone.parse_id3(tag(3, data, flags=0xC0)) == {'ALBUM': ['Álbum ÿ'], 'DISCNUMBER': ['1'], 'DISCTOTAL': ['2']}
+
+
+def test_id3v22_frames():
+    frames = frame(2, 'TT2', text('Old', encoding=0)) + frame(2, 'TYE', text('1999', encoding=0))
+    assert puretone.parse_id3(tag(2, frames)) == {'TITLE': ['Old'], 'DATE': ['1999']}
+
+
+def test_compressed_and_malformed_tags_are_skipped():
+    frames = frame(3, 'TIT2', text('Hidden'), flags=0x80) + frame(3, 'TPE1', text('Seen'))
+    assert puretone.parse_id3(tag(3, frames)) == {'ARTIST': ['Seen']}
+    assert puretone.parse_id3(b'ID3\x05\0\0\0\0\0\0') == {}
+    assert puretone.parse_id3(b'') == {}
+
+
+def test_dsf_id3_chunk(tmp_path):
+    id3 = tag(4, frame(4, 'TIT2', text('From DSF')))
+    header = bytearray(dsf.dsf_header(dsf.DSD_RATES[64], 8 * 4096, 2 * 4096))
+    audio_end = len(header) + 2 * 4096
+    struct.pack_into('<QQ', header, 12, audio_end + len(id3), audio_end)
+    path = tmp_path / 'tagged.dsf'
+    path.write_bytes(bytes(header) + bytes(2 * 4096) + id3)
+    assert puretone.dsf_id3_tags(str(path)) == {'TITLE': ['From DSF']}
+    path.write_bytes(dsf.dsf_header(dsf.DSD_RATES[64], 8 * 4096, 2 * 4096) + bytes(2 * 4096))
+    assert puretone.dsf_id3_tags(str(path)) == {}
+
+
+AUDIO = b'\xff\xf8AUDIOFRAMES' * 500
+
+
+def vorbis_comment(vendor, entries):
+    return (struct.pack('<I', len(vendor)) + vendor + struct.pack('<I', len(entries)) +
+            b''.join(struct.pack('<I', len(entry)) + entry for entry in entries))
+
+
+def write_flac(path, padding, prefix=b'', comment=True):
+    blocks = [(puretone.FLAC_STREAMINFO, bytes(range(34)))]
+    if comment:
+        blocks.append((puretone.FLAC_VORBIS_COMMENT, vorbis_comment(b'Lavf', [b'TITLE=ffmpeg', b'comment=mapped'])))
+    blocks.append((2, b'APPLICATIONdata'))
+    if padding is not None:
+        blocks.append((puretone.FLAC_PADDING, bytes(padding)))
+    path.write_bytes(prefix + b'fLaC' + puretone.FlacMetadata.encode_blocks(blocks) + AUDIO)
+
+
+@pytest.mark.parametrize('padding', [8192, 100])
+def test_write_in_place(tmp_path, padding):
+    path = tmp_path / 'a.flac'
+    write_flac(path, padding)
+    size = path.stat().st_size
+    metadata = puretone.FlacMetadata(str(path))
+    metadata.set_tag('ARTIST', ['Ünïcode'])
+    assert metadata.write()
+    assert path.stat().st_size == size
+    written = puretone.FlacMetadata(str(path))
+    assert written.comments == [('TITLE', 'ffmpeg'), ('comment', 'mapped'), ('ARTIST', 'Ünïcode')]
+    assert written.vendor == 'Lavf' and written.audio_offset == metadata.audio_offset
+    assert [kind for kind, _ in written.blocks] == [0, 4, 2, 1]
+    assert path.read_bytes().endswith(AUDIO)
+
+
+@pytest.mark.parametrize('padding', [None, 0, 50])
+def test_rewrite_when_padding_runs_out(tmp_path, padding):
+    path = tmp_path / 'b.flac'
+    write_flac(path, padding)
+    metadata = puretone.FlacMetadata(str(path))
+    metadata.set_tag('DESCRIPTION', ['x' * 200])
+    assert not metadata.write()
+    written = puretone.FlacMetadata(str(path))
+    assert written.tags('DESCRIPTION') == ['x' * 200]
+    assert written.blocks[-1] == (puretone.FLAC_PADDING, bytes(puretone.CONFIG.FLAC_PADDING))
+    assert path.read_bytes()[written.audio_offset:] == AUDIO
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_exact_fit_and_missing_comment_block(tmp_path):
+    path = tmp_path / 'c.flac'
+    write_flac(path, 100, comment=False)
+    metadata = puretone.FlacMetadata(str(path))
+    metadata.set_tag('T', ['v' * (100 + 4 - len(metadata.comment_block()) - 4 - 4 - len('T='))])
+    # The comment block takes the padding block's whole room, header included
+    assert len(metadata.comment_block()) + 4 == 100 + 4
+    assert metadata.write()
+    written = puretone.FlacMetadata(str(path))
+    assert [kind for kind, _ in written.blocks] == [0, 4, 2]
+    assert path.read_bytes().endswith(AUDIO)
+
+
+def test_leading_id3_is_kept(tmp_path):
+    path = tmp_path / 'd.flac'
+    id3 = tag(4, frame(4, 'TIT2', text('x')))
+    write_flac(path, 10, prefix=id3)
+    metadata = puretone.FlacMetadata(str(path))
+    metadata.set_tag('ALBUM', ['a' * 100])
+    assert not metadata.write()
+    assert path.read_bytes().startswith(id3 + b'fLaC')
+    assert puretone.FlacMetadata(str(path)).tags('album') == ['a' * 100]
+
+
+def test_not_flac(tmp_path):
+    path = tmp_path / 'e.flac'
+    path.write_bytes(b'RIFF' + bytes(100))
+    with pytest.raises(ValueError):
+        puretone.FlacMetadata(str(path))
+
+
+def test_tag_flac_merges_history_and_carried_tags(tmp_path):
+    path = tmp_path / 'f.flac'
+    write_flac(path, 8192)
+    carried = {'TITLE': ['From ID3'], 'ALBUM': ['Disc'], 'COMMENT': ['Recorded live']}
+    assert puretone.tag_flac(str(path), {'COMMENT': 'DSF > WAV > FLAC'}, carried)
+    written = puretone.FlacMetadata(str(path))
+    # ffmpeg's TITLE wins, the missing ALBUM is filled, the disc comment follows the history
+    assert written.tags('TITLE') == ['ffmpeg']
+    assert written.tags('ALBUM') == ['Disc']
+    assert written.tags('COMMENT') == ['DSF > WAV > FLAC', 'Recorded live']
+    # Tagging again replaces the history instead of piling it up
+    assert puretone.tag_flac(str(path), {'COMMENT': 'DSF > WAV > FLAC'}, carried)
+    assert puretone.FlacMetadata(str(path)).tags('COMMENT') == ['DSF > WAV > FLAC', 'Recorded live']
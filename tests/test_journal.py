@@ -0,0 +1,60 @@
+import json
+
+import puretone
+
+
+def test_torn_line_is_cut_before_appending(tmp_path):
+    journal = puretone.AlbumJournal(str(tmp_path))
+    journal.record('encoded', str(tmp_path / 'track01.dsf'), volume='1dB')
+    # Crash in the middle of the next record
+    with open(journal.path, 'a') as f:
+        f.write('{"stage": "encoded", "tra')
+
+    resumed = puretone.AlbumJournal(str(tmp_path), resume=True)
+    resumed.record('encoded', str(tmp_path / 'track02.dsf'), volume='2dB')
+
+    again = puretone.AlbumJournal(str(tmp_path), resume=True)
+    assert again.done('encoded', str(tmp_path / 'track01.dsf')) == {'volume': '1dB'}
+    assert again.done('encoded', str(tmp_path / 'track02.dsf')) == {'volume': '2dB'}
+    with open(journal.path) as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_settings_change_starts_over(tmp_path):
+    journal = puretone.AlbumJournal(str(tmp_path))
+    journal.record('encoded', str(tmp_path / 'track01.dsf'), volume='1dB')
+    previous = puretone.CONFIG.AR
+    puretone.CONFIG.AR = '88200'
+    try:
+        resumed = puretone.AlbumJournal(str(tmp_path), resume=True)
+    finally:
+        puretone.CONFIG.AR = previous
+    assert resumed.done('encoded', str(tmp_path / 'track01.dsf')) is None
+
+
+def test_journal_stays_out_of_the_library(tmp_path, journal_dir):
+    output_dir = tmp_path / 'album' / 'flac'
+    output_dir.mkdir(parents=True)
+    journal = puretone.AlbumJournal(str(output_dir))
+    journal.record('encoded', str(tmp_path / 'album' / 'track01.dsf'), volume='0dB')
+    assert list(output_dir.iterdir()) == []
+    assert journal.path.startswith(str(journal_dir)) and journal.path.endswith('.jsonl')
+    # Each output directory has its own journal
+    other = puretone.AlbumJournal(str(tmp_path / 'other' / 'flac'))
+    assert other.path != journal.path
+
+
+def test_legacy_journal_is_taken_over(tmp_path):
+    output_dir = tmp_path / 'flac'
+    output_dir.mkdir()
+    settings = {'stage': 'settings', 'settings': puretone.journal_settings()}
+    encoded = {'stage': 'encoded', 'track': 'track01', 'volume': '1dB'}
+    legacy = output_dir / puretone.LEGACY_JOURNAL_FILE
+    legacy.write_text(json.dumps(settings) + '\n' + json.dumps(encoded) + '\n')
+    resumed = puretone.AlbumJournal(str(output_dir), resume=True)
+    assert resumed.done('encoded', 'track01.dsf') == {'volume': '1dB'}
+    assert not legacy.exists()
+    # Without --resume a leftover one is just removed
+    legacy.write_text(json.dumps(settings) + '\n')
+    fresh = puretone.AlbumJournal(str(output_dir))
+    assert not legacy.exists() and fresh.done('encoded', 'track01.dsf') is None
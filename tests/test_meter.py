@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import puretone
+
+
+def sine(rate, seconds, frequency=1000.0, level_db=-23.0, channels=2):
+    t = np.arange(int(rate * seconds)) / rate
+    wave = 10 ** (level_db / 20) * np.sin(2 * np.pi * frequency * t)
+    return np.repeat(wave[:, None], channels, axis=1)
+
+
+def measure(samples, rate, block=None):
+    meter = puretone.PcmMeter(rate, samples.shape[1], loudness=True)
+    for first in range(0, len(samples), block or len(samples)):
+        meter.feed(samples[first:first + (block or len(samples))])
+    return meter.result()
+
+
+@pytest.mark.parametrize('rate', [44100, 48000, 88200, 192000])
+def test_stereo_1khz_at_minus_23_dbfs(rate):
+    # EBU Tech 3341 case 1: a stereo 1 kHz sine at -23 dBFS reads -23.0 LUFS
+    result = measure(sine(rate, 20), rate)
+    assert result['integrated'] == pytest.approx(-23.0, abs=0.1)
+    assert result['lra'] == pytest.approx(0.0, abs=0.1)
+    assert result['true_peak'] == pytest.approx(-23.0, abs=0.1)
+    assert result['max_volume'] == pytest.approx(-23.0, abs=0.01)
+    assert result['rms_level'] == pytest.approx(-26.01, abs=0.01)
+    assert float(result['loudnorm']['measured_I']) == pytest.approx(-23.0, abs=0.1)
+
+
+def test_gating_ignores_silence():
+    rate = 48000
+    samples = np.concatenate([sine(rate, 10), np.zeros((rate * 10, 2))])
+    assert measure(samples, rate)['integrated'] == pytest.approx(-23.0, abs=0.1)
+    silent = measure(np.zeros((rate * 5, 2)), rate)
+    assert silent['integrated'] == float('-inf') and silent['loudnorm'] is None
+
+
+def test_kweighting_is_independent_of_feed_size():
+    rate = 44100
+    samples = np.random.default_rng(3).standard_normal((rate * 2, 2)) * 0.1
+    whole = puretone.KWeighting(rate, 2)
+    expected = np.concatenate([whole.process(samples), whole.process(np.zeros((0, 2)), flush=True)])
+    split = puretone.KWeighting(rate, 2)
+    pieces = [split.process(samples[a:b]) for a, b in zip([0, 1, 700, 5000, 60001], [1, 700, 5000, 60001, len(samples)])]
+    pieces.append(split.process(np.zeros((0, 2)), flush=True))
+    assert np.allclose(np.concatenate(pieces), expected, atol=1e-12)
+    assert measure(samples, rate, block=4097)['integrated'] == pytest.approx(measure(samples, rate)['integrated'], abs=1e-9)
+
+
+def test_true_peak_finds_inter_sample_peaks():
+    # A quarter-rate sine sampled 45 degrees off its crests peaks 3 dB above its samples
+    rate = 48000
+    t = np.arange(rate)
+    samples = np.repeat((0.5 * np.sin(np.pi / 2 * t + np.pi / 4))[:, None], 2, axis=1)
+    result = measure(samples, rate)
+    assert result['max_volume'] == pytest.approx(puretone.to_db(0.5 / np.sqrt(2)), abs=0.01)
+    assert result['true_peak'] == pytest.approx(puretone.to_db(0.5), abs=0.2)
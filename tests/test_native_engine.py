@@ -0,0 +1,41 @@
+import struct
+
+import numpy as np
+import pytest
+
+import puretone
+from benchmark import dsf
+
+
+def test_reader_parses_header(pink_dsf):
+    reader = puretone.DsfReader(pink_dsf)
+    try:
+        assert (reader.channels, reader.sample_rate) == (2, dsf.DSD_RATES[64])
+        assert reader.sample_count == int(2.5 * dsf.DSD_RATES[64]) // 8 * 8
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize('chunk, size', [(b'fmt ', 0), (b'fmt ', 11), (b'fmt ', 1 << 40), (b'data', 5)])
+def test_reader_rejects_corrupt_chunk_sizes(tmp_path, chunk, size):
+    header = bytearray(dsf.dsf_header(dsf.DSD_RATES[64], 8 * 4096, 2 * 4096)) + bytes(2 * 4096)
+    offset = header.index(chunk)
+    struct.pack_into('<Q', header, offset + 4, size)
+    path = tmp_path / 'corrupt.dsf'
+    path.write_bytes(bytes(header))
+    with pytest.raises(ValueError):
+        puretone.DsfReader(str(path))
+
+
+def native_pcm(path, **kwargs):
+    return np.concatenate(list(puretone.native_pcm_chunks(path, **kwargs)))
+
+
+def test_decimation_is_split_invariant(pink_dsf):
+    whole = native_pcm(pink_dsf, chunk_seconds=3, threads=1)
+    assert len(whole) == puretone.native_frames(pink_dsf)
+    assert np.array_equal(native_pcm(pink_dsf, chunk_seconds=1, threads=4), whole)
+    # Ranges starting and ending anywhere, stitched back together
+    cuts = [0, 1, 44101, 176399, 250000, len(whole)]
+    pieces = [native_pcm(pink_dsf, start=a, end=b, threads=2) for a, b in zip(cuts, cuts[1:])]
+    assert np.array_equal(np.concatenate(pieces), whole)
@@ -0,0 +1,201 @@
+"""--coordinator / worker over localhost, with process_file replaced by a fake encoder (no ffmpeg needed)."""
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import puretone
+
+
+@pytest.fixture
+def remote(monkeypatch, tmp_path):
+    monkeypatch.setattr(puretone.CONFIG, 'REMOTE_TOKEN', 'secret')
+    monkeypatch.setattr(puretone.CONFIG, 'REMOTE_RETRY_INTERVAL', 0.05)
+    monkeypatch.setattr(puretone.CONFIG, 'REMOTE_TIMEOUT', 10.0)
+    monkeypatch.setattr(puretone.CONFIG, 'OUTPUT_FORMATS', ['wav', 'flac'])
+    monkeypatch.setattr(puretone.CONFIG, 'OUTPUT_FORMAT', 'wav')
+    monkeypatch.setattr(puretone.CONFIG, 'ENABLE_VISUALIZATION', False)
+    calls = []
+
+    def fake_process_file(input_file, output_dir, volume):
+        calls.append((threading.current_thread().name, input_file))
+        with open(input_file, 'rb') as f:
+            data = f.read()
+        for fmt in puretone.CONFIG.OUTPUT_FORMATS:
+            path = puretone.output_path(input_file, output_dir, fmt)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(f"{fmt}:{volume}:".encode() + data)
+        return True
+
+    monkeypatch.setattr(puretone, 'process_file', fake_process_file)
+    return calls
+
+
+def start_workers(address, count):
+    stop = threading.Event()
+    slots = [threading.Thread(target=puretone.worker_slot, args=(address, slot, stop), name=f"slot{slot}", daemon=True)
+             for slot in range(count)]
+    for thread in slots:
+        thread.start()
+    return stop, slots
+
+
+def test_workers_on_localhost(remote, tmp_path):
+    album = tmp_path / 'album'
+    album.mkdir()
+    tracks = []
+    for n in range(8):
+        track = album / f"track{n:02d}.dsf"
+        track.write_bytes(os.urandom(4096) * (n + 1))
+        tracks.append(str(track))
+    output_dir = str(tmp_path / 'out' / 'wv')
+    group = {'output_dir': output_dir, 'journal': puretone.AlbumJournal(output_dir)}
+
+    coordinator = puretone.Coordinator(('127.0.0.1', 0))
+    stop, slots = start_workers(coordinator.server.server_address, 3)
+    try:
+        with ThreadPoolExecutor(max_workers=len(tracks)) as executor:
+            results = list(executor.map(lambda track: coordinator.convert(group, track, '1.5dB'), tracks))
+    finally:
+        coordinator.close()
+        stop.set()
+        for thread in slots:
+            thread.join(5)
+
+    assert results == [True] * len(tracks)
+    assert len({slot for slot, _ in remote}) > 1
+    for track in tracks:
+        with open(track, 'rb') as f:
+            data = f.read()
+        for fmt in ('wav', 'flac'):
+            with open(puretone.output_path(track, output_dir, fmt), 'rb') as f:
+                assert f.read() == f"{fmt}:1.5dB:".encode() + data
+        assert group['journal'].done('encoded', track) == {'volume': '1.5dB'}
+
+
+def handshake(sock_file, sock, proof):
+    challenge = json.loads(sock_file.readline())
+    assert challenge['type'] == 'challenge'
+    sock.sendall(json.dumps({'type': 'ready', 'host': 'rogue', 'protocol': puretone.REMOTE_PROTOCOL,
+                             'proof': proof(challenge['nonce']), 'nonce': 'n'}).encode() + b'\n')
+    return json.loads(sock_file.readline() or 'null')
+
+
+def test_coordinator_rejects_wrong_token(remote):
+    coordinator = puretone.Coordinator(('127.0.0.1', 0))
+    try:
+        with socket.create_connection(coordinator.server.server_address, timeout=5) as sock:
+            reply = handshake(sock.makefile('rb'), sock, lambda nonce: 'not-the-hmac')
+        assert reply['type'] == 'rejected'
+        with socket.create_connection(coordinator.server.server_address, timeout=5) as sock:
+            reply = handshake(sock.makefile('rb'), sock, puretone.remote_proof)
+        assert reply['type'] == 'welcome' and reply['proof'] == puretone.remote_proof('n')
+    finally:
+        coordinator.close()
+
+
+def test_worker_refuses_impostor_coordinator(remote):
+    server = socket.create_server(('127.0.0.1', 0))
+    stop, slots = start_workers(server.getsockname(), 1)
+    try:
+        server.settimeout(5)
+        conn, _ = server.accept()
+        with conn:
+            conn.settimeout(5)
+            reader = conn.makefile('rb')
+            conn.sendall(json.dumps({'type': 'challenge', 'protocol': puretone.REMOTE_PROTOCOL, 'nonce': 'x'}).encode() + b'\n')
+            assert json.loads(reader.readline())['type'] == 'ready'
+            conn.sendall(b'{"type": "welcome", "proof": "forged"}\n')
+            # The worker hangs up instead of waiting for a job
+            assert reader.readline() == b''
+    finally:
+        stop.set()
+        server.close()
+        for thread in slots:
+            thread.join(5)
+    assert remote == []
+
+
+def test_worker_job_is_confined(remote, tmp_path):
+    source = tmp_path / 'source.dsf'
+    source.write_bytes(b'dsd' * 1000)
+    work_dir = tmp_path / 'work'
+    coordinator_end, worker_end = socket.socketpair()
+    coordinator, worker = puretone.Channel(coordinator_end), puretone.Channel(worker_end)
+    scratch = puretone.CONFIG.SCRATCH_DIR
+    settings = dict(puretone.remote_settings(), SCRATCH_DIR='/evil')
+    message = {'type': 'job', 'path': str(tmp_path / 'missing.dsf'), 'name': '../../escaped.dsf',
+               'size': source.stat().st_size, 'mtime': 0, 'volume': '0dB', 'settings': settings, 'metadata': []}
+    job = threading.Thread(target=puretone.run_remote_job, args=(worker, message, str(work_dir)))
+    job.start()
+    try:
+        assert coordinator.receive()['type'] == 'fetch'
+        coordinator.send_files({'type': 'input'}, [str(source)])
+        reply = coordinator.receive()
+        received = [str(tmp_path / f"out.{entry['format']}") for entry in reply['files']]
+        coordinator.receive_files(received, [entry['size'] for entry in reply['files']])
+    finally:
+        job.join(5)
+        coordinator.close()
+        worker.close()
+
+    assert reply['ok']
+    assert puretone.CONFIG.SCRATCH_DIR == scratch
+    (_, converted), = remote
+    assert converted == os.path.join(str(work_dir), 'in', 'escaped.dsf')
+    with open(received[0], 'rb') as f:
+        assert f.read() == b'wav:0dB:' + source.read_bytes()
+
+
+
+@pytest.fixture
+def other_run(monkeypatch):
+    """The worker is busy with a track of another coordinator, whose run writes FLAC only."""
+    in_use = puretone.RemoteSettings()
+    in_use.settings = dict(puretone.job_settings(puretone.remote_settings()), OUTPUT_FORMATS=['flac'])
+    in_use.running = 1
+    monkeypatch.setattr(puretone, 'REMOTE_SETTINGS_IN_USE', in_use)
+    return in_use
+
+
+def test_worker_refuses_other_settings_while_busy(remote, other_run, tmp_path):
+    coordinator_end, worker_end = socket.socketpair()
+    coordinator, worker = puretone.Channel(coordinator_end), puretone.Channel(worker_end)
+    message = {'type': 'job', 'path': str(tmp_path / 'a.dsf'), 'name': 'a.dsf', 'size': 1, 'mtime': 0,
+               'volume': '0dB', 'settings': puretone.remote_settings(), 'metadata': []}
+    try:
+        puretone.run_remote_job(worker, message, str(tmp_path / 'work'))
+        reply = coordinator.receive()
+    finally:
+        coordinator.close()
+        worker.close()
+    assert reply['busy'] and not reply['ok']
+    assert remote == [] and other_run.running == 1
+    # A track under the settings in use runs beside it
+    assert other_run.acquire(dict(other_run.settings))
+    assert other_run.running == 2
+
+
+def test_coordinator_waits_out_a_busy_worker(remote, other_run, tmp_path):
+    track = tmp_path / 'track.dsf'
+    track.write_bytes(b'dsd' * 100)
+    output_dir = str(tmp_path / 'out' / 'wv')
+    group = {'output_dir': output_dir, 'journal': puretone.AlbumJournal(output_dir)}
+    release = threading.Timer(0.3, other_run.release)
+    release.start()
+    coordinator = puretone.Coordinator(('127.0.0.1', 0))
+    stop, slots = start_workers(coordinator.server.server_address, 1)
+    try:
+        # Refused more often than REMOTE_ATTEMPTS, none of it counting as a failed attempt
+        assert coordinator.convert(group, str(track), '0dB')
+    finally:
+        release.join()
+        coordinator.close()
+        stop.set()
+        for thread in slots:
+            thread.join(5)
+    assert len(remote) == 1 and other_run.running == 0
@@ -0,0 +1,61 @@
+import csv
+import json
+import threading
+
+import pytest
+
+import puretone
+
+
+def album_store(albums, tracks=20):
+    store = puretone.ResultsStore()
+    for album in albums:
+        for track in range(tracks):
+            store.record(f"{album}/{track:02d}.dsf", 'Output', {'max_volume': -1.0 - track})
+            store.record(f"{album}/{track:02d}.dsf", 'volume', {'applied': '0dB'})
+    return store
+
+
+@pytest.mark.parametrize('name', ['results.json', 'results.csv'])
+def test_concurrent_album_writes_merge(tmp_path, name):
+    albums = [str(tmp_path / f"inbox/album{index}") for index in range(8)]
+    store = album_store(albums)
+    path = str(tmp_path / name)
+
+    def finish(album):
+        store.write(path, store.take_under([album]), merge=True)
+
+    threads = [threading.Thread(target=finish, args=(album,)) for album in albums]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.entries == {}
+    with open(path, newline='') as f:
+        if name.endswith('.csv'):
+            rows = list(csv.DictReader(f))
+            assert len(rows) == 8 * 20 * 2
+            assert {row['file'] for row in rows} == {f"{album}/{track:02d}.dsf" for album in albums for track in range(20)}
+        else:
+            data = json.load(f)
+            assert len(data) == 8 * 20 and data[f"{albums[3]}/05.dsf"]['Output'] == {'max_volume': -6.0}
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')] == []
+
+
+def test_take_under_only_takes_the_album(tmp_path):
+    store = album_store([str(tmp_path / 'a'), str(tmp_path / 'ab')], tracks=2)
+    store.record(str(tmp_path / 'single.dsf'), 'Output', {'max_volume': -3.0})
+    assert sorted(store.take_under([str(tmp_path / 'a')])) == [str(tmp_path / 'a' / '00.dsf'), str(tmp_path / 'a' / '01.dsf')]
+    assert sorted(store.take_under([str(tmp_path / 'single.dsf')])) == [str(tmp_path / 'single.dsf')]
+    assert len(store.entries) == 2
+
+
+def test_a_rerun_album_replaces_its_rows(tmp_path):
+    path = str(tmp_path / 'results.json')
+    album = str(tmp_path / 'album')
+    store = album_store([album], tracks=1)
+    store.write(path, store.take_under([album]), merge=True)
+    store.record(f"{album}/00.dsf", 'Output', {'max_volume': -0.5})
+    store.write(path, store.take_under([album]), merge=True)
+    with open(path) as f:
+        assert json.load(f) == {f"{album}/00.dsf": {'Output': {'max_volume': -0.5}}}
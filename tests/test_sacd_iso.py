@@ -0,0 +1,153 @@
+"""Native SACD ISO reader against a synthetic plain-DSD image (Master TOC, text, 2-channel Area TOC, audio sectors)."""
+import io
+import struct
+
+import numpy as np
+import pytest
+
+import puretone
+
+SECTOR = puretone.SACD_SECTOR
+AREA = 540
+AUDIO = 560
+FRAME_BYTES = 2822400 // 8 // 75 * 2
+# One frame-info entry and one or two packet entries per audio sector
+PAYLOAD = SECTOR - 1 - 2 - 3
+
+
+def put(image, lsn, offset, data):
+    start = lsn * SECTOR + offset
+    image[start:start + len(data)] = data
+
+
+def packet_info(length, frame_start=False, kind=puretone.SACD_AUDIO_PACKET):
+    return struct.pack('>H', (0x8000 if frame_start else 0) | kind << 11 | length)
+
+
+def audio_sectors(image, lsn, audio, lead=b''):
+    """Lay audio out one packet per sector; `lead` is a previous track's tail ahead of the first frame start."""
+    count = 0
+    if lead:
+        rest = SECTOR - 1 - 4 - 3 - len(lead)
+        put(image, lsn, 0, bytes([1 << 3 | 2]) + packet_info(len(lead)) + packet_info(rest, True) + bytes(3) +
+            lead + audio[:rest])
+        audio, lsn, count = audio[rest:], lsn + 1, 1
+    for first in range(0, len(audio), PAYLOAD):
+        piece = audio[first:first + PAYLOAD]
+        put(image, lsn, 0, bytes([1 << 3 | 1]) + packet_info(len(piece), not lead and first == 0) + bytes(3) + piece)
+        lsn, count = lsn + 1, count + 1
+    return count
+
+
+def text_items(*items):
+    data = bytes([len(items), 0, 0, 0])
+    for kind, value in items:
+        entry = bytes([kind, 0]) + value.encode('latin-1') + b'\0'
+        data += entry + bytes(-len(entry) % 4)
+    return data
+
+
+def build_image(path, dst=False):
+    rng = np.random.default_rng(11)
+    tracks = [rng.integers(0, 256, FRAME_BYTES + 3000, dtype=np.uint8).tobytes(),
+              rng.integers(0, 256, 2 * FRAME_BYTES + 100, dtype=np.uint8).tobytes()]
+    image = bytearray(SECTOR * 600)
+
+    master = bytearray(SECTOR)
+    master[:8] = b'SACDMTOC'
+    struct.pack_into('>I', master, 64, AREA)
+    struct.pack_into('>H', master, 84, 4)
+    struct.pack_into('>H', master, 120, 2003)
+    master[138] = 2
+    put(image, puretone.SACD_MASTER_TOC, 0, master)
+    master_text = bytearray(SECTOR)
+    master_text[:8] = b'SACDText'
+    struct.pack_into('>HH', master_text, 16, 64, 96)
+    master_text[64:64 + 12] = 'Álbum Test\0'.encode('latin-1')
+    master_text[96:96 + 10] = b'Orchestra\0'
+    put(image, puretone.SACD_MASTER_TOC + 1, 0, master_text)
+
+    area = bytearray(SECTOR)
+    area[:8] = b'TWOCHTOC'
+    area[20], area[21], area[32], area[69], area[90] = 4, 0 if dst else 2, 2, len(tracks), 2
+    put(image, AREA, 0, area)
+
+    # Track 1 is followed by track 2, whose first sector opens with the tail of track 1
+    first = audio_sectors(image, AUDIO, tracks[0][:-500])
+    second = audio_sectors(image, AUDIO + first, tracks[1], lead=tracks[0][-500:])
+    trl1 = bytearray(SECTOR)
+    trl1[:8] = b'SACDTRL1'
+    struct.pack_into('>2I', trl1, 8, AUDIO, AUDIO + first)
+    struct.pack_into('>2I', trl1, 8 + 4 * 255, first, second)
+    put(image, AREA + 1, 0, trl1)
+    trl2 = bytearray(SECTOR)
+    trl2[:8] = b'SACDTRL2'
+    # Track 1 plays one frame; track 2 has no duration and plays every whole frame it holds
+    struct.pack_into('>8B', trl2, 8 + 4 * 255, 0, 0, 1, 0, 0, 0, 0, 0)
+    put(image, AREA + 2, 0, trl2)
+    ttxt = bytearray(SECTOR)
+    ttxt[:8] = b'SACDTTxt'
+    items = text_items((0x01, 'Overture: Act/One'), (0x02, 'Soloist'), (0x09, 'ignored'))
+    struct.pack_into('>2H', ttxt, 8, 16, 0)
+    ttxt[16:16 + len(items)] = items
+    put(image, AREA + 3, 0, ttxt)
+
+    path.write_bytes(bytes(image))
+    return tracks
+
+
+@pytest.fixture
+def iso(tmp_path):
+    path = tmp_path / 'disc.iso'
+    tracks = build_image(path)
+    disc = puretone.SacdIso(str(path))
+    yield disc, tracks
+    disc.close()
+
+
+def test_toc_and_text(iso):
+    disc, _ = iso
+    assert (disc.sample_rate, disc.channels) == (2822400, 2)
+    assert disc.metadata == {'date': '2003', 'album': 'Álbum Test', 'album_artist': 'Orchestra'}
+    assert [(track['number'], track['frames'], track['metadata']) for track in disc.tracks] == [
+        (1, 1, {'title': 'Overture: Act/One', 'artist': 'Soloist'}), (2, 0, {})]
+
+
+def test_track_audio_becomes_a_dsf(iso, tmp_path):
+    disc, tracks = iso
+    # Track 1 is cut to its one-frame duration; track 2 drops the leading tail of track 1
+    for track, audio in zip(disc.tracks, [tracks[0][:FRAME_BYTES], tracks[1][:2 * FRAME_BYTES]]):
+        stream = io.BytesIO()
+        disc.write_dsf(track, stream)
+        path = tmp_path / f"{track['number']}.dsf"
+        path.write_bytes(stream.getvalue())
+        reader = puretone.DsfReader(str(path))
+        try:
+            assert (reader.channels, reader.sample_rate, reader.sample_count) == (2, 2822400, len(audio) // 2 * 8)
+            expected = [np.frombuffer(audio[c::2].translate(puretone.MSB_TO_LSB), dtype=np.uint8) for c in range(2)]
+            assert np.array_equal(reader.channel_bytes(0, len(audio) // 2), np.stack(expected))
+        finally:
+            reader.close()
+
+
+def test_virtual_tracks(iso, tmp_path):
+    disc, _ = iso
+    files = disc.register_tracks()
+    assert [name.rsplit('/', 1)[1] for name in files] == ['01 - Overture_ Act_One.dsf', '02.dsf']
+    assert puretone.track_format(files[0]) == (1 / 75, 2)
+    args = puretone.sacd_metadata_args(files[0])
+    assert 'track=1/2' in args and 'title=Overture: Act/One' in args and 'album=Álbum Test' in args
+    disc.close()
+    assert files[0] not in puretone.SACD_TRACKS
+
+
+def test_dst_and_non_sacd_images_fall_back(tmp_path):
+    path = tmp_path / 'dst.iso'
+    build_image(path, dst=True)
+    with pytest.raises(ValueError, match='DST'):
+        puretone.SacdIso(str(path))
+    assert puretone.open_sacd_iso(str(path)) is None
+    path.write_bytes(bytes(SECTOR * 600))
+    assert puretone.open_sacd_iso(str(path)) is None
+    path.write_bytes(bytes(SECTOR))
+    assert puretone.open_sacd_iso(str(path)) is None
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+import puretone
+
+
+@pytest.fixture
+def scratch(monkeypatch):
+    monkeypatch.setattr(puretone.CONFIG, 'AUTO_BACKOFF_INTERVAL', 0.01)
+    manager = puretone.ScratchManager()
+    monkeypatch.setattr(puretone, 'SCRATCH', manager)
+    return manager
+
+
+@pytest.fixture
+def scheduler(scratch):
+    schedulers = []
+
+    def make(workers, **kwargs):
+        schedulers.append(puretone.JobScheduler(workers, **kwargs))
+        return schedulers[-1]
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+
+
+def test_dependencies_run_first_and_pass_results(scheduler):
+    jobs = scheduler(4)
+    gate = threading.Event()
+    first = jobs.add(lambda: gate.wait(5) and 2, stage='analyze', name='a')
+    second = jobs.add(lambda: 3, stage='analyze', name='b')
+    total = jobs.add(lambda: first.result * second.result, deps=[first, second], stage='decide', name='sum')
+    time.sleep(0.05)
+    assert not total.done
+    gate.set()
+    jobs.wait()
+    assert total.result == 6
+    # A finished dependency does not hold a new job back
+    late = jobs.add(lambda: total.result + 1, deps=[total])
+    jobs.wait()
+    assert late.result == 7
+
+
+def test_later_stages_run_first(scheduler):
+    order = []
+    gate = threading.Event()
+    jobs = scheduler(1)
+    jobs.add(gate.wait, 5, stage='analyze', name='blocker')
+    for stage in ('analyze', 'encode', 'decide', 'visualize', 'cleanup', 'encode'):
+        jobs.add(order.append, stage, stage=stage)
+    gate.set()
+    jobs.wait()
+    assert order == ['cleanup', 'visualize', 'encode', 'encode', 'decide', 'analyze']
+
+
+def test_stage_limits(scheduler):
+    lock = threading.Lock()
+    running = {'now': 0, 'most': 0}
+
+    def work():
+        with lock:
+            running['now'] += 1
+            running['most'] = max(running['most'], running['now'])
+        time.sleep(0.02)
+        with lock:
+            running['now'] -= 1
+
+    jobs = scheduler(4, limits={'analyze': 1})
+    for _ in range(6):
+        jobs.add(work, stage='analyze')
+    jobs.wait()
+    assert running['most'] == 1
+
+
+def test_scratch_budget_holds_jobs_back(scheduler, scratch):
+    scratch.budget = 100
+    lock = threading.Lock()
+    log = []
+
+    def work(path):
+        with lock:
+            log.append(('start', path, sum(scratch.reserved.values())))
+        time.sleep(0.02)
+
+    jobs = scheduler(4)
+    for index in range(4):
+        jobs.add(work, index, stage='encode', scratch={f"wav{index}": 60})
+    # Larger than the whole budget: admitted once nothing else runs
+    jobs.add(work, 'huge', stage='encode', scratch={'huge': 1000})
+    jobs.wait()
+    assert len(log) == 5
+    assert all(held <= 100 or path == 'huge' for _, path, held in log)
+    assert scratch.reserved == {}
+
+
+def test_failures_and_album_waits(scheduler):
+    jobs = scheduler(2)
+    gate = threading.Event()
+    failed = jobs.add(lambda: 1 / 0, stage='analyze', album='A')
+    after = jobs.add(lambda: 'ran', deps=[failed], stage='decide', album='A')
+    slow = jobs.add(gate.wait, 5, stage='analyze', album='B')
+    jobs.wait('A')
+    assert failed.result is None and after.result == 'ran'
+    assert not slow.done
+    gate.set()
+    jobs.wait()
+    assert slow.result is True
+
+
+def test_jobs_added_while_running(scheduler):
+    jobs = scheduler(2)
+    results = []
+
+    def spawn(depth):
+        results.append(depth)
+        if depth < 3:
+            jobs.add(spawn, depth + 1)
+
+    jobs.add(spawn, 0)
+    jobs.wait()
+    assert results == [0, 1, 2, 3]
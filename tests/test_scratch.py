@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import puretone
+from benchmark import dsf
+
+
+@pytest.fixture
+def scratch(monkeypatch, tmp_path):
+    monkeypatch.setattr(puretone.CONFIG, 'SCRATCH_DIR', str(tmp_path))
+    return puretone.ScratchManager()
+
+
+def test_paths_are_unique_per_input(scratch, tmp_path):
+    first = scratch.path('/music/a/01.dsf', 'temp.wav')
+    assert first == scratch.path('/music/a/01.dsf', 'temp.wav')
+    assert first != scratch.path('/music/b/01.dsf', 'temp.wav')
+    assert os.path.dirname(first) == str(tmp_path) and f"_{os.getpid()}_01_" in first
+
+
+def test_budget_admits_reservations_until_full(scratch):
+    scratch.budget = 100
+    assert scratch.reserve({'a': 60})
+    assert not scratch.reserve({'b': 50})
+    # Re-reserving a path already held costs nothing
+    assert scratch.reserve({'a': 60, 'c': 40})
+    assert scratch.reserve({'d': 500}, force=True)
+    assert sum(scratch.reserved.values()) == 600
+    scratch.budget = None
+    assert scratch.reserve({'e': 10 ** 12})
+
+
+def test_reservations_follow_the_files(scratch):
+    scratch.budget = 100
+    kept, dropped = scratch.path('x', 'kept.wav'), scratch.path('x', 'dropped.wav')
+    assert scratch.reserve({kept: 50, dropped: 50})
+    scratch.track(kept)
+    with open(kept, 'wb') as f:
+        f.write(b'pcm')
+    # The job left `kept` behind, so only `dropped` is released
+    scratch.settle({kept: 50, dropped: 50})
+    assert scratch.reserved == {kept: 50}
+    scratch.remove(kept)
+    assert scratch.reserved == {} and not os.path.exists(kept)
+    scratch.remove(kept)
+
+
+def test_cleanup_removes_only_what_was_handed_out(scratch, tmp_path):
+    tracked = scratch.path('y', 'temp.wav')
+    scratch.track(tracked)
+    open(tracked, 'wb').close()
+    directory = scratch.directory('sacd')
+    open(os.path.join(directory, 'inner.dsf'), 'wb').close()
+    scratch.track(scratch.path('y', 'never-written.wav'))
+    foreign = tmp_path / 'someone_else.wav'
+    foreign.write_bytes(b'keep')
+    scratch.cleanup()
+    assert sorted(os.listdir(tmp_path)) == ['someone_else.wav']
+    assert scratch.files == set() and scratch.dirs == set()
+
+
+def test_estimate_from_the_dsf_header(monkeypatch, tmp_path):
+    monkeypatch.setattr(puretone.CONFIG, 'AR', '176400')
+    path = tmp_path / 'a.dsf'
+    path.write_bytes(dsf.dsf_header(dsf.DSD_RATES[64], dsf.DSD_RATES[64] * 10, 0))
+    assert puretone.track_format(str(path)) == (10.0, 2)
+    assert puretone.scratch_estimate(str(path), 'pcm_s24le') == 176400 * 10 * 2 * 3 + 4096
+    # Unreadable inputs fall back to AUTO_TRACK_SECONDS of stereo
+    expected = int(puretone.CONFIG.AUTO_TRACK_SECONDS * 176400) * 2 * 4 + 4096
+    assert puretone.scratch_estimate(str(tmp_path / 'missing.dsf'), 'pcm_f32le') == expected
@@ -0,0 +1,74 @@
+"""--segment planning and stitching, with resample_segment's ffmpeg step replaced by the raw decimator output."""
+import hashlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+import puretone
+
+
+@pytest.fixture
+def segmented(monkeypatch, tmp_path):
+    monkeypatch.setattr(puretone.CONFIG, 'ENGINE', 'native')
+    monkeypatch.setattr(puretone.CONFIG, 'ACODEC', 'pcm_s24le')
+    monkeypatch.setattr(puretone.CONFIG, 'SEGMENT_SECONDS', 0.3)
+    monkeypatch.setattr(puretone.CONFIG, 'SEGMENT_JOBS', 3)
+    monkeypatch.setattr(puretone.CONFIG, 'SCRATCH_DIR', str(tmp_path))
+
+
+def native_pcm(path, **kwargs):
+    return np.concatenate(list(puretone.native_pcm_chunks(path, **kwargs)))
+
+
+def test_plan_covers_the_track(segmented, pink_dsf, monkeypatch):
+    plan = puretone.segment_plan(pink_dsf)
+    total = puretone.native_frames(pink_dsf)
+    length = int(0.3 * int(puretone.CONFIG.AR))
+    assert [first for first, _ in plan] == list(range(0, total, length))
+    assert sum(frames for _, frames in plan) == total
+    monkeypatch.setattr(puretone.CONFIG, 'SEGMENT_SECONDS', 1.5)
+    assert puretone.segment_plan(pink_dsf) is None
+    monkeypatch.setattr(puretone.CONFIG, 'SEGMENT_SECONDS', 0.3)
+    monkeypatch.setattr(puretone.CONFIG, 'ENGINE', 'ffmpeg')
+    assert puretone.segment_plan(pink_dsf) is None
+
+
+def test_segments_decimate_like_the_whole_track(segmented, pink_dsf):
+    whole = native_pcm(pink_dsf, threads=2)
+    pieces = [native_pcm(pink_dsf, start=first, end=first + frames, threads=1)
+              for first, frames in puretone.segment_plan(pink_dsf)]
+    assert [len(piece) for piece in pieces] == [frames for _, frames in puretone.segment_plan(pink_dsf)]
+    assert np.array_equal(np.concatenate(pieces), whole)
+
+
+class Sink(io.BytesIO):
+    def close(self):
+        self.closed_by_feed = True
+
+
+def test_feed_segments_stitches_in_order(segmented, pink_dsf, monkeypatch):
+    written = []
+
+    def fake_resample(input_file, volume, first, frames, channels, path):
+        written.append(path)
+        with open(path, 'wb') as f:
+            f.write(native_pcm(input_file, start=first, end=first + frames, threads=1).tobytes())
+        return True
+
+    monkeypatch.setattr(puretone, 'resample_segment', fake_resample)
+    plan = puretone.segment_plan(pink_dsf)
+    state, sink = {}, Sink()
+    puretone.feed_segments(pink_dsf, '0dB', plan, 2, state, sink)
+    expected = native_pcm(pink_dsf).tobytes()
+    assert sink.getvalue() == expected and sink.closed_by_feed
+    assert state == {'sha256': hashlib.sha256(expected).hexdigest()}
+    assert len(written) == len(plan) and not any(os.path.exists(path) for path in written)
+
+
+def test_feed_segments_reports_a_failed_segment(segmented, pink_dsf, monkeypatch):
+    monkeypatch.setattr(puretone, 'resample_segment', lambda *args: False)
+    state = {}
+    puretone.feed_segments(pink_dsf, '0dB', puretone.segment_plan(pink_dsf), 2, state, Sink())
+    assert 'failed' in state['error'] and 'sha256' not in state
@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pytest
+
+import puretone
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = puretone.ProcessSupervisor()
+    yield supervisor
+    supervisor.shutdown()
+
+
+def alive(pid):
+    """Running, not merely a zombie waiting for init to reap it."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+def test_stdout_and_bounded_stderr(supervisor, monkeypatch):
+    monkeypatch.setattr(puretone.CONFIG, 'STDERR_BUFFER', 1000)
+    stdout, stderr, rc = supervisor.run(['sh', '-c', 'head -c 200000 /dev/zero | tr "\\0" e >&2; echo out'])
+    assert (stdout, rc) == (b'out\n', 0)
+    assert stderr.startswith(b'e' * 500) and stderr.endswith(b'e' * 500)
+    assert b'199000 bytes of output dropped' in stderr
+
+
+def test_feed_reaches_stdin(supervisor):
+    def feed(stream):
+        stream.write(b'x' * 1000000)
+        stream.close()
+    stdout, _, rc = supervisor.run(['wc', '-c'], feed=feed)
+    assert (int(stdout), rc) == (1000000, 0)
+
+
+def test_timeout_kills_the_process_group(supervisor, monkeypatch, tmp_path):
+    monkeypatch.setattr(puretone.CONFIG, 'PROCESS_TIMEOUT', 0.5)
+    pid_file = tmp_path / 'child'
+    started = time.monotonic()
+    _, _, rc = supervisor.run(['sh', '-c', f'sleep 30 & echo $! > {pid_file}; wait'])
+    assert rc < 0 and time.monotonic() - started < 10
+    assert not alive(int(pid_file.read_text()))
+
+
+def test_shutdown_kills_and_refuses_new_processes(supervisor, tmp_path):
+    pid_file = tmp_path / 'child'
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(
+        done=supervisor.run(['sh', '-c', f'trap "" TERM; sleep 30 & echo $! > {pid_file}; wait'])))
+    runner.start()
+    while not pid_file.exists() or not pid_file.read_text().strip():
+        time.sleep(0.02)
+    supervisor.shutdown()
+    runner.join(10)
+    assert result['done'][2] < 0 and not supervisor.running
+    assert not alive(int(pid_file.read_text()))
+    assert supervisor.run(['true'])[2] != 0